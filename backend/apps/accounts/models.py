@@ -65,13 +65,9 @@ class User(AbstractUser, TimestampedModel):
         return self.email
     
     def has_module_access(self, module_code):
-        """Check if user has access to a specific module."""
-        if not self.tenant:
-            return False
-        return self.tenant.licenses.filter(
-            module__code=module_code,
-            is_active=True
-        ).exists()
+        """Check if user's tenant holds an active, unexpired license for a module."""
+        from apps.modules.entitlements import user_module_codes
+        return module_code in user_module_codes(self)
 
 
 class UserInvitation(TimestampedModel):
@@ -82,6 +82,21 @@ class SubmissionSerializer(serializers.ModelSerializer):
         ]
 
 
+class SubmissionListSerializer(serializers.ModelSerializer):
+    """Submission summary for listings (no code, error output or test results)"""
+    problem_title = serializers.CharField(source='problem.title', read_only=True)
+    
+    class Meta:
+        model = Submission
+        fields = [
+            'id', 'problem', 'problem_title', 'language', 'status', 'score',
+            'passed_test_cases', 'total_test_cases',
+            'execution_time_ms', 'memory_used_mb',
+            'submitted_at', 'completed_at'
+        ]
+        read_only_fields = fields
+
+
 class SubmissionCreateSerializer(serializers.ModelSerializer):
     class Meta:
         model = Submission
@@ -6,7 +6,9 @@ from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from apps.core.permissions import HasModuleAccess
+from apps.core.pagination import SubmittedAtCursorPagination
 from .models import CodingProblem, Submission, UserProgress
+from .serializers import SubmissionSerializer, SubmissionListSerializer, SubmissionCreateSerializer
 
 
 class CodingProblemViewSet(viewsets.ReadOnlyModelViewSet):
@@ -22,6 +24,17 @@ class SubmissionViewSet(viewsets.ModelViewSet):
     """Code submission and execution"""
     permission_classes = [IsAuthenticated, HasModuleAccess]
     module_code = 'code_assessment'
+    pagination_class = SubmittedAtCursorPagination
+    
+    def get_serializer_class(self):
+        if self.action == 'list':
+            return SubmissionListSerializer
+        if self.action == 'create':
+            return SubmissionCreateSerializer
+        return SubmissionSerializer
     
     def get_queryset(self):
-        return Submission.objects.filter(user=self.request.user)
+        queryset = Submission.objects.filter(user=self.request.user).select_related('problem')
+        if self.action == 'list':
+            return queryset.defer('code', 'error_message')
+        return queryset.select_related('user').prefetch_related('test_results__test_case')
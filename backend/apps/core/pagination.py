@@ -0,0 +1,25 @@
+"""
+Keyset (cursor) pagination for long, append-mostly listings.
+
+Pages are fetched with WHERE created_at < <cursor> ORDER BY created_at
+DESC, id over the (tenant|user, -created_at) indexes, so a deep page costs
+the same as the first one and no COUNT(*) is run.
+"""
+from rest_framework.pagination import CursorPagination
+
+
+class CreatedAtCursorPagination(CursorPagination):
+    """Newest first on (-created_at, id); ties are broken by id"""
+    ordering = ('-created_at', 'id')
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    
+    def get_ordering(self, request, queryset, view):
+        # Always the indexed ordering: ?ordering= (OrderingFilter) would turn keyset pages into sorts
+        return self.ordering
+
+
+class SubmittedAtCursorPagination(CreatedAtCursorPagination):
+    """Newest first for models timestamped with submitted_at"""
+    ordering = ('-submitted_at', 'id')
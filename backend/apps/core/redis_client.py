@@ -0,0 +1,28 @@
+"""
+Shared Redis connection for caches, counters and locks.
+"""
+import logging
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Lazily created so importing this module never opens a socket
+_client = None
+
+
+def get_redis():
+    """Return a process-wide Redis client, or None if Redis is not available."""
+    global _client
+    if _client is None:
+        try:
+            import redis
+            _client = redis.Redis.from_url(
+                getattr(settings, 'REDIS_URL', 'redis://localhost:6379/0'),
+                socket_connect_timeout=2,
+                socket_timeout=2,
+                health_check_interval=30,
+            )
+        except Exception as e:
+            logger.warning(f"Redis client unavailable: {e}")
+            return None
+    return _client
@@ -0,0 +1,130 @@
+"""
+Tenant-aware caching of read-heavy GET responses (statistics, histories).
+
+Each cached endpoint depends on one or more scopes ('cvs', 'jobs', ...).
+Every (tenant, scope) pair has a version counter in Redis, and cache keys
+include the current versions, so a model change bumps its scope's version
+and the affected responses are never read again. Entries also expire after
+RESPONSE_CACHE_TTL seconds, which covers writes that bypass signals.
+
+Responses carry an ETag (a hash of the body); a matching If-None-Match
+is answered with 304 Not Modified.
+"""
+import json
+import hashlib
+import logging
+import functools
+from typing import Callable, Iterable, Optional, Sequence
+from django.conf import settings
+from django.db import transaction
+from rest_framework import status
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+from .redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+# Tenant placeholder for responses and scopes shared by every tenant
+GLOBAL = 'global'
+
+
+class ResponseCache:
+    """Versioned per-tenant response cache in Redis"""
+
+    VERSION_KEY = 'response_cache:{tenant}:{scope}:version'
+    ENTRY_KEY = 'response_cache:{tenant}:{endpoint}:{digest}'
+
+    def __init__(self):
+        self.enabled = getattr(settings, 'RESPONSE_CACHE_ENABLED', True)
+        self.ttl = getattr(settings, 'RESPONSE_CACHE_TTL', 300)
+
+    def _entry_key(self, client, request: Request, endpoint: str, tenant, scopes: Sequence[str]) -> str:
+        versions = client.mget([
+            self.VERSION_KEY.format(tenant=tenant, scope=scope)
+            for scope in scopes
+        ])
+        digest = hashlib.sha1(
+            repr((
+                [int(version or 0) for version in versions],
+                sorted(request.query_params.lists()),
+            )).encode('utf-8')
+        ).hexdigest()
+        return self.ENTRY_KEY.format(tenant=tenant, endpoint=endpoint, digest=digest)
+
+    @staticmethod
+    def _finish(request: Request, response: Response, etag: str) -> Response:
+        if etag in request.headers.get('If-None-Match', ''):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        response['ETag'] = etag
+        response['Cache-Control'] = 'private, no-cache'
+        return response
+
+    def serve(self, request: Request, endpoint: str, tenant, scopes: Sequence[str],
+              compute: Callable[[], Response]) -> Response:
+        """Cached response for the request, computing and storing it on a miss"""
+        client = get_redis() if self.enabled else None
+        if client is None:
+            return compute()
+
+        try:
+            key = self._entry_key(client, request, endpoint, tenant, scopes)
+            cached = client.get(key)
+        except Exception as e:
+            logger.warning(f"Response cache read failed: {e}")
+            return compute()
+
+        if cached is not None:
+            etag, body = cached.decode('utf-8').split('\n', 1)
+            return self._finish(request, Response(json.loads(body)), etag)
+
+        response = compute()
+        if response.status_code != status.HTTP_200_OK:
+            return response
+
+        body = json.dumps(response.data, cls=JSONEncoder)
+        etag = '"' + hashlib.sha1(body.encode('utf-8')).hexdigest() + '"'
+        try:
+            client.set(key, f"{etag}\n{body}", ex=self.ttl)
+        except Exception as e:
+            logger.warning(f"Response cache write failed: {e}")
+        return self._finish(request, response, etag)
+
+    def invalidate(self, tenant, scopes: Iterable[str]) -> None:
+        client = get_redis() if self.enabled else None
+        if client is None:
+            return
+        try:
+            pipe = client.pipeline()
+            for scope in scopes:
+                pipe.incr(self.VERSION_KEY.format(tenant=tenant, scope=scope))
+            pipe.execute()
+        except Exception as e:
+            logger.warning(f"Response cache invalidation failed: {e}")
+
+
+def cached_response(endpoint: str, scopes: Sequence[str], shared: bool = False):
+    """
+    Cache a GET view (function view or viewset action) per tenant, or once
+    for all tenants when shared (its scopes are then invalidated with
+    tenant_id=None).
+
+    Apply below @api_view/@action so authentication and permissions run
+    first. Requests from users without a tenant are not cached.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            request = args[0] if isinstance(args[0], Request) else args[1]
+            tenant = GLOBAL if shared else getattr(request.user, 'tenant_id', None)
+            if request.method != 'GET' or not tenant:
+                return view(*args, **kwargs)
+            return ResponseCache().serve(request, endpoint, tenant, scopes, lambda: view(*args, **kwargs))
+        return wrapper
+    return decorator
+
+
+def invalidate_responses(tenant_id: Optional[object], *scopes: str) -> None:
+    """Bump a tenant's (or, with None, the shared) scope versions once the current transaction commits"""
+    tenant = GLOBAL if tenant_id is None else tenant_id
+    transaction.on_commit(lambda: ResponseCache().invalidate(tenant, scopes))
@@ -0,0 +1,71 @@
+"""
+Helpers for server-sent event (SSE) responses.
+"""
+import json
+from typing import Any, Iterable, Optional
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+from rest_framework import renderers
+
+
+def sse_event(data: Any, event: Optional[str] = None) -> str:
+    """Format one SSE message; non-string data is sent as JSON"""
+    payload = data if isinstance(data, str) else json.dumps(data, cls=DjangoJSONEncoder)
+    lines = [f"event: {event}"] if event else []
+    lines.extend(f"data: {line}" for line in (payload.splitlines() or ['']))
+    return '\n'.join(lines) + '\n\n'
+
+
+async def _iterate_in_thread(events: Iterable[str]):
+    """Pull a blocking generator one item at a time without blocking the event loop"""
+    iterator = iter(events)
+    done = object()
+    while True:
+        chunk = await sync_to_async(next, thread_sensitive=False)(iterator, done)
+        if chunk is done:
+            break
+        yield chunk
+
+
+def sse_response(request, events: Iterable[str]) -> StreamingHttpResponse:
+    """
+    Wrap an iterator of SSE messages in a streaming response.
+    Under ASGI the iterator is consumed asynchronously, since Django buffers
+    synchronous iterators there instead of streaming them.
+    """
+    django_request = getattr(request, '_request', request)
+    if isinstance(django_request, ASGIRequest):
+        events = _iterate_in_thread(events)
+
+    response = StreamingHttpResponse(events, content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # Disable proxy buffering (nginx)
+    return response
+
+
+class EventStreamRenderer(renderers.BaseRenderer):
+    """
+    Lets DRF accept `Accept: text/event-stream` on streaming actions.
+    Regular (e.g. error) responses are sent as a single SSE message.
+    """
+    media_type = 'text/event-stream'
+    format = 'sse'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return sse_event(data, event='error').encode(self.charset)
+
+
+def iter_ndjson(response) -> Iterable[dict]:
+    """Yield decoded objects from a streamed newline-delimited JSON HTTP response (e.g. Ollama)"""
+    for line in response.iter_lines():
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError:
+            continue
@@ -0,0 +1,233 @@
+"""
+Runs the ATS checker, CV-job matcher and advanced analyzer, either inline
+or as Celery-backed AnalysisJob records that clients can poll.
+
+Status changes are published on a per-job Redis channel, so waiting clients
+block on pub/sub instead of polling the database.
+"""
+import time
+import logging
+from typing import Any, Dict, Iterator, Optional
+from django.utils import timezone
+from apps.core.redis_client import get_redis
+from .models import CV, AnalysisJob, ATSAnalysis, CVJobMatch, AdvancedCVAnalysis
+from .serializers_new import ATSAnalysisSerializer, CVJobMatchSerializer, AdvancedCVAnalysisSerializer
+from .services import CVAnalysisService
+from .usage_quota import UsageQuotaService
+
+logger = logging.getLogger(__name__)
+
+
+class AnalysisJobService:
+    """Shared analysis runners used by the views (sync mode) and Celery (async mode)"""
+
+    STATUS_CHANNEL = 'analysis_jobs:{job_id}:status'
+
+    @staticmethod
+    def publish(job: AnalysisJob) -> None:
+        """Notify clients waiting on the job that its status changed"""
+        client = get_redis()
+        if client is None:
+            return
+        try:
+            client.publish(AnalysisJobService.STATUS_CHANNEL.format(job_id=job.id), job.status)
+        except Exception as e:
+            logger.warning(f"Analysis job status publish failed: {e}")
+
+    @staticmethod
+    def watch(job: AnalysisJob, timeout: float) -> Iterator[AnalysisJob]:
+        """
+        Yield the job's current state, then again after each published status
+        change until it finishes or `timeout` seconds pass. Without Redis only
+        the current state is yielded and clients fall back to polling.
+        """
+        pubsub = None
+        client = get_redis()
+        if client is not None:
+            try:
+                pubsub = client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(AnalysisJobService.STATUS_CHANNEL.format(job_id=job.id))
+            except Exception as e:
+                logger.warning(f"Analysis job status subscribe failed: {e}")
+                pubsub = None
+
+        deadline = time.monotonic() + timeout
+        try:
+            # Read after subscribing so a change in between is not missed
+            job.refresh_from_db()
+            yield job
+            while pubsub is not None and not job.is_finished:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return
+                try:
+                    message = pubsub.get_message(timeout=remaining)
+                except Exception as e:
+                    logger.warning(f"Analysis job status wait failed: {e}")
+                    return
+                if message is not None:
+                    job.refresh_from_db()
+                    yield job
+        finally:
+            if pubsub is not None:
+                pubsub.close()
+
+    @staticmethod
+    def enqueue(kind: str, tenant, user, cv: CV, params: Dict[str, Any]) -> AnalysisJob:
+        """Create a job record and hand it to a Celery worker"""
+        from .tasks import run_analysis_job_task
+
+        job = AnalysisJob.objects.create(
+            tenant=tenant,
+            user=user,
+            cv=cv,
+            kind=kind,
+            params=params,
+        )
+        async_result = run_analysis_job_task.delay(str(job.id))
+        job.celery_task_id = async_result.id or ''
+        job.save(update_fields=['celery_task_id', 'updated_at'])
+        return job
+
+    @staticmethod
+    def run(job_id) -> AnalysisJob:
+        """Execute a queued job and store its serialized result"""
+        job = AnalysisJob.objects.select_related('cv', 'user', 'tenant').get(id=job_id)
+        if job.is_finished:
+            return job
+
+        job.status = 'processing'
+        job.started_at = timezone.now()
+        job.save(update_fields=['status', 'started_at', 'updated_at'])
+        AnalysisJobService.publish(job)
+
+        try:
+            params = job.params
+            if job.kind == 'ats':
+                analysis = AnalysisJobService.run_ats(
+                    job.cv,
+                    job.user,
+                    request_detailed=params.get('request_detailed', False),
+                    can_get_detailed=params.get('can_get_detailed', False),
+                    is_free_detailed=params.get('is_free_detailed', False),
+                )
+                job.result = ATSAnalysisSerializer(analysis).data
+            elif job.kind == 'cv_match':
+                match = AnalysisJobService.run_cv_match(
+                    job.cv,
+                    job.user,
+                    job_title=params['job_title'],
+                    job_description=params['job_description'],
+                    is_free_match=params.get('is_free_match', False),
+                )
+                job.result = CVJobMatchSerializer(match).data
+            elif job.kind == 'advanced':
+                analysis = AdvancedCVAnalysis.objects.get(id=params['analysis_id'])
+                analysis = AnalysisJobService.run_advanced(analysis)
+                job.result = AdvancedCVAnalysisSerializer(analysis).data
+            else:
+                raise ValueError(f"Unknown analysis job kind: {job.kind}")
+
+            job.status = 'completed'
+        except Exception as e:
+            logger.error(f"Analysis job {job.id} failed: {e}")
+            job.status = 'failed'
+            job.error = str(e)
+            if job.kind == 'advanced' and 'analysis_id' in job.params:
+                AdvancedCVAnalysis.objects.filter(id=job.params['analysis_id']).update(status='failed')
+            # Give back the free use reserved when the job was queued
+            if job.kind == 'ats' and job.params.get('is_free_detailed'):
+                UsageQuotaService.release(job.tenant, 'ats_detailed')
+            elif job.kind == 'cv_match' and job.params.get('is_free_match'):
+                UsageQuotaService.release(job.tenant, 'cv_matcher')
+
+        job.completed_at = timezone.now()
+        job.save(update_fields=['status', 'result', 'error', 'completed_at', 'updated_at'])
+        AnalysisJobService.publish(job)
+        return job
+
+    @staticmethod
+    def previous_ats_data(cv: CV, request_detailed: bool) -> Optional[Dict[str, Any]]:
+        """Rebuild ATS output from an earlier analysis of the same CV, if usable"""
+        previous = cv.ats_analyses.order_by('-has_detailed_report', '-created_at').first()
+        if not previous or (request_detailed and not previous.has_detailed_report):
+            return None
+
+        return {
+            'score': previous.ats_score,
+            'keyword_matches': previous.keyword_matches,
+            'missing_keywords': previous.missing_keywords,
+            'suggestions': previous.quick_suggestions,
+            'detailed_report': previous.detailed_report,
+        }
+
+    @staticmethod
+    def run_ats(
+        cv: CV,
+        user,
+        request_detailed: bool,
+        can_get_detailed: bool,
+        is_free_detailed: bool
+    ) -> ATSAnalysis:
+        """Score a CV for ATS compatibility and record the analysis"""
+        # Reuse a previous result for the same file when possible
+        ats_data = AnalysisJobService.previous_ats_data(cv, request_detailed)
+        if ats_data is None:
+            ats_data = CVAnalysisService().calculate_ats_score(cv.raw_text, cv.section_offsets)
+
+        return ATSAnalysis.objects.create(
+            tenant=cv.tenant,
+            user=user,
+            cv=cv,
+            ats_score=ats_data['score'],
+            keyword_matches=ats_data.get('keyword_matches', []),
+            missing_keywords=ats_data.get('missing_keywords', []),
+            quick_suggestions=ats_data.get('suggestions', []),
+            has_detailed_report=can_get_detailed,
+            detailed_report=ats_data.get('detailed_report', '') if can_get_detailed else '',
+            is_free_detailed_report=is_free_detailed
+        )
+
+    @staticmethod
+    def run_cv_match(
+        cv: CV,
+        user,
+        job_title: str,
+        job_description: str,
+        is_free_match: bool
+    ) -> CVJobMatch:
+        """Match a CV against a job description and record the result"""
+        match_data = CVAnalysisService().match_cv_to_job(cv.raw_text, job_title, job_description)
+
+        return CVJobMatch.objects.create(
+            tenant=cv.tenant,
+            user=user,
+            cv=cv,
+            job_title=job_title,
+            job_description=job_description,
+            match_score=match_data['match_score'],
+            matched_skills=match_data['matched_skills'],
+            missing_skills=match_data['missing_skills'],
+            matching_report=match_data['matching_report'],
+            recommendations=match_data['recommendations'],
+            is_free_match=is_free_match
+        )
+
+    @staticmethod
+    def run_advanced(analysis: AdvancedCVAnalysis) -> AdvancedCVAnalysis:
+        """Fill in a 'processing' advanced analysis"""
+        cv = analysis.cv
+        analysis_data = CVAnalysisService().analyze_advanced_cv(cv.raw_text)
+
+        analysis.full_analysis = analysis_data['full_analysis']
+        analysis.strengths = analysis_data['strengths']
+        analysis.weaknesses = analysis_data['weaknesses']
+        analysis.improvement_suggestions = analysis_data['improvement_suggestions']
+        analysis.career_recommendations = analysis_data['career_recommendations']
+        analysis.status = 'completed'
+        analysis.save()
+
+        cv.status = 'analyzed'
+        cv.save()
+
+        return analysis
@@ -0,0 +1,303 @@
+"""
+Bulk CV import from ZIP archives.
+
+The archive is unpacked entry by entry (never fully in memory) into CV
+storage, CV rows are created in bulk and processing is fanned out to Celery
+as a chord of chunk tasks sized to the worker pool. Each chunk updates the
+CVImportJob counters as CVs finish; the chord callback aggregates results.
+An unpacking error, or a chunk that crashes or hits the task time limit,
+closes the job as failed.
+"""
+import os
+import math
+import hashlib
+import logging
+import tempfile
+import zipfile
+from typing import Any, Dict, List
+from celery import chord
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import IntegrityError, transaction
+from django.db.models import Avg, Count, F
+from django.utils import timezone
+from .models import CV, CVAnalysis, CVImportJob, CVSkill
+from .services import CVProcessingService
+
+logger = logging.getLogger(__name__)
+
+FILE_TYPES = {'.pdf': 'pdf', '.docx': 'docx', '.txt': 'txt'}
+READ_CHUNK = 64 * 1024
+
+
+class CVImportService:
+    """Unpack, create, dispatch and aggregate bulk CV imports"""
+
+    BATCH_SIZE = 500
+
+    @staticmethod
+    def start(tenant, user, archive) -> CVImportJob:
+        """Store the uploaded archive and queue the import"""
+        from .tasks import import_cv_archive_task
+
+        job = CVImportJob.objects.create(
+            tenant=tenant,
+            user=user,
+            archive=archive,
+            archive_name=os.path.basename(archive.name)[:255],
+        )
+        import_cv_archive_task.delay(str(job.id))
+        return job
+
+    @staticmethod
+    def _worker_slots() -> int:
+        """Total Celery worker processes, from the workers themselves or settings"""
+        from config.celery import app
+
+        try:
+            stats = app.control.inspect(timeout=1.0).stats() or {}
+            slots = sum(s.get('pool', {}).get('max-concurrency', 0) for s in stats.values())
+            if slots:
+                return slots
+        except Exception as e:
+            logger.warning(f"Could not inspect Celery workers: {e}")
+        return getattr(settings, 'CV_IMPORT_WORKER_SLOTS', 4)
+
+    @staticmethod
+    def chunk_size(total: int, slots: int) -> int:
+        """A few chunks per worker slot, so slow CVs don't leave workers idle"""
+        per_slot = getattr(settings, 'CV_IMPORT_CHUNKS_PER_SLOT', 4)
+        size = math.ceil(total / max(1, slots * per_slot))
+        return max(getattr(settings, 'CV_IMPORT_MIN_CHUNK', 5), min(size, getattr(settings, 'CV_IMPORT_MAX_CHUNK', 100)))
+
+    @staticmethod
+    def _copy_entry(archive: zipfile.ZipFile, info: zipfile.ZipInfo, max_size: int):
+        """
+        Stream one archive entry to a temp file, hashing as it goes.
+        Returns (temp file, sha256, size), or None if it exceeds max_size.
+        """
+        digest = hashlib.sha256()
+        size = 0
+        tmp = tempfile.SpooledTemporaryFile(max_size=1024 * 1024)
+        with archive.open(info) as source:
+            while True:
+                chunk = source.read(READ_CHUNK)
+                if not chunk:
+                    break
+                size += len(chunk)
+                # Declared sizes can lie (zip bombs); enforce on actual bytes
+                if size > max_size:
+                    tmp.close()
+                    return None
+                digest.update(chunk)
+                tmp.write(chunk)
+        tmp.seek(0)
+        return tmp, digest.hexdigest(), size
+
+    @staticmethod
+    def unpack(job: CVImportJob) -> List[int]:
+        """Save supported archive entries as CVs (bulk created); returns their ids"""
+        max_files = getattr(settings, 'CV_IMPORT_MAX_FILES', 5000)
+        max_size = getattr(settings, 'CV_IMPORT_MAX_FILE_SIZE', 10 * 1024 * 1024)
+
+        known_hashes = set(
+            CV.objects.filter(tenant=job.tenant).exclude(status='failed').values_list('content_hash', flat=True)
+        )
+        upload_field = CV._meta.get_field('file')
+        cv_ids = []
+        pending = []
+        skipped = 0
+
+        def flush():
+            nonlocal skipped
+            try:
+                with transaction.atomic():
+                    created = CV.objects.bulk_create(pending, batch_size=CVImportService.BATCH_SIZE)
+            except IntegrityError:
+                # A file uploaded meanwhile hit uniq_cv_content_hash: insert one by one, skipping it
+                created = []
+                for cv in pending:
+                    try:
+                        with transaction.atomic():
+                            cv.save()
+                        created.append(cv)
+                    except IntegrityError:
+                        default_storage.delete(cv.file.name)
+                        skipped += 1
+            cv_ids.extend(cv.id for cv in created)
+            pending.clear()
+
+        try:
+            with job.archive.open('rb') as archive_file, zipfile.ZipFile(archive_file) as archive:
+                for info in archive.infolist():
+                    basename = os.path.basename(info.filename)
+                    file_type = FILE_TYPES.get(os.path.splitext(basename)[1].lower())
+                    if (
+                        info.is_dir() or not basename or basename.startswith('.')
+                        or '__MACOSX' in info.filename or file_type is None
+                        or info.file_size > max_size
+                    ):
+                        skipped += 1
+                        continue
+                    if len(cv_ids) + len(pending) >= max_files:
+                        skipped += 1
+                        continue
+
+                    copied = CVImportService._copy_entry(archive, info, max_size)
+                    if copied is None:
+                        skipped += 1
+                        continue
+                    tmp, content_hash, size = copied
+
+                    # Same file already uploaded by the tenant, or twice in the archive
+                    if content_hash in known_hashes:
+                        tmp.close()
+                        skipped += 1
+                        continue
+                    known_hashes.add(content_hash)
+
+                    with tmp:
+                        stored_name = default_storage.save(upload_field.generate_filename(None, basename), File(tmp))
+
+                    pending.append(CV(
+                        tenant=job.tenant,
+                        user=job.user,
+                        file=stored_name,
+                        filename=basename[:255],
+                        file_type=file_type,
+                        file_size=size,
+                        content_hash=content_hash,
+                        status='uploaded',
+                        import_job=job,
+                    ))
+                    if len(pending) >= CVImportService.BATCH_SIZE:
+                        flush()
+
+            if pending:
+                flush()
+        except Exception:
+            # Files saved for rows that were never created would be orphaned
+            for cv in pending:
+                try:
+                    default_storage.delete(cv.file.name)
+                except Exception as e:
+                    logger.warning(f"CV import {job.id}: could not delete {cv.file.name}: {e}")
+            raise
+
+        job.total = len(cv_ids)
+        job.skipped = skipped
+        job.save(update_fields=['total', 'skipped', 'updated_at'])
+        return cv_ids
+
+    @staticmethod
+    def run(job_id) -> None:
+        """Unpack the archive and dispatch processing as a Celery chord"""
+        from .tasks import process_cv_import_chunk_task, finalize_cv_import_task, fail_cv_import_task
+
+        job = CVImportJob.objects.select_related('tenant', 'user').get(id=job_id)
+        job.status = 'unpacking'
+        job.started_at = timezone.now()
+        job.save(update_fields=['status', 'started_at', 'updated_at'])
+
+        try:
+            cv_ids = CVImportService.unpack(job)
+        except (zipfile.BadZipFile, OSError) as e:
+            logger.error(f"CV import {job.id}: cannot read archive: {e}")
+            CVImportService.discard_unpacked(job)
+            CVImportService.fail(job.id, f"Invalid archive: {e}")
+            return
+        except Exception as e:
+            logger.exception(f"CV import {job.id}: unpacking failed")
+            CVImportService.discard_unpacked(job)
+            CVImportService.fail(job.id, f"Import failed: {e}")
+            return
+
+        if not cv_ids:
+            CVImportService.finalize(job.id, [])
+            return
+
+        size = CVImportService.chunk_size(len(cv_ids), CVImportService._worker_slots())
+        chunks = [cv_ids[i:i + size] for i in range(0, len(cv_ids), size)]
+
+        job.status = 'processing'
+        job.chunks = len(chunks)
+        job.save(update_fields=['status', 'chunks', 'updated_at'])
+        logger.info(f"CV import {job.id}: {len(cv_ids)} CVs in {len(chunks)} chunks of {size}")
+
+        # A chunk killed by the time limit never reports, so the callback would never run
+        chord(
+            process_cv_import_chunk_task.s(str(job.id), chunk) for chunk in chunks
+        )(finalize_cv_import_task.s(str(job.id)).on_error(fail_cv_import_task.s(str(job.id))))
+
+    @staticmethod
+    def discard_unpacked(job: CVImportJob) -> None:
+        """Delete the CVs (and stored files) created before unpacking failed"""
+        cvs = CV.objects.filter(import_job=job, status='uploaded')
+        names = list(cvs.values_list('file', flat=True))
+        cvs.delete()
+        for name in names:
+            try:
+                default_storage.delete(name)
+            except Exception as e:
+                logger.warning(f"CV import {job.id}: could not delete {name}: {e}")
+
+    @staticmethod
+    def fail(job_id, error: str) -> None:
+        """Close an unfinished import as failed"""
+        CVImportJob.objects.filter(id=job_id).exclude(status__in=['completed', 'failed']).update(
+            status='failed', error=error, completed_at=timezone.now(), updated_at=timezone.now()
+        )
+
+    @staticmethod
+    def process_chunk(job_id, cv_ids: List[int]) -> Dict[str, int]:
+        """Process a chunk of imported CVs, updating job progress after each one"""
+        processed = failed = 0
+        for cv_id in cv_ids:
+            try:
+                CVProcessingService.process_cv(cv_id)
+                processed += 1
+                CVImportJob.objects.filter(id=job_id).update(processed=F('processed') + 1)
+            except Exception as e:
+                logger.error(f"CV import {job_id}: CV {cv_id} failed: {e}")
+                failed += 1
+                CVImportJob.objects.filter(id=job_id).update(failed=F('failed') + 1)
+        return {'processed': processed, 'failed': failed}
+
+    @staticmethod
+    def finalize(job_id, results: List[Dict[str, Any]]) -> CVImportJob:
+        """Chord callback: aggregate results and close the job"""
+        job = CVImportJob.objects.get(id=job_id)
+        cvs = CV.objects.filter(import_job=job)
+
+        scores = CVAnalysis.objects.filter(cv__import_job=job)
+        top_skills = (
+            CVSkill.objects.filter(cv__import_job=job)
+            .values('skill__name')
+            .annotate(count=Count('id'))
+            .order_by('-count')[:20]
+        )
+        job.summary = {
+            'chunks_reported': len(results),
+            'processed': sum(r.get('processed', 0) for r in results),
+            'failed': sum(r.get('failed', 0) for r in results),
+            'average_overall_score': scores.aggregate(avg=Avg('overall_score'))['avg'],
+            'score_distribution': {
+                'excellent': scores.filter(overall_score__gte=80).count(),
+                'good': scores.filter(overall_score__gte=60, overall_score__lt=80).count(),
+                'fair': scores.filter(overall_score__gte=40, overall_score__lt=60).count(),
+                'weak': scores.filter(overall_score__lt=40).count(),
+            },
+            'top_skills': [{'skill': s['skill__name'], 'count': s['count']} for s in top_skills],
+            'failed_files': list(cvs.filter(status='failed').values_list('filename', flat=True)[:50]),
+        }
+        job.status = 'completed'
+        job.completed_at = timezone.now()
+        job.save(update_fields=['summary', 'status', 'completed_at', 'updated_at'])
+
+        # The CVs are stored individually now; the archive is no longer needed
+        if job.archive:
+            job.archive.delete(save=True)
+
+        logger.info(f"CV import {job.id} completed: {job.processed} processed, {job.failed} failed")
+        return job
@@ -0,0 +1,221 @@
+"""
+Micro-batched embedding queue.
+
+Saves of CVs and job postings don't encode anything themselves: document ids
+are added to per-kind Redis sorted sets (scored by enqueue time) and a flush
+task on the dedicated embeddings Celery queue drains them in batches. A
+flush runs EMBEDDING_MICROBATCH_WINDOW seconds after the first pending
+document, or immediately once EMBEDDING_MICROBATCH_SIZE documents are
+waiting, so bursts (job ingestion, bulk imports) share model calls.
+
+A batch is claimed by moving its ids from the pending set to a processing
+set and only dropped from there once its vectors are written. Batches that
+fail go back to the pending set with their enqueue times, and claims left
+behind by a crashed worker are returned by the next flush, so no document
+is lost; while the model is unavailable nothing is claimed and the flush is
+retried later.
+
+Throughput (docs/sec of encoder time) and queue latency (enqueue to flush)
+are kept in a Redis hash for sizing the embedding workers.
+"""
+import time
+import logging
+from typing import Any, Dict, Iterable, List, Tuple
+from django.conf import settings
+from apps.core.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+KINDS = ('cv', 'job')
+
+
+class EmbeddingBatcher:
+    """Coalesce pending embedding work into micro-batches"""
+
+    PENDING_KEY = 'embedding_queue:pending:{kind}'
+    PROCESSING_KEY = 'embedding_queue:processing:{kind}'
+    FLUSH_SCHEDULED_KEY = 'embedding_queue:flush_scheduled'
+    FLUSH_NOW_KEY = 'embedding_queue:flush_now'
+    STATS_KEY = 'embedding_queue:stats'
+    # Seconds before a flush is retried after a failure
+    RETRY_DELAY = 60
+    # Seconds after which a claimed batch is considered abandoned by its worker
+    CLAIM_TIMEOUT = 600
+
+    def __init__(self):
+        self.batch_size = getattr(settings, 'EMBEDDING_MICROBATCH_SIZE', 64)
+        self.window = getattr(settings, 'EMBEDDING_MICROBATCH_WINDOW', 2.0)
+
+    def enqueue(self, kind: str, ids: Iterable[int]) -> None:
+        """Add documents to the pending set and make sure a flush is coming"""
+        ids = list(ids)
+        client = get_redis()
+        if client is None:
+            # No Redis to coalesce in: encode this group on its own
+            from .tasks import embed_documents_task
+            embed_documents_task.delay(kind, ids)
+            return
+
+        now = time.time()
+        pipe = client.pipeline()
+        # NX keeps the first enqueue time of documents saved again while pending
+        pipe.zadd(self.PENDING_KEY.format(kind=kind), {str(object_id): now for object_id in ids}, nx=True)
+        for pending_kind in KINDS:
+            pipe.zcard(self.PENDING_KEY.format(kind=pending_kind))
+        results = pipe.execute()
+        pending = sum(results[1:])
+
+        if pending >= self.batch_size:
+            # A full batch is waiting; the short guard stops one flush per save
+            if client.set(self.FLUSH_NOW_KEY, 1, nx=True, ex=max(1, int(self.window))):
+                from .tasks import flush_embedding_queue_task
+                flush_embedding_queue_task.delay()
+        else:
+            self._schedule_flush(client, self.window)
+
+    def _schedule_flush(self, client, countdown: float) -> None:
+        """Queue a flush in `countdown` seconds unless one is already scheduled"""
+        if client.set(self.FLUSH_SCHEDULED_KEY, 1, nx=True, ex=max(1, int(countdown)) + 30):
+            from .tasks import flush_embedding_queue_task
+            flush_embedding_queue_task.apply_async(countdown=countdown)
+
+    def _claim(self, client, kind: str) -> List[Tuple[bytes, float]]:
+        """Atomically move the oldest pending batch of a kind to its processing set"""
+        pending_key = self.PENDING_KEY.format(kind=kind)
+        processing_key = self.PROCESSING_KEY.format(kind=kind)
+
+        def claim(pipe):
+            batch = pipe.zrange(pending_key, 0, self.batch_size - 1, withscores=True)
+            pipe.multi()
+            if batch:
+                pipe.zrem(pending_key, *[member for member, _ in batch])
+                pipe.zadd(processing_key, {member: time.time() for member, _ in batch})
+            return batch
+
+        return client.transaction(claim, pending_key, value_from_callable=True)
+
+    def _release(self, client, kind: str, batch: List[Tuple[bytes, float]]) -> None:
+        """Return a claimed batch to the pending set, keeping the earlier enqueue time"""
+        pipe = client.pipeline()
+        pipe.zadd(self.PENDING_KEY.format(kind=kind), dict(batch), lt=True)
+        pipe.zrem(self.PROCESSING_KEY.format(kind=kind), *[member for member, _ in batch])
+        pipe.execute()
+
+    def _recover(self, client, kind: str) -> int:
+        """Return batches claimed by workers that died before finishing them"""
+        abandoned = client.zrangebyscore(
+            self.PROCESSING_KEY.format(kind=kind), '-inf', time.time() - self.CLAIM_TIMEOUT, withscores=True
+        )
+        if abandoned:
+            logger.warning(f"Re-queueing {len(abandoned)} abandoned {kind} embedding claims")
+            self._release(client, kind, abandoned)
+        return len(abandoned)
+
+    def flush(self) -> Dict[str, int]:
+        """Drain every pending document in batches; returns documents encoded per kind"""
+        from .embeddings import EmbeddingService, get_encoder
+
+        client = get_redis()
+        if client is None:
+            return {}
+        # Documents arriving from now on schedule their own flush
+        client.delete(self.FLUSH_SCHEDULED_KEY, self.FLUSH_NOW_KEY)
+
+        encoded = {kind: 0 for kind in KINDS}
+        for kind in KINDS:
+            self._recover(client, kind)
+        if get_encoder() is None:
+            # Leave everything pending until the model can be loaded
+            self._schedule_flush(client, self.RETRY_DELAY)
+            return encoded
+
+        for kind in KINDS:
+            processing_key = self.PROCESSING_KEY.format(kind=kind)
+            while True:
+                batch = self._claim(client, kind)
+                if not batch:
+                    break
+                ids = [int(member) for member, _ in batch]
+                claimed_at = time.time()
+                latencies = [claimed_at - score for _, score in batch]
+
+                started = time.perf_counter()
+                try:
+                    count = EmbeddingService.embed(kind, ids)
+                except Exception as e:
+                    logger.error(f"Embedding batch of {len(ids)} {kind} documents failed: {e}")
+                    self._record(client, len(ids), 0, time.perf_counter() - started, latencies, failed=True)
+                    # Retried later rather than in a tight loop on the same documents
+                    self._release(client, kind, batch)
+                    self._schedule_flush(client, self.RETRY_DELAY)
+                    break
+                client.zrem(processing_key, *[member for member, _ in batch])
+                encoded[kind] += count
+                self._record(client, len(ids), count, time.perf_counter() - started, latencies)
+        return encoded
+
+    def _record(self, client, docs: int, encoded: int, seconds: float,
+                latencies: List[float], failed: bool = False) -> None:
+        try:
+            pipe = client.pipeline()
+            pipe.hincrby(self.STATS_KEY, 'batches', 1)
+            pipe.hincrby(self.STATS_KEY, 'docs', docs)
+            pipe.hincrby(self.STATS_KEY, 'encoded', encoded)
+            if failed:
+                pipe.hincrby(self.STATS_KEY, 'failed_batches', 1)
+            pipe.hincrbyfloat(self.STATS_KEY, 'busy_seconds', seconds)
+            pipe.hincrbyfloat(self.STATS_KEY, 'latency_total', sum(latencies))
+            pipe.hset(self.STATS_KEY, mapping={
+                'last_batch_docs': docs,
+                'last_batch_seconds': round(seconds, 4),
+                'last_queue_latency_max': round(max(latencies), 3),
+            })
+            pipe.execute()
+        except Exception as e:
+            logger.warning(f"Embedding queue metrics update failed: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Throughput, queue latency and current backlog of the embedding tier"""
+        client = get_redis()
+        if client is None:
+            return {'enabled': False}
+
+        try:
+            raw = client.hgetall(self.STATS_KEY)
+            pipe = client.pipeline()
+            for kind in KINDS:
+                key = self.PENDING_KEY.format(kind=kind)
+                pipe.zcard(key)
+                pipe.zrange(key, 0, 0, withscores=True)
+            for kind in KINDS:
+                pipe.zcard(self.PROCESSING_KEY.format(kind=kind))
+            results = pipe.execute()
+            pending, processing = results[:2 * len(KINDS)], results[2 * len(KINDS):]
+        except Exception as e:
+            logger.warning(f"Embedding queue stats failed: {e}")
+            return {'enabled': True, 'error': str(e)}
+
+        counters = {k.decode('utf-8'): float(v) for k, v in raw.items()}
+        docs = int(counters.get('docs', 0))
+        busy = counters.get('busy_seconds', 0.0)
+        now = time.time()
+        oldest = [entries[0][1] for entries in pending[1::2] if entries]
+        return {
+            'enabled': True,
+            'batches': int(counters.get('batches', 0)),
+            'failed_batches': int(counters.get('failed_batches', 0)),
+            'docs': docs,
+            'encoded': int(counters.get('encoded', 0)),
+            # Documents per second of worker time spent in batches (excludes idle time)
+            'docs_per_sec': round(docs / busy, 2) if busy else 0.0,
+            'avg_batch_size': round(docs / counters['batches'], 2) if counters.get('batches') else 0.0,
+            'avg_queue_latency': round(counters.get('latency_total', 0.0) / docs, 3) if docs else 0.0,
+            'last_batch_docs': int(counters.get('last_batch_docs', 0)),
+            'last_batch_seconds': counters.get('last_batch_seconds', 0.0),
+            'last_queue_latency_max': counters.get('last_queue_latency_max', 0.0),
+            'pending': dict(zip(KINDS, pending[0::2])),
+            'processing': dict(zip(KINDS, processing)),
+            'oldest_pending_age': round(now - min(oldest), 3) if oldest else 0.0,
+            'batch_size': self.batch_size,
+            'window': self.window,
+        }
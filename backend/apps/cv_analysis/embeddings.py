@@ -0,0 +1,430 @@
+"""
+Embedding-based semantic CV <-> job search.
+
+CVs (section by section, averaged) and job postings are encoded with a
+small local sentence-transformers model on CPU, in batches. Vectors are
+stored in DocumentEmbedding and indexed per tenant and kind in a local ANN
+index (HNSW via hnswlib when installed, exact NumPy search otherwise).
+
+The index is persisted under EMBEDDING_INDEX_DIR and versioned in Redis:
+writers insert incrementally and bump the version, other processes on the
+host reload the saved file, and other hosts rebuild from the stored vectors.
+Queries only look up stored vectors, so they never run the model.
+"""
+import os
+import hashlib
+import logging
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from apps.core.redis_client import get_redis
+from .models import CV, DocumentEmbedding, JobPosting
+from .sections import SectionSegmenter
+
+logger = logging.getLogger(__name__)
+
+try:
+    import hnswlib
+except ImportError:  # exact NumPy search is used instead
+    hnswlib = None
+
+# CV sections encoded separately and averaged into the document vector
+CV_SECTIONS = ('summary', 'experience', 'skills', 'projects', 'education')
+
+_encoder = None
+_encoder_lock = threading.Lock()
+
+
+def get_encoder():
+    """Process-wide sentence-transformers model, loaded on first use (None if unavailable)"""
+    global _encoder
+    if _encoder is None:
+        with _encoder_lock:
+            if _encoder is None:
+                try:
+                    from sentence_transformers import SentenceTransformer
+                    _encoder = SentenceTransformer(
+                        getattr(settings, 'EMBEDDING_MODEL', 'sentence-transformers/all-MiniLM-L6-v2'),
+                        device='cpu'
+                    )
+                except Exception as e:
+                    logger.error(f"Embedding model unavailable: {e}")
+                    return None
+    return _encoder
+
+
+def encode(texts: List[str]) -> Optional[np.ndarray]:
+    """L2-normalized float32 embeddings, encoded in batches of EMBEDDING_BATCH_SIZE"""
+    model = get_encoder()
+    if model is None:
+        return None
+    vectors = model.encode(
+        texts,
+        batch_size=getattr(settings, 'EMBEDDING_BATCH_SIZE', 32),
+        convert_to_numpy=True,
+        normalize_embeddings=True,
+        show_progress_bar=False,
+    )
+    return np.asarray(vectors, dtype=np.float32)
+
+
+def cv_texts(cv: CV) -> List[str]:
+    """Texts embedded for a CV: its main sections, or the whole text if none were found"""
+    index = SectionSegmenter.index_for(cv.raw_text, cv.section_offsets)
+    texts = [
+        SectionSegmenter.slice(cv.raw_text, index, section).strip()
+        for section in CV_SECTIONS
+    ]
+    texts = [text for text in texts if text]
+    return texts or ([cv.raw_text.strip()] if cv.raw_text.strip() else [])
+
+
+def job_texts(job: JobPosting) -> List[str]:
+    """Texts embedded for a job posting"""
+    text = '\n'.join(part for part in (job.title, job.description, job.requirements) if part).strip()
+    return [text] if text else []
+
+
+class VectorIndex:
+    """Cosine top-k over one tenant's CV or job vectors"""
+
+    def __init__(self, dim: int):
+        self.dim = dim
+        self.ids = np.zeros(0, dtype=np.int64)
+        self.vectors = np.zeros((0, dim), dtype=np.float32)
+        self._hnsw = None
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def _build_hnsw(self) -> None:
+        if hnswlib is None:
+            return
+        self._hnsw = hnswlib.Index(space='ip', dim=self.dim)
+        self._hnsw.init_index(
+            max_elements=max(1024, len(self.ids) * 2),
+            ef_construction=getattr(settings, 'EMBEDDING_HNSW_EF_CONSTRUCTION', 200),
+            M=getattr(settings, 'EMBEDDING_HNSW_M', 16),
+        )
+        if len(self.ids):
+            self._hnsw.add_items(self.vectors, self.ids)
+
+    def add(self, ids: np.ndarray, vectors: np.ndarray) -> None:
+        """Insert or replace vectors"""
+        positions = {object_id: position for position, object_id in enumerate(self.ids.tolist())}
+        new_rows = []
+        for object_id, vector in zip(ids.tolist(), vectors):
+            if object_id in positions:
+                self.vectors[positions[object_id]] = vector
+            else:
+                new_rows.append((object_id, vector))
+        if new_rows:
+            self.ids = np.concatenate([self.ids, np.array([row[0] for row in new_rows], dtype=np.int64)])
+            self.vectors = np.vstack([self.vectors, np.stack([row[1] for row in new_rows])])
+
+        if self._hnsw is not None:
+            # The graph's element count includes slots of removed (mark_deleted) vectors
+            if self._hnsw.get_current_count() + len(new_rows) > self._hnsw.get_max_elements():
+                if self._hnsw.get_current_count() > len(self.ids) - len(new_rows):
+                    # Rebuilding from the live vectors (new ones included) drops the deleted slots
+                    self._build_hnsw()
+                    return
+                self._hnsw.resize_index(len(self.ids) * 2)
+            # hnswlib replaces the vector of an existing label
+            self._hnsw.add_items(vectors, ids)
+
+    def remove(self, ids: Iterable[int]) -> None:
+        ids = set(ids)
+        keep = np.array([object_id not in ids for object_id in self.ids.tolist()], dtype=bool)
+        removed = self.ids[~keep]
+        self.ids = self.ids[keep]
+        self.vectors = self.vectors[keep]
+        if self._hnsw is not None:
+            for object_id in removed.tolist():
+                self._hnsw.mark_deleted(object_id)
+
+    def search(self, vector: np.ndarray, k: int) -> List[Tuple[int, float]]:
+        """(object_id, cosine similarity) of the k nearest vectors"""
+        k = min(k, len(self.ids))
+        if k <= 0:
+            return []
+        if self._hnsw is not None:
+            self._hnsw.set_ef(max(k * 2, getattr(settings, 'EMBEDDING_HNSW_EF', 64)))
+            labels, distances = self._hnsw.knn_query(vector, k=k)
+            return [(int(label), float(1.0 - distance)) for label, distance in zip(labels[0], distances[0])]
+
+        scores = self.vectors @ vector
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind='stable')]
+        return [(int(self.ids[i]), float(scores[i])) for i in top]
+
+    def save(self, base_path: str, version: int) -> None:
+        """Write the graph for this version, then the vectors file that points at it"""
+        directory = os.path.dirname(base_path)
+        os.makedirs(directory, exist_ok=True)
+        if self._hnsw is not None:
+            self._hnsw.save_index(f"{base_path}.v{version}.hnsw")
+        temp_path = f"{base_path}.tmp.npz"
+        np.savez(temp_path, ids=self.ids, vectors=self.vectors, version=np.int64(version))
+        os.replace(temp_path, f"{base_path}.npz")
+
+        prefix = os.path.basename(base_path) + '.v'
+        for name in os.listdir(directory):
+            if name.startswith(prefix) and name.endswith('.hnsw') and name != f"{prefix}{version}.hnsw":
+                try:
+                    os.unlink(os.path.join(directory, name))
+                except OSError:
+                    pass
+
+    @classmethod
+    def load(cls, base_path: str, version: int) -> Optional['VectorIndex']:
+        """The saved index, if it exists and is at the given version"""
+        try:
+            with np.load(f"{base_path}.npz") as data:
+                if int(data['version']) != version:
+                    return None
+                index = cls(data['vectors'].shape[1])
+                index.ids = data['ids']
+                index.vectors = data['vectors']
+        except (OSError, KeyError, ValueError):
+            return None
+
+        if hnswlib is not None:
+            try:
+                index._hnsw = hnswlib.Index(space='ip', dim=index.dim)
+                index._hnsw.load_index(f"{base_path}.v{version}.hnsw", max_elements=max(1024, len(index.ids) * 2))
+            except RuntimeError:
+                index._build_hnsw()
+        return index
+
+    @classmethod
+    def from_vectors(cls, ids: np.ndarray, vectors: np.ndarray, dim: int) -> 'VectorIndex':
+        index = cls(dim)
+        index.ids = ids
+        index.vectors = vectors
+        index._build_hnsw()
+        return index
+
+
+class EmbeddingIndex:
+    """Persistent, versioned ANN index of one tenant's CV or job embeddings"""
+
+    # Process-local indexes: (tenant_id, kind) -> (version, VectorIndex)
+    _local: Dict[Tuple[int, str], tuple] = {}
+    _local_lock = threading.Lock()
+
+    def __init__(self, tenant_id: int, kind: str):
+        self.tenant_id = tenant_id
+        self.kind = kind
+        prefix = f"embedding_index:{tenant_id}:{kind}"
+        self.version_key = f"{prefix}:version"
+        self.lock_key = f"{prefix}:lock"
+        self.base_path = os.path.join(
+            str(getattr(settings, 'EMBEDDING_INDEX_DIR', 'var/embeddings')),
+            f"{tenant_id}_{kind}"
+        )
+
+    def _version(self, client) -> int:
+        return int(client.get(self.version_key) or 0) if client is not None else -1
+
+    def _from_database(self) -> VectorIndex:
+        rows = list(
+            DocumentEmbedding.objects.filter(tenant_id=self.tenant_id, kind=self.kind)
+            .values_list('object_id', 'vector')
+        )
+        if not rows:
+            return VectorIndex(0)
+        ids = np.array([object_id for object_id, _ in rows], dtype=np.int64)
+        vectors = np.stack([np.frombuffer(bytes(vector), dtype=np.float32) for _, vector in rows])
+        return VectorIndex.from_vectors(ids, vectors, vectors.shape[1])
+
+    def load(self) -> VectorIndex:
+        """Index at the current version: from memory, the saved file, or rebuilt from the database"""
+        client = get_redis()
+        try:
+            version = self._version(client)
+        except Exception as e:
+            logger.warning(f"Embedding index version unavailable, rebuilding: {e}")
+            client, version = None, -1
+
+        key = (self.tenant_id, self.kind)
+        cached = self._local.get(key)
+        if cached and cached[0] == version and version >= 0:
+            return cached[1]
+
+        index = VectorIndex.load(self.base_path, version) if version >= 0 else None
+        if index is None:
+            index = self._from_database()
+            if version >= 0 and len(index):
+                index.save(self.base_path, version)
+        with self._local_lock:
+            self._local[key] = (version, index)
+        return index
+
+    def update(self, ids: np.ndarray = None, vectors: np.ndarray = None, removed: Iterable[int] = ()) -> None:
+        """Insert/replace/remove vectors, publish a new version and save it"""
+        client = get_redis()
+        if client is None:
+            return  # every load rebuilds from the database
+
+        with client.lock(self.lock_key, timeout=120, blocking_timeout=30):
+            index = self.load()
+            if ids is not None and len(ids):
+                if not len(index):
+                    index = VectorIndex.from_vectors(ids, vectors, vectors.shape[1])
+                else:
+                    index.add(ids, vectors)
+            removed = list(removed)
+            if removed and len(index):
+                index.remove(removed)
+            version = client.incr(self.version_key)
+            index.save(self.base_path, version)
+            with self._local_lock:
+                self._local[(self.tenant_id, self.kind)] = (version, index)
+
+
+class EmbeddingService:
+    """Encode CVs and jobs, keep their indexes current, and answer semantic top-k queries"""
+
+    @staticmethod
+    def _documents(kind: str, ids: List[int]):
+        if kind == 'cv':
+            return [(cv.id, cv.tenant_id, cv_texts(cv)) for cv in CV.objects.filter(id__in=ids)]
+        return [(job.id, job.tenant_id, job_texts(job)) for job in JobPosting.objects.filter(id__in=ids)]
+
+    @staticmethod
+    def embed(kind: str, ids: Iterable[int]) -> int:
+        """
+        Encode the given CVs or jobs (unchanged texts are skipped) in one
+        batched call, store the vectors and insert them into the indexes.
+        Returns the number of documents encoded.
+        """
+        model_name = getattr(settings, 'EMBEDDING_MODEL', 'sentence-transformers/all-MiniLM-L6-v2')
+        documents = [doc for doc in EmbeddingService._documents(kind, list(ids)) if doc[2]]
+        existing = dict(
+            DocumentEmbedding.objects.filter(kind=kind, object_id__in=[doc[0] for doc in documents])
+            .values_list('object_id', 'text_hash')
+        )
+
+        pending = []
+        for object_id, tenant_id, texts in documents:
+            text_hash = hashlib.sha256('\x00'.join([model_name] + texts).encode('utf-8')).hexdigest()
+            if existing.get(object_id) != text_hash:
+                pending.append((object_id, tenant_id, texts, text_hash))
+        if not pending:
+            return 0
+
+        # All texts of the batch go through the model together
+        flat = [text for _, _, texts, _ in pending for text in texts]
+        encoded = encode(flat)
+        if encoded is None:
+            return 0
+
+        rows = []
+        position = 0
+        for object_id, tenant_id, texts, text_hash in pending:
+            vector = encoded[position:position + len(texts)].mean(axis=0)
+            position += len(texts)
+            vector /= max(np.linalg.norm(vector), 1e-12)
+            rows.append(DocumentEmbedding(
+                tenant_id=tenant_id,
+                kind=kind,
+                object_id=object_id,
+                model_name=model_name,
+                text_hash=text_hash,
+                vector=vector.astype(np.float32).tobytes(),
+            ))
+
+        DocumentEmbedding.objects.bulk_create(
+            rows,
+            update_conflicts=True,
+            unique_fields=['kind', 'object_id'],
+            update_fields=['model_name', 'text_hash', 'vector', 'updated_at'],
+        )
+
+        by_tenant: Dict[int, List[DocumentEmbedding]] = {}
+        for row in rows:
+            by_tenant.setdefault(row.tenant_id, []).append(row)
+        failed = []
+        for tenant_id, tenant_rows in by_tenant.items():
+            try:
+                EmbeddingIndex(tenant_id, kind).update(
+                    np.array([row.object_id for row in tenant_rows], dtype=np.int64),
+                    np.stack([np.frombuffer(row.vector, dtype=np.float32) for row in tenant_rows]),
+                )
+            except Exception as e:
+                logger.error(f"Embedding index update failed for tenant {tenant_id} ({kind}): {e}")
+                failed.extend(row.object_id for row in tenant_rows)
+        if failed:
+            # Without a matching hash the next attempt re-encodes them and retries the index
+            DocumentEmbedding.objects.filter(kind=kind, object_id__in=failed).update(text_hash='')
+            raise RuntimeError(f"Embedding index update failed for {len(failed)} {kind} documents")
+
+        logger.info(f"Embedded {len(rows)} {kind} documents ({len(flat)} texts)")
+        return len(rows)
+
+    @staticmethod
+    def remove(tenant_id: int, kind: str, ids: Iterable[int]) -> None:
+        ids = list(ids)
+        DocumentEmbedding.objects.filter(kind=kind, object_id__in=ids).delete()
+        EmbeddingIndex(tenant_id, kind).update(removed=ids)
+
+    @staticmethod
+    def _query_vector(kind: str, object_id: int) -> Optional[np.ndarray]:
+        stored = DocumentEmbedding.objects.filter(kind=kind, object_id=object_id).values_list('vector', flat=True).first()
+        return np.frombuffer(bytes(stored), dtype=np.float32) if stored is not None else None
+
+    @staticmethod
+    def similar_jobs(cv: CV, k: int = 20) -> Optional[List[Dict]]:
+        """Nearest active jobs to a CV, or None if the CV isn't embedded yet"""
+        vector = EmbeddingService._query_vector('cv', cv.id)
+        if vector is None:
+            return None
+        # Over-fetch: closed postings stay in the index until they are removed
+        hits = EmbeddingIndex(cv.tenant_id, 'job').load().search(vector, k * 3)
+        active = set(
+            JobPosting.objects.filter(id__in=[job_id for job_id, _ in hits], status='active')
+            .values_list('id', flat=True)
+        )
+        return [
+            {'job_id': job_id, 'similarity': round(score, 4)}
+            for job_id, score in hits if job_id in active
+        ][:k]
+
+    @staticmethod
+    def similar_cvs(job: JobPosting, k: int = 20) -> Optional[List[Dict]]:
+        """Nearest tenant CVs to a job posting, or None if the job isn't embedded yet"""
+        vector = EmbeddingService._query_vector('job', job.id)
+        if vector is None:
+            return None
+        hits = EmbeddingIndex(job.tenant_id, 'cv').load().search(vector, k)
+        return [{'cv_id': cv_id, 'similarity': round(score, 4)} for cv_id, score in hits]
+
+
+def schedule_embedding(kind: str, ids: Iterable[int]) -> None:
+    """Queue encoding (micro-batched) once the current transaction commits; failures are only logged"""
+    ids = list(ids)
+    if not ids or not getattr(settings, 'EMBEDDINGS_ENABLED', True):
+        return
+
+    def queue():
+        from .embedding_queue import EmbeddingBatcher
+        try:
+            EmbeddingBatcher().enqueue(kind, ids)
+        except Exception as e:
+            logger.warning(f"Could not queue {kind} embedding: {e}")
+    transaction.on_commit(queue)
+
+
+def schedule_embedding_removal(tenant_id: int, kind: str, ids: Iterable[int]) -> None:
+    """Drop embeddings once the current transaction commits; failures are only logged"""
+    ids = list(ids)
+
+    def remove():
+        try:
+            EmbeddingService.remove(tenant_id, kind, ids)
+        except Exception as e:
+            logger.warning(f"Embedding removal failed: {e}")
+    transaction.on_commit(remove)
@@ -0,0 +1,262 @@
+"""
+Ingestion of scraped job postings into the tenant's JobPosting corpus.
+
+Postings are identified by a fingerprint of their normalized title, company
+and location, upserted in batches and closed once no search has returned
+them for JOB_POSTING_TTL_DAYS.
+
+Each search is recorded as a JobSearch holding only the per-search context
+of its postings, so the same search repeated within JOB_SEARCH_REUSE_HOURS
+is rebuilt from the still-active postings instead of being scraped again.
+"""
+import re
+import hashlib
+import logging
+from datetime import timedelta
+from typing import Any, Dict, List, Optional
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from .models import JobPosting, JobSearch, JobSkill, Skill
+from .skill_matcher import get_skill_matcher
+from .skill_index import schedule_job_refresh
+from .skill_stats import SkillStatsService
+from .embeddings import schedule_embedding
+
+logger = logging.getLogger(__name__)
+
+
+class JobPostingIngestionService:
+    """Upsert scraped postings (and their skills) and expire stale ones"""
+
+    SOURCE = 'google_jobs'
+    BATCH_SIZE = 500
+
+    @staticmethod
+    def fingerprint(title: str, company: str, location: str) -> str:
+        """Stable hash of a posting's normalized title, company and location"""
+        parts = [re.sub(r'\s+', ' ', (value or '')).strip().lower() for value in (title, company, location)]
+        return hashlib.sha256('|'.join(parts).encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def posting_fingerprint(posting: Dict[str, Any]) -> str:
+        """Fingerprint of a scraped posting dict, as stored by ingest()"""
+        return JobPostingIngestionService.fingerprint(
+            (posting.get('title') or '')[:255],
+            (posting.get('company') or '')[:255],
+            (posting.get('location') or '')[:255],
+        )
+
+    @staticmethod
+    def _skill_matches(text: str) -> Dict[str, str]:
+        """Known skills mentioned in a posting's text, with their category"""
+        return {name: match.category for name, match in get_skill_matcher().find(text).items()}
+
+    @staticmethod
+    def ingest(tenant, user, postings: List[Dict[str, Any]]) -> Dict[str, JobPosting]:
+        """
+        Upsert scraped postings for a tenant.
+
+        Returns the stored JobPosting for each fingerprint, so callers can
+        link their response items to the corpus.
+        """
+        now = timezone.now()
+        objects = {}
+        skills_by_fingerprint = {}
+        categories = {}
+
+        for posting in postings:
+            title = (posting.get('title') or '')[:255]
+            company = (posting.get('company') or '')[:255]
+            if not title or not company:
+                continue
+
+            location = (posting.get('location') or '')[:255]
+            fingerprint = JobPostingIngestionService.posting_fingerprint(posting)
+            description = posting.get('full_description') or posting.get('short_description') or ''
+
+            objects[fingerprint] = JobPosting(
+                tenant=tenant,
+                created_by=user,
+                title=title,
+                company=company,
+                location=location,
+                description=posting.get('short_description') or description,
+                requirements=posting.get('full_description') or '',
+                status='active',
+                external_url=(posting.get('apply_link') or posting.get('google_job_url') or '')[:2048],
+                source=JobPostingIngestionService.SOURCE,
+                fingerprint=fingerprint,
+                last_seen_at=now,
+            )
+            matches = JobPostingIngestionService._skill_matches(description)
+            skills_by_fingerprint[fingerprint] = list(matches)
+            categories.update(matches)
+
+        if not objects:
+            return {}
+
+        with transaction.atomic():
+            JobPosting.objects.bulk_create(
+                list(objects.values()),
+                batch_size=JobPostingIngestionService.BATCH_SIZE,
+                update_conflicts=True,
+                unique_fields=['tenant', 'fingerprint'],
+                # status is only set on insert: a recruiter's close stands, and expiry is expire_stale's
+                update_fields=[
+                    'title', 'company', 'location', 'description', 'requirements',
+                    'external_url', 'source', 'last_seen_at', 'updated_at',
+                ],
+            )
+
+            # Primary keys are not returned for upserted rows, so reload them
+            stored = {
+                job.fingerprint: job
+                for job in JobPosting.objects.filter(tenant=tenant, fingerprint__in=list(objects))
+            }
+
+            skill_names = {name for names in skills_by_fingerprint.values() for name in names}
+            if skill_names:
+                Skill.objects.bulk_create(
+                    [
+                        Skill(name=name, category=categories[name])
+                        for name in skill_names
+                    ],
+                    ignore_conflicts=True,
+                )
+                skills = {skill.name: skill for skill in Skill.objects.filter(name__in=skill_names)}
+
+                job_skills = [
+                    JobSkill(job=stored[fingerprint], skill=skills[name], requirement_level='required')
+                    for fingerprint, names in skills_by_fingerprint.items()
+                    if fingerprint in stored
+                    for name in names
+                    if name in skills
+                ]
+                # Re-scraped postings already have most of their skills; only new pairs count
+                existing = set(
+                    JobSkill.objects.filter(job__in=list(stored.values()))
+                    .values_list('job_id', 'skill_id')
+                )
+                JobSkill.objects.bulk_create(
+                    job_skills,
+                    batch_size=JobPostingIngestionService.BATCH_SIZE,
+                    ignore_conflicts=True,
+                )
+                SkillStatsService.record_job_skills(tenant.id, [
+                    job_skill.skill_id for job_skill in job_skills
+                    if (job_skill.job_id, job_skill.skill_id) not in existing
+                ])
+
+        # bulk_create bypasses the signals that maintain the skill and embedding indexes
+        schedule_job_refresh(tenant.id, [job.id for job in stored.values()])
+        schedule_embedding('job', [job.id for job in stored.values()])
+
+        logger.info(f"Ingested {len(stored)} scraped job postings for tenant {tenant.id}")
+        return stored
+
+    @staticmethod
+    def expire_stale(max_age_days: int = None) -> int:
+        """Close scraped postings no search has returned recently"""
+        if max_age_days is None:
+            max_age_days = getattr(settings, 'JOB_POSTING_TTL_DAYS', 30)
+        cutoff = timezone.now() - timedelta(days=max_age_days)
+
+        stale = JobPosting.objects.filter(
+            status='active',
+            fingerprint__isnull=False,
+            last_seen_at__lt=cutoff,
+        )
+        closed = list(stale.values_list('tenant_id', 'id'))
+        count = stale.update(status='closed', updated_at=timezone.now())
+
+        # update() bypasses the signals that maintain the skill index
+        by_tenant = {}
+        for tenant_id, job_id in closed:
+            by_tenant.setdefault(tenant_id, []).append(job_id)
+        for tenant_id, job_ids in by_tenant.items():
+            schedule_job_refresh(tenant_id, job_ids)
+
+        return count
+
+
+class JobSearchService:
+    """Record find-jobs searches and answer repeats from the JobPosting corpus"""
+
+    # Posting fields that describe the search rather than the posting itself
+    CONTEXT_FIELDS = (
+        'via', 'posted', 'query_used', 'apply_link', 'google_job_url',
+        'source_title', 'source_domain', 'source_seniority', 'source_confidence',
+    )
+
+    @staticmethod
+    def record(tenant, cv, params: Dict[str, Any], results: Dict[str, Any]) -> JobSearch:
+        """Store a scraped search (its postings must already be ingested)"""
+        return JobSearch.objects.create(
+            tenant=tenant,
+            cv=cv,
+            possible_jobs=results['possible_jobs'],
+            postings=[
+                {
+                    'fingerprint': JobPostingIngestionService.posting_fingerprint(posting),
+                    **{field: posting.get(field) for field in JobSearchService.CONTEXT_FIELDS},
+                }
+                for posting in results['job_postings']
+            ],
+            summary=results['summary'],
+            **params,
+        )
+
+    @staticmethod
+    def reuse(tenant, cv, params: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Results of a recent identical search rebuilt from its postings that
+        are still active, or None when it has to be scraped again.
+        """
+        max_age = timedelta(hours=getattr(settings, 'JOB_SEARCH_REUSE_HOURS', 24))
+        search = JobSearch.objects.filter(
+            tenant=tenant,
+            cv=cv,
+            created_at__gte=timezone.now() - max_age,
+            **params,
+        ).order_by('-created_at').first()
+        if search is None:
+            return None
+
+        jobs = {
+            job.fingerprint: job
+            for job in JobPosting.objects.filter(
+                tenant=tenant,
+                status='active',
+                fingerprint__in=[posting['fingerprint'] for posting in search.postings],
+            )
+        }
+        if search.postings and not jobs:
+            # Every posting has expired since: look for current ones
+            return None
+
+        postings = []
+        for context in search.postings:
+            job = jobs.get(context['fingerprint'])
+            if job is None:
+                continue
+            postings.append({
+                'title': job.title,
+                'company': job.company,
+                'location': job.location,
+                'short_description': job.description,
+                'full_description': job.requirements,
+                **{field: context.get(field) for field in JobSearchService.CONTEXT_FIELDS},
+                'job_posting_id': job.id,
+            })
+
+        return {
+            'possible_jobs': search.possible_jobs,
+            'job_postings': postings,
+            'summary': {
+                **search.summary,
+                'total_postings_found': len(postings),
+                'searched_at': search.created_at,
+                'from_corpus': True,
+            },
+        }
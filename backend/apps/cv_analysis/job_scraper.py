@@ -6,11 +6,14 @@ import os
 import re
 import json
 import logging
-import requests
 import urllib.parse
+from concurrent.futures import ThreadPoolExecutor, wait
 from typing import List, Dict, Any, Optional
 from decimal import Decimal
 from django.conf import settings
+from apps.integrations.gateway import get_gateway
+from .llm_cache import LLMResponseCache
+from .job_search_cache import JobSearchCache
 
 logger = logging.getLogger(__name__)
 
@@ -43,6 +46,8 @@ class JobScraperService:
         self.base_url = "https://serpapi.com/search.json"
         self.ollama_url = getattr(settings, 'OLLAMA_API_URL', 'http://localhost:11434')
         self.model_name = "llama3.1:8b"
+        self.llm_cache = LLMResponseCache()
+        self.search_cache = JobSearchCache()
     
     @staticmethod
     def get_gl_code(country: str) -> Optional[str]:
@@ -92,63 +97,96 @@ class JobScraperService:
         
         query_text = self.build_query_text(job_title, seniority, country)
         
+        try:
+            jobs = self.search_google_jobs(query_text, gl)
+        except Exception as e:
+            logger.error(f"Error scraping jobs: {e}")
+            return []
+        
+        return self._format_jobs(jobs[:max_results], gl, query_text)
+    
+    def search_google_jobs(self, query_text: str, gl: str, hl: str = "fr") -> List[Dict[str, Any]]:
+        """
+        Raw SerpAPI jobs_results for a query, served from the shared cache when possible.
+        Stale entries are returned immediately and refreshed in the background.
+        """
+        jobs, is_stale = self.search_cache.get(query_text, gl, hl)
+        if jobs is not None:
+            if is_stale and self.search_cache.claim_refresh(query_text, gl, hl):
+                from .tasks import refresh_job_search_task
+                try:
+                    refresh_job_search_task.delay(query_text, gl, hl)
+                except Exception as e:
+                    logger.warning(f"Could not queue job search refresh: {e}")
+            return jobs
+        
+        return self.fetch_google_jobs(query_text, gl, hl)
+    
+    def fetch_google_jobs(self, query_text: str, gl: str, hl: str = "fr") -> List[Dict[str, Any]]:
+        """Call SerpAPI and store the raw jobs_results in the shared cache"""
         params = {
             "engine": "google_jobs",
             "q": query_text,
-            "hl": "fr",
+            "hl": hl,
             "gl": gl,
             "api_key": self.api_key,
         }
         
-        try:
-            resp = requests.get(self.base_url, params=params, timeout=30)
-            resp.raise_for_status()
-            data = resp.json()
+        self.search_cache.record_api_call()
+        resp = get_gateway().get(self.base_url, endpoint='serpapi.google_jobs', params=params, timeout=30)
+        resp.raise_for_status()
+        jobs = resp.json().get("jobs_results", [])
+        
+        self.search_cache.set(query_text, gl, hl, jobs)
+        return jobs
+    
+    @staticmethod
+    def _format_jobs(jobs: List[Dict[str, Any]], gl: str, query_text: str) -> List[Dict[str, Any]]:
+        """Flatten SerpAPI job results into posting dicts"""
+        results = []
+        
+        for j in jobs:
+            # Extract full description from highlights
+            highlights = []
+            if isinstance(j.get("job_highlights"), list):
+                for block in j["job_highlights"]:
+                    if "items" in block:
+                        highlights.extend(block["items"])
             
-            jobs = data.get("jobs_results", [])[:max_results]
-            results = []
+            full_description = "\n".join(highlights) if highlights else None
             
-            for j in jobs:
-                # Extract full description from highlights
-                highlights = []
-                if isinstance(j.get("job_highlights"), list):
-                    for block in j["job_highlights"]:
-                        if "items" in block:
-                            highlights.extend(block["items"])
-                
-                full_description = "\n".join(highlights) if highlights else None
-                
-                # Get apply link
-                apply_link = None
-                if isinstance(j.get("apply_options"), list) and j["apply_options"]:
-                    apply_link = j["apply_options"][0].get("link")
-                
-                # Google job URL
-                google_job_url = None
-                if j.get("job_id"):
-                    google_job_url = f"https://www.google.com/search?gl={gl}&q=google+job+{j['job_id']}"
-                
-                results.append({
-                    "title": j.get("title"),
-                    "company": j.get("company_name"),
-                    "location": j.get("location"),
-                    "via": j.get("via"),
-                    "posted": j.get("detected_extensions", {}).get("posted_at"),
-                    "short_description": j.get("description"),
-                    "full_description": full_description,
-                    "apply_link": apply_link,
-                    "google_job_url": google_job_url,
-                    "query_used": query_text,
-                })
+            # Get apply link
+            apply_link = None
+            if isinstance(j.get("apply_options"), list) and j["apply_options"]:
+                apply_link = j["apply_options"][0].get("link")
             
-            return results
+            # Google job URL
+            google_job_url = None
+            if j.get("job_id"):
+                google_job_url = f"https://www.google.com/search?gl={gl}&q=google+job+{j['job_id']}"
             
-        except Exception as e:
-            logger.error(f"Error scraping jobs: {e}")
-            return []
+            results.append({
+                "title": j.get("title"),
+                "company": j.get("company_name"),
+                "location": j.get("location"),
+                "via": j.get("via"),
+                "posted": j.get("detected_extensions", {}).get("posted_at"),
+                "short_description": j.get("description"),
+                "full_description": full_description,
+                "apply_link": apply_link,
+                "google_job_url": google_job_url,
+                "query_used": query_text,
+            })
+        
+        return results
     
-    def call_llama(self, messages: List[Dict[str, str]]) -> str:
+    def call_llama(self, messages: List[Dict[str, str]], use_cache: bool = True) -> str:
         """Call Llama 3.1 via Ollama API"""
+        if use_cache:
+            cached = self.llm_cache.get(self.model_name, messages)
+            if cached is not None:
+                return cached
+        
         url = f"{self.ollama_url}/api/chat"
         payload = {
             "model": self.model_name,
@@ -157,16 +195,21 @@ class JobScraperService:
         }
         
         try:
-            resp = requests.post(url, json=payload, timeout=120)
+            resp = get_gateway().post(url, endpoint='ollama.chat', json=payload, timeout=120)
             resp.raise_for_status()
             data = resp.json()
             
             if isinstance(data, dict) and "message" in data:
-                return data["message"]["content"]
-            return str(data)
+                content = data["message"]["content"]
+            else:
+                content = str(data)
         except Exception as e:
             logger.error(f"Error calling Llama: {e}")
             raise
+        
+        if use_cache:
+            self.llm_cache.set(self.model_name, messages, None, content)
+        return content
     
     def extract_json_from_llm(self, content: str) -> Dict[str, Any]:
         """Extract JSON from LLM output"""
@@ -317,8 +360,9 @@ CV TO ANALYZE:
             data = self.extract_json_from_llm(llm_output)
             jobs = data.get("possible_jobs", [])
             
-            if not isinstance(jobs, list):
+            if not isinstance(jobs, list) or not jobs:
                 logger.warning("LLM output doesn't contain valid 'possible_jobs' list")
+                self.llm_cache.delete(self.model_name, messages)
                 return []
             
             return jobs
@@ -328,6 +372,46 @@ CV TO ANALYZE:
             logger.info("Falling back to rule-based extraction...")
             return self.extract_jobs_from_cv_fallback(cv_text)
     
+    def _scrape_queries(
+        self,
+        queries: List[Dict[str, Any]],
+        country: str,
+        max_results: int
+    ) -> List[Optional[List[Dict[str, Any]]]]:
+        """
+        Run scrape_google_jobs for each possible job, in parallel up to
+        JOB_SCRAPE_CONCURRENCY, within JOB_SCRAPE_DEADLINE seconds overall.
+        Returns postings in query order; None marks queries that missed the deadline.
+        """
+        concurrency = getattr(settings, 'JOB_SCRAPE_CONCURRENCY', 5)
+        deadline = getattr(settings, 'JOB_SCRAPE_DEADLINE', 45)
+        
+        def scrape(job):
+            logger.info(
+                f"Scraping: {job['title']} [{job.get('domain', '')} | {job.get('seniority', '')}] "
+                f"(confidence={job.get('confidence', 0)})"
+            )
+            return self.scrape_google_jobs(
+                job_title=job["title"],
+                country=country,
+                seniority=job.get("seniority", ""),
+                max_results=max_results
+            )
+        
+        if concurrency <= 1 or len(queries) <= 1:
+            return [scrape(job) for job in queries]
+        
+        executor = ThreadPoolExecutor(max_workers=min(concurrency, len(queries)), thread_name_prefix='job-scrape')
+        try:
+            futures = [executor.submit(scrape, job) for job in queries]
+            done, not_done = wait(futures, timeout=deadline)
+            if not_done:
+                logger.warning(f"Job scraping deadline ({deadline}s) hit, {len(not_done)} queries dropped")
+            return [future.result() if future in done else None for future in futures]
+        finally:
+            # Don't block on stragglers; unstarted queries are cancelled
+            executor.shutdown(wait=False, cancel_futures=True)
+    
     def scrape_jobs_for_cv(
         self,
         cv_text: str,
@@ -362,34 +446,28 @@ CV TO ANALYZE:
             }
         
         # Step 2: Scrape job postings for each possible job
-        logger.info(f"Found {len(possible_jobs)} possible jobs. Scraping postings...")
+        queries = [
+            job for job in possible_jobs
+            if job.get("title") and job.get("confidence", 0) >= min_confidence
+        ]
+        logger.info(f"Found {len(possible_jobs)} possible jobs. Scraping postings for {len(queries)}...")
+        
+        postings_per_query = self._scrape_queries(queries, country, max_jobs_per_title)
+        
         all_postings = []
         jobs_scraped = 0
-        
-        for job in possible_jobs:
-            title = job.get("title")
-            seniority = job.get("seniority", "")
-            domain = job.get("domain", "")
-            confidence = job.get("confidence", 0)
-            
-            if not title or confidence < min_confidence:
+        jobs_timed_out = 0
+        for job, postings in zip(queries, postings_per_query):
+            if postings is None:
+                jobs_timed_out += 1
                 continue
             
-            logger.info(f"Scraping: {title} [{domain} | {seniority}] (confidence={confidence})")
-            
-            postings = self.scrape_google_jobs(
-                job_title=title,
-                country=country,
-                seniority=seniority,
-                max_results=max_jobs_per_title
-            )
-            
             # Add context from CV analysis
             for posting in postings:
-                posting["source_title"] = title
-                posting["source_domain"] = domain
-                posting["source_seniority"] = seniority
-                posting["source_confidence"] = confidence
+                posting["source_title"] = job.get("title")
+                posting["source_domain"] = job.get("domain", "")
+                posting["source_seniority"] = job.get("seniority", "")
+                posting["source_confidence"] = job.get("confidence", 0)
             
             all_postings.extend(postings)
             jobs_scraped += 1
@@ -409,6 +487,8 @@ CV TO ANALYZE:
             'summary': {
                 'total_possible_jobs': len(possible_jobs),
                 'jobs_scraped': jobs_scraped,
+                'jobs_timed_out': jobs_timed_out,
+                'partial': jobs_timed_out > 0,
                 'total_postings_found': len(unique_postings),
                 'country': country,
                 'min_confidence': min_confidence
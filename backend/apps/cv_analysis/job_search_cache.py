@@ -0,0 +1,130 @@
+"""
+Shared cache for SerpAPI Google Jobs results.
+
+Different CVs in the same country produce the same queries, so results are
+stored in Redis under (query_text, gl, hl). Entries are served as fresh for
+JOB_SEARCH_CACHE_FRESH_TTL seconds, then served stale while a Celery task
+refreshes them, until they expire after JOB_SEARCH_CACHE_STALE_TTL more.
+"""
+import json
+import time
+import hashlib
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+from django.conf import settings
+from apps.core.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+
+class JobSearchCache:
+    """Redis-backed SerpAPI result cache with stale-while-revalidate and quota counters"""
+
+    KEY_PREFIX = 'job_search:resp:'
+    LOCK_PREFIX = 'job_search:refresh:'
+    STATS_KEY = 'job_search:stats'
+
+    def __init__(self):
+        self.enabled = getattr(settings, 'JOB_SEARCH_CACHE_ENABLED', True)
+        self.fresh_ttl = getattr(settings, 'JOB_SEARCH_CACHE_FRESH_TTL', 6 * 3600)
+        self.stale_ttl = getattr(settings, 'JOB_SEARCH_CACHE_STALE_TTL', 48 * 3600)
+
+    @staticmethod
+    def make_key(query_text: str, gl: str, hl: str) -> str:
+        digest = hashlib.sha256(f"{gl}|{hl}|{query_text.strip().lower()}".encode('utf-8')).hexdigest()
+        return f"{JobSearchCache.KEY_PREFIX}{digest}"
+
+    def _client(self):
+        return get_redis() if self.enabled else None
+
+    def _incr(self, client, field: str) -> None:
+        try:
+            client.hincrby(self.STATS_KEY, field, 1)
+        except Exception as e:
+            logger.debug(f"Job search cache stats write failed: {e}")
+
+    def get(self, query_text: str, gl: str, hl: str) -> Tuple[Optional[List[Dict[str, Any]]], bool]:
+        """
+        Return (jobs, is_stale). jobs is None on a miss; is_stale means the
+        entry is past its freshness window and should be refreshed.
+        """
+        client = self._client()
+        if client is None:
+            return None, False
+
+        try:
+            raw = client.get(self.make_key(query_text, gl, hl))
+        except Exception as e:
+            logger.warning(f"Job search cache read failed: {e}")
+            return None, False
+
+        if raw is None:
+            self._incr(client, 'misses')
+            return None, False
+
+        entry = json.loads(raw)
+        is_stale = time.time() - entry['fetched_at'] > self.fresh_ttl
+        self._incr(client, 'stale_hits' if is_stale else 'fresh_hits')
+        return entry['jobs'], is_stale
+
+    def set(self, query_text: str, gl: str, hl: str, jobs: List[Dict[str, Any]]) -> None:
+        """Store raw SerpAPI jobs_results for a query"""
+        client = self._client()
+        if client is None:
+            return
+
+        entry = json.dumps({'fetched_at': time.time(), 'jobs': jobs}, ensure_ascii=False)
+        try:
+            client.set(self.make_key(query_text, gl, hl), entry.encode('utf-8'), ex=self.fresh_ttl + self.stale_ttl)
+        except Exception as e:
+            logger.warning(f"Job search cache write failed: {e}")
+
+    def record_api_call(self) -> None:
+        """Count a SerpAPI search actually made (cache miss or refresh)"""
+        client = self._client()
+        if client is not None:
+            self._incr(client, 'api_calls')
+
+    def claim_refresh(self, query_text: str, gl: str, hl: str) -> bool:
+        """Take the refresh lock so only one worker revalidates a stale entry"""
+        client = self._client()
+        if client is None:
+            return False
+
+        lock_key = f"{self.LOCK_PREFIX}{self.make_key(query_text, gl, hl)[len(self.KEY_PREFIX):]}"
+        try:
+            return bool(client.set(lock_key, b'1', nx=True, ex=300))
+        except Exception as e:
+            logger.warning(f"Job search refresh lock failed: {e}")
+            return False
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and SerpAPI searches saved by the cache"""
+        client = self._client()
+        if client is None:
+            return {'enabled': False}
+
+        try:
+            raw = client.hgetall(self.STATS_KEY)
+        except Exception as e:
+            logger.warning(f"Job search cache stats failed: {e}")
+            return {'enabled': True, 'error': str(e)}
+
+        counters = {k.decode('utf-8'): int(v) for k, v in raw.items()}
+        fresh_hits = counters.get('fresh_hits', 0)
+        stale_hits = counters.get('stale_hits', 0)
+        misses = counters.get('misses', 0)
+        lookups = fresh_hits + stale_hits + misses
+        api_calls = counters.get('api_calls', 0)
+        return {
+            'enabled': True,
+            'fresh_hits': fresh_hits,
+            'stale_hits': stale_hits,
+            'misses': misses,
+            'api_calls': api_calls,
+            # Searches answered without spending a SerpAPI credit (refreshes count as calls)
+            'quota_saved': max(0, lookups - api_calls),
+            'hit_rate': round((fresh_hits + stale_hits) / lookups, 4) if lookups else 0.0,
+            'fresh_ttl': self.fresh_ttl,
+            'stale_ttl': self.stale_ttl,
+        }
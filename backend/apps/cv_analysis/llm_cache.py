@@ -0,0 +1,133 @@
+"""
+Content-addressed cache for LLM responses.
+
+Llama is called with temperature 0 and a fixed seed, so the same model,
+options and messages always produce the same answer. Responses are stored
+in Redis under a hash of those inputs, expire after a TTL and are evicted
+least-recently-used once the cache grows past its size limit.
+"""
+import json
+import time
+import hashlib
+import logging
+from typing import Any, Dict, List, Optional
+from django.conf import settings
+from apps.core.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+
+class LLMResponseCache:
+    """Redis-backed LLM response cache with TTL, LRU eviction and hit/miss counters"""
+
+    KEY_PREFIX = 'llm_cache:resp:'
+    LRU_KEY = 'llm_cache:lru'
+    STATS_KEY = 'llm_cache:stats'
+
+    def __init__(self):
+        self.enabled = getattr(settings, 'LLM_CACHE_ENABLED', True)
+        self.ttl = getattr(settings, 'LLM_CACHE_TTL', 7 * 24 * 3600)
+        self.max_entries = getattr(settings, 'LLM_CACHE_MAX_ENTRIES', 10000)
+
+    @staticmethod
+    def make_key(model: str, messages: List[Dict[str, str]], options: Optional[Dict[str, Any]] = None) -> str:
+        """Build the cache key from model, options and a hash of the messages"""
+        messages_hash = hashlib.sha256(
+            json.dumps(messages, sort_keys=True, ensure_ascii=False).encode('utf-8')
+        ).hexdigest()
+        options_json = json.dumps(options or {}, sort_keys=True)
+        digest = hashlib.sha256(f"{model}|{options_json}|{messages_hash}".encode('utf-8')).hexdigest()
+        return f"{LLMResponseCache.KEY_PREFIX}{digest}"
+
+    def get(self, model: str, messages: List[Dict[str, str]], options: Optional[Dict[str, Any]] = None) -> Optional[str]:
+        """Return the cached response, or None on a miss"""
+        client = get_redis() if self.enabled else None
+        if client is None:
+            return None
+
+        key = self.make_key(model, messages, options)
+        try:
+            value = client.get(key)
+            pipe = client.pipeline()
+            if value is None:
+                pipe.hincrby(self.STATS_KEY, 'misses', 1)
+            else:
+                pipe.hincrby(self.STATS_KEY, 'hits', 1)
+                pipe.zadd(self.LRU_KEY, {key: time.time()})
+            pipe.execute()
+        except Exception as e:
+            logger.warning(f"LLM cache read failed: {e}")
+            return None
+
+        if value is None:
+            return None
+        logger.info(f"LLM cache hit for {model}")
+        return value.decode('utf-8')
+
+    def set(self, model: str, messages: List[Dict[str, str]], options: Optional[Dict[str, Any]], content: str) -> None:
+        """Store a response and evict the least recently used entries over the limit"""
+        client = get_redis() if self.enabled else None
+        if client is None or not content:
+            return
+
+        key = self.make_key(model, messages, options)
+        now = time.time()
+        try:
+            pipe = client.pipeline()
+            pipe.set(key, content.encode('utf-8'), ex=self.ttl)
+            pipe.zadd(self.LRU_KEY, {key: now})
+            # Drop index entries whose keys have already expired
+            pipe.zremrangebyscore(self.LRU_KEY, '-inf', now - self.ttl)
+            pipe.zcard(self.LRU_KEY)
+            size = pipe.execute()[-1]
+
+            if size > self.max_entries:
+                evicted = client.zpopmin(self.LRU_KEY, size - self.max_entries)
+                if evicted:
+                    client.delete(*[member for member, _ in evicted])
+                    client.hincrby(self.STATS_KEY, 'evictions', len(evicted))
+        except Exception as e:
+            logger.warning(f"LLM cache write failed: {e}")
+
+    def delete(self, model: str, messages: List[Dict[str, str]], options: Optional[Dict[str, Any]] = None) -> None:
+        """Remove a cached response (e.g. when it turned out to be unusable)"""
+        client = get_redis() if self.enabled else None
+        if client is None:
+            return
+
+        key = self.make_key(model, messages, options)
+        try:
+            pipe = client.pipeline()
+            pipe.delete(key)
+            pipe.zrem(self.LRU_KEY, key)
+            pipe.execute()
+        except Exception as e:
+            logger.warning(f"LLM cache delete failed: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss/eviction counters and current size"""
+        client = get_redis() if self.enabled else None
+        if client is None:
+            return {'enabled': False}
+
+        try:
+            raw = client.hgetall(self.STATS_KEY)
+            size = client.zcard(self.LRU_KEY)
+        except Exception as e:
+            logger.warning(f"LLM cache stats failed: {e}")
+            return {'enabled': True, 'error': str(e)}
+
+        counters = {k.decode('utf-8'): int(v) for k, v in raw.items()}
+        hits = counters.get('hits', 0)
+        misses = counters.get('misses', 0)
+        total = hits + misses
+        return {
+            'enabled': True,
+            'hits': hits,
+            'misses': misses,
+            'evictions': counters.get('evictions', 0),
+            'hit_rate': round(hits / total, 4) if total else 0.0,
+            'size': size,
+            'max_entries': self.max_entries,
+            'ttl': self.ttl,
+        }
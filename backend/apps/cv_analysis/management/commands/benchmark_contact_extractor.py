@@ -0,0 +1,107 @@
+"""
+Management command to benchmark ContactExtractor against the previous
+four-search implementation on a corpus of CV texts.
+"""
+import re
+import time
+import random
+from django.core.management.base import BaseCommand
+from apps.cv_analysis.models import CV
+from apps.cv_analysis.services import ContactExtractor
+
+
+def legacy_extract(text):
+    """The previous implementation: four uncompiled searches over the whole text"""
+    contact = {'email': '', 'phone': '', 'linkedin_url': '', 'github_url': ''}
+    email_match = re.search(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b', text)
+    if email_match:
+        contact['email'] = email_match.group()
+    phone_match = re.search(r'(\+?\d{1,3}[-.\s]?)?\(?\d{3}\)?[-.\s]?\d{3}[-.\s]?\d{4}', text)
+    if phone_match:
+        contact['phone'] = phone_match.group()
+    linkedin_match = re.search(r'(?:https?://)?(?:www\.)?linkedin\.com/in/[a-zA-Z0-9_-]+', text, re.IGNORECASE)
+    if linkedin_match:
+        contact['linkedin_url'] = linkedin_match.group()
+    github_match = re.search(r'(?:https?://)?(?:www\.)?github\.com/[a-zA-Z0-9_-]+', text, re.IGNORECASE)
+    if github_match:
+        contact['github_url'] = github_match.group()
+    return contact
+
+
+def synthetic_cv(rng):
+    """
+    A CV-shaped text: contact details in the header (some missing, as in
+    real CVs) and section filler below.
+    """
+    name = rng.choice(['Amira Ben Salah', 'John Smith', 'Marie Dupont', 'Youssef Trabelsi'])
+    handle = name.lower().replace(' ', '')
+    header = [name, f"{handle}@example.com"]
+    if rng.random() < 0.9:
+        header.append(rng.choice([
+            f"+1 (555) {rng.randint(100, 999)}-{rng.randint(1000, 9999)}",
+            f"06 {rng.randint(10, 99)} {rng.randint(10, 99)} {rng.randint(10, 99)} {rng.randint(10, 99)}",
+        ]))
+    if rng.random() < 0.7:
+        header.append(f"https://www.linkedin.com/in/{handle}")
+    if rng.random() < 0.4:
+        header.append(f"github.com/{handle}")
+    if rng.random() < 0.3:
+        header.append(f"https://{handle}.dev")
+    filler = [
+        'Experience',
+        'Senior Software Engineer at Acme Corp 2019 - present',
+        'Built data pipelines in Python, Django and PostgreSQL serving 2M users.',
+        'Education',
+        'Master of Computer Science, 2018',
+        'Skills',
+        'Python, Django, React, Docker, Kubernetes, AWS, SQL',
+    ]
+    body = [rng.choice(filler) for _ in range(rng.randint(40, 120))]
+    return '\n'.join(header + body)
+
+
+class Command(BaseCommand):
+    help = 'Benchmark contact extraction throughput (stored CV texts, or a synthetic corpus)'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=500, help='Stored CVs to use')
+        parser.add_argument('--synthetic', type=int, default=0, help='Use N synthetic CVs instead of stored ones')
+        parser.add_argument('--repeat', type=int, default=5, help='Passes over the corpus per implementation')
+    
+    def handle(self, *args, **options):
+        if options['synthetic']:
+            rng = random.Random(42)
+            corpus = [synthetic_cv(rng) for _ in range(options['synthetic'])]
+        else:
+            corpus = list(
+                CV.objects.exclude(raw_text='').values_list('raw_text', flat=True)[:options['limit']]
+            )
+            if not corpus:
+                self.stdout.write(self.style.WARNING('No stored CV texts; use --synthetic N'))
+                return
+        
+        total_chars = sum(len(text) for text in corpus)
+        self.stdout.write(f"Corpus: {len(corpus)} CVs, {total_chars / 1024:.0f} KB, {options['repeat']} passes")
+        
+        results = {}
+        for label, extract in (('legacy', legacy_extract), ('compiled', ContactExtractor.extract)):
+            started = time.perf_counter()
+            for _ in range(options['repeat']):
+                for text in corpus:
+                    extract(text)
+            elapsed = time.perf_counter() - started
+            results[label] = len(corpus) * options['repeat'] / elapsed
+            self.stdout.write(f"{label:>9}: {results[label]:,.0f} CVs/s ({elapsed:.3f}s)")
+        
+        # The new extractor should find at least what the old one did
+        fields = ('email', 'phone', 'linkedin_url', 'github_url')
+        differences = sum(
+            1 for text in corpus
+            for field, old, new in ((f, legacy_extract(text)[f], ContactExtractor.extract(text)[f]) for f in fields)
+            if old and old != new
+        )
+        
+        self.stdout.write(self.style.SUCCESS(
+            f"Speedup: {results['compiled'] / results['legacy']:.2f}x; "
+            f"{differences} field values differ from the legacy extractor"
+        ))
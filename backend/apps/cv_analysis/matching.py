@@ -3,7 +3,9 @@ Job matching algorithm
 """
 import logging
 from typing import Dict, List
+import numpy as np
 from django.db.models import Q
+from apps.core.response_cache import invalidate_responses
 from .models import CV, JobPosting, JobMatch, CVSkill, JobSkill
 
 logger = logging.getLogger(__name__)
@@ -231,14 +233,155 @@ class JobMatchingService:
             List of JobMatch instances
         """
         cv = CV.objects.get(id=cv_id, tenant_id=tenant_id)
-        jobs = JobPosting.objects.filter(tenant_id=tenant_id, status='active')
+        engine = BatchMatchingEngine(tenant_id)
+        engine.match(cv)
+        
+        return list(
+            JobMatch.objects.filter(cv=cv, job_id__in=engine.job_ids.tolist()).select_related('cv', 'job')
+        )
+
+
+class BatchMatchingEngine:
+    """
+    Scores one CV against every active job of a tenant in a single pass.
+    
+    The tenant's required/preferred job skills are loaded once into boolean
+    job x skill matrices; skill, experience and overall scores are computed
+    with NumPy and written with one bulk upsert. Scores are identical to
+    JobMatchingService.match_cv_to_job.
+    """
+    
+    BATCH_SIZE = 1000
+    
+    def __init__(self, tenant_id: int):
+        self.tenant_id = tenant_id
+        self.service = JobMatchingService()
+        
+        self.jobs = list(
+            JobPosting.objects.filter(tenant_id=tenant_id, status='active').only('id', 'years_experience_required')
+        )
+        self.job_ids = np.array([job.id for job in self.jobs], dtype=np.int64)
+        job_index = {job.id: i for i, job in enumerate(self.jobs)}
+        
+        rows = list(
+            JobSkill.objects.filter(
+                job_id__in=self.job_ids.tolist(),
+                requirement_level__in=['required', 'preferred']
+            ).values_list('job_id', 'skill_id', 'skill__name', 'requirement_level')
+        )
+        
+        skill_ids = sorted({skill_id for _, skill_id, _, _ in rows})
+        self.skill_index = {skill_id: i for i, skill_id in enumerate(skill_ids)}
+        self.skill_names = np.array([''] * len(skill_ids), dtype=object)
+        
+        self.required = np.zeros((len(self.jobs), len(skill_ids)), dtype=bool)
+        self.preferred = np.zeros((len(self.jobs), len(skill_ids)), dtype=bool)
+        for job_id, skill_id, skill_name, level in rows:
+            col = self.skill_index[skill_id]
+            self.skill_names[col] = skill_name
+            target = self.required if level == 'required' else self.preferred
+            target[job_index[job_id], col] = True
+        
+        self.total_required = self.required.sum(axis=1)
+        self.total_preferred = self.preferred.sum(axis=1)
+        self.years_required = np.array(
+            [float(job.years_experience_required or 0) for job in self.jobs], dtype=np.float64
+        )
+    
+    def _skills_scores(self, cv_vector: np.ndarray) -> np.ndarray:
+        """Vectorized JobMatchingService._calculate_skills_match score"""
+        matched_required = (self.required & cv_vector).sum(axis=1)
+        matched_preferred = (self.preferred & cv_vector).sum(axis=1)
+        
+        with np.errstate(divide='ignore', invalid='ignore'):
+            required_score = np.where(self.total_required > 0, matched_required / self.total_required * 80, 0)
+            preferred_score = np.where(self.total_preferred > 0, matched_preferred / self.total_preferred * 20, 0)
+        
+        scores = np.floor(required_score + preferred_score).astype(np.int64)
+        no_skills = (self.total_required == 0) & (self.total_preferred == 0)
+        return np.where(no_skills, 70, scores)
+    
+    def _experience_scores(self, cv: CV) -> np.ndarray:
+        """Vectorized JobMatchingService._calculate_experience_match"""
+        if not hasattr(cv, 'analysis'):
+            return np.full(len(self.jobs), 50, dtype=np.int64)
+        
+        cv_years = float(cv.analysis.total_years_experience or 0)
+        required = self.years_required
+        excess = cv_years - required
+        gap = required - cv_years
+        
+        return np.select(
+            [
+                required == 0,
+                (cv_years >= required) & (excess <= 2),
+                (cv_years >= required) & (excess <= 5),
+                cv_years >= required,
+                gap <= 1,
+                gap <= 2,
+            ],
+            [70, 100, 90, 75, 80, 60],
+            default=40
+        ).astype(np.int64)
+    
+    def match(self, cv: CV) -> int:
+        """Score and upsert JobMatch rows for all active jobs; returns the number of jobs"""
+        if not self.jobs:
+            return 0
+        
+        cv_vector = np.zeros(len(self.skill_index), dtype=bool)
+        for skill_id in CVSkill.objects.filter(cv=cv).values_list('skill_id', flat=True):
+            col = self.skill_index.get(skill_id)
+            if col is not None:
+                cv_vector[col] = True
+        
+        skills_scores = self._skills_scores(cv_vector)
+        experience_scores = self._experience_scores(cv)
+        education_score = self.service._calculate_education_match(cv, None)
+        overall_scores = np.floor(
+            skills_scores * 0.5 + experience_scores * 0.3 + education_score * 0.2
+        ).astype(np.int64)
+        
+        matched_required = self.required & cv_vector
+        matched_preferred = self.preferred & cv_vector
+        missing_required = self.required & ~cv_vector
+        missing_preferred = self.preferred & ~cv_vector
         
         matches = []
-        for job in jobs:
-            try:
-                match = self.match_cv_to_job(cv, job)
-                matches.append(match)
-            except Exception as e:
-                logger.error(f"Error matching CV {cv_id} to job {job.id}: {e}")
-        
-        return matches
+        for i, job in enumerate(self.jobs):
+            skills_score = {
+                'score': int(skills_scores[i]),
+                'matched': self.skill_names[matched_required[i] | matched_preferred[i]].tolist(),
+                'missing': self.skill_names[missing_required[i] | missing_preferred[i]].tolist(),
+                'matched_required': self.skill_names[matched_required[i]].tolist(),
+                'missing_required': self.skill_names[missing_required[i]].tolist(),
+            }
+            overall_score = int(overall_scores[i])
+            
+            matches.append(JobMatch(
+                cv=cv,
+                job=job,
+                overall_score=overall_score,
+                skills_match_score=skills_score['score'],
+                experience_match_score=int(experience_scores[i]),
+                education_match_score=education_score,
+                matched_skills=skills_score['matched'],
+                missing_skills=skills_score['missing'],
+                match_summary=self.service._generate_match_summary(cv, job, overall_score, skills_score),
+                recommendations=self.service._generate_recommendations(cv, job, skills_score),
+            ))
+        
+        JobMatch.objects.bulk_create(
+            matches,
+            batch_size=self.BATCH_SIZE,
+            update_conflicts=True,
+            unique_fields=['cv', 'job'],
+            update_fields=[
+                'overall_score', 'skills_match_score', 'experience_match_score',
+                'education_match_score', 'matched_skills', 'missing_skills',
+                'match_summary', 'recommendations', 'updated_at',
+            ],
+        )
+        # Bulk upserts skip the signals that invalidate cached job statistics
+        invalidate_responses(self.tenant_id, 'jobs')
+        return len(matches)
@@ -0,0 +1,24 @@
+# Generated by Django 4.2.30 on 2026-10-17 06:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("cv_analysis", "0003_remove_advancedcvanalysis_ats_report_and_more"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="cv",
+            name="content_hash",
+            field=models.CharField(blank=True, max_length=64),
+        ),
+        migrations.AddIndex(
+            model_name="cv",
+            index=models.Index(
+                fields=["tenant", "content_hash"], name="cv_analysis_tenant__965f4b_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 4.2.30 on 2026-10-17 07:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("cv_analysis", "0005_analysis_job"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="jobposting",
+            name="fingerprint",
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+        migrations.AddField(
+            model_name="jobposting",
+            name="last_seen_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name="jobposting",
+            name="external_url",
+            field=models.URLField(blank=True, max_length=2048),
+        ),
+        migrations.AddIndex(
+            model_name="jobposting",
+            index=models.Index(
+                fields=["status", "last_seen_at"], name="cv_analysis_status_a9c4a0_idx"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="jobposting",
+            constraint=models.UniqueConstraint(
+                fields=("tenant", "fingerprint"), name="uniq_job_posting_fingerprint"
+            ),
+        ),
+    ]
@@ -0,0 +1,99 @@
+# Generated by Django 4.2.30 on 2026-10-17 07:07
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0001_initial"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("cv_analysis", "0006_job_posting_fingerprint"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CVImportJob",
+            fields=[
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                (
+                    "archive",
+                    models.FileField(blank=True, upload_to="cv_imports/%Y/%m/%d/"),
+                ),
+                ("archive_name", models.CharField(max_length=255)),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("queued", "Queued"),
+                            ("unpacking", "Unpacking"),
+                            ("processing", "Processing"),
+                            ("completed", "Completed"),
+                            ("failed", "Failed"),
+                        ],
+                        default="queued",
+                        max_length=20,
+                    ),
+                ),
+                ("total", models.IntegerField(default=0)),
+                ("processed", models.IntegerField(default=0)),
+                ("failed", models.IntegerField(default=0)),
+                ("skipped", models.IntegerField(default=0)),
+                ("chunks", models.IntegerField(default=0)),
+                ("summary", models.JSONField(blank=True, default=dict)),
+                ("error", models.TextField(blank=True)),
+                ("started_at", models.DateTimeField(blank=True, null=True)),
+                ("completed_at", models.DateTimeField(blank=True, null=True)),
+                (
+                    "tenant",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="cv_import_jobs",
+                        to="core.tenant",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="cv_import_jobs",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "cv_analysis_import_jobs",
+                "ordering": ["-created_at"],
+            },
+        ),
+        migrations.AddField(
+            model_name="cv",
+            name="import_job",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="cvs",
+                to="cv_analysis.cvimportjob",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="cvimportjob",
+            index=models.Index(
+                fields=["tenant", "-created_at"], name="cv_analysis_tenant__8b12b6_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 4.2.30 on 2026-10-17 07:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("cv_analysis", "0007_cv_import_job"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ParsedDocument",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                ("content_hash", models.CharField(max_length=64, unique=True)),
+                ("file_type", models.CharField(max_length=10)),
+                ("parser_version", models.PositiveSmallIntegerField(default=1)),
+                ("page_count", models.IntegerField(default=0)),
+                ("text_length", models.IntegerField(default=0)),
+                ("truncated", models.BooleanField(default=False)),
+                ("data", models.BinaryField()),
+            ],
+            options={
+                "db_table": "cv_analysis_parsed_documents",
+            },
+        ),
+    ]
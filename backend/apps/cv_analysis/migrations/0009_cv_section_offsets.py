@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-17 07:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("cv_analysis", "0008_parsed_document"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="cv",
+            name="section_offsets",
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
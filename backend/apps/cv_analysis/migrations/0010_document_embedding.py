@@ -0,0 +1,63 @@
+# Generated by Django 4.2.30 on 2026-10-17 07:18
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0001_initial"),
+        ("cv_analysis", "0009_cv_section_offsets"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DocumentEmbedding",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[("cv", "CV"), ("job", "Job posting")], max_length=10
+                    ),
+                ),
+                ("object_id", models.IntegerField()),
+                ("model_name", models.CharField(max_length=100)),
+                ("text_hash", models.CharField(max_length=64)),
+                ("vector", models.BinaryField()),
+                (
+                    "tenant",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="document_embeddings",
+                        to="core.tenant",
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "cv_analysis_embeddings",
+                "indexes": [
+                    models.Index(
+                        fields=["tenant", "kind"], name="cv_analysis_tenant__de923b_idx"
+                    )
+                ],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="documentembedding",
+            constraint=models.UniqueConstraint(
+                fields=("kind", "object_id"), name="uniq_document_embedding"
+            ),
+        ),
+    ]
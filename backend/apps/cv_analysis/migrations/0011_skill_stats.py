@@ -0,0 +1,151 @@
+# Generated by Django 4.2.30 on 2026-10-17 07:25
+
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models import Count, Sum
+
+
+def fill_skill_stats(apps, schema_editor):
+    """Initial rollups; afterwards they are kept current incrementally"""
+    CVSkill = apps.get_model("cv_analysis", "CVSkill")
+    JobSkill = apps.get_model("cv_analysis", "JobSkill")
+    SkillStat = apps.get_model("cv_analysis", "SkillStat")
+    TenantSkillStat = apps.get_model("cv_analysis", "TenantSkillStat")
+    SkillCategoryStat = apps.get_model("cv_analysis", "SkillCategoryStat")
+
+    tenant_stats = {}
+    for row in CVSkill.objects.values("cv__tenant_id", "skill_id").annotate(
+        count=Count("id"), confidence=Sum("confidence")
+    ):
+        key = (row["cv__tenant_id"], row["skill_id"])
+        tenant_stats[key] = TenantSkillStat(
+            tenant_id=key[0],
+            skill_id=key[1],
+            cv_count=row["count"],
+            confidence_total=row["confidence"] or 0,
+        )
+    for row in JobSkill.objects.values("job__tenant_id", "skill_id").annotate(
+        count=Count("id")
+    ):
+        key = (row["job__tenant_id"], row["skill_id"])
+        tenant_stats.setdefault(
+            key, TenantSkillStat(tenant_id=key[0], skill_id=key[1])
+        ).job_count = row["count"]
+    TenantSkillStat.objects.bulk_create(tenant_stats.values(), batch_size=1000)
+
+    skill_stats = {}
+    for stat in tenant_stats.values():
+        total = skill_stats.setdefault(stat.skill_id, SkillStat(skill_id=stat.skill_id))
+        total.cv_count += stat.cv_count
+        total.job_count += stat.job_count
+        total.confidence_total += stat.confidence_total
+    SkillStat.objects.bulk_create(skill_stats.values(), batch_size=1000)
+
+    SkillCategoryStat.objects.bulk_create(
+        SkillCategoryStat(
+            category=row["skill__category"],
+            cv_skill_count=row["count"],
+            confidence_total=row["confidence"] or 0,
+        )
+        for row in CVSkill.objects.values("skill__category").annotate(
+            count=Count("id"), confidence=Sum("confidence")
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0001_initial"),
+        ("cv_analysis", "0010_document_embedding"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SkillCategoryStat",
+            fields=[
+                (
+                    "category",
+                    models.CharField(max_length=50, primary_key=True, serialize=False),
+                ),
+                ("cv_skill_count", models.IntegerField(default=0)),
+                ("confidence_total", models.BigIntegerField(default=0)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "db_table": "cv_analysis_skill_category_stats",
+            },
+        ),
+        migrations.CreateModel(
+            name="SkillStat",
+            fields=[
+                (
+                    "skill",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="stat",
+                        serialize=False,
+                        to="cv_analysis.skill",
+                    ),
+                ),
+                ("cv_count", models.IntegerField(default=0)),
+                ("job_count", models.IntegerField(default=0)),
+                ("confidence_total", models.BigIntegerField(default=0)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "db_table": "cv_analysis_skill_stats",
+                "indexes": [
+                    models.Index(
+                        fields=["-cv_count"], name="cv_analysis_cv_coun_bfabda_idx"
+                    )
+                ],
+            },
+        ),
+        migrations.CreateModel(
+            name="TenantSkillStat",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("cv_count", models.IntegerField(default=0)),
+                ("job_count", models.IntegerField(default=0)),
+                ("confidence_total", models.BigIntegerField(default=0)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "skill",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="tenant_stats",
+                        to="cv_analysis.skill",
+                    ),
+                ),
+                (
+                    "tenant",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="skill_stats",
+                        to="core.tenant",
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "cv_analysis_tenant_skill_stats",
+                "indexes": [
+                    models.Index(
+                        fields=["tenant", "-cv_count"],
+                        name="cv_analysis_tenant__4f4d79_idx",
+                    )
+                ],
+                "unique_together": {("tenant", "skill")},
+            },
+        ),
+        migrations.RunPython(fill_skill_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,63 @@
+# Generated by Django 4.2.30 on 2026-10-17 07:47
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0001_initial"),
+        ("cv_analysis", "0011_skill_stats"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="JobSearch",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                ("country", models.CharField(max_length=100)),
+                ("min_confidence", models.IntegerField()),
+                ("max_jobs_per_title", models.IntegerField()),
+                ("possible_jobs", models.JSONField(blank=True, default=list)),
+                ("postings", models.JSONField(blank=True, default=list)),
+                ("summary", models.JSONField(blank=True, default=dict)),
+                (
+                    "cv",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="job_searches",
+                        to="cv_analysis.cv",
+                    ),
+                ),
+                (
+                    "tenant",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="job_searches",
+                        to="core.tenant",
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "cv_analysis_job_searches",
+                "ordering": ["-created_at"],
+                "indexes": [
+                    models.Index(
+                        fields=["cv", "country", "-created_at"],
+                        name="cv_analysis_cv_id_0556ca_idx",
+                    )
+                ],
+            },
+        ),
+    ]
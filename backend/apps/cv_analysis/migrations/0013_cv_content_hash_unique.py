@@ -0,0 +1,42 @@
+# Generated by Django 4.2.30 on 2026-10-17 08:01
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def clear_duplicate_hashes(apps, schema_editor):
+    """Keep the hash on the newest live copy only, so older duplicates stop being reused"""
+    CV = apps.get_model("cv_analysis", "CV")
+    live = CV.objects.exclude(status="failed").exclude(content_hash="")
+    duplicates = (
+        live.values("tenant_id", "content_hash").annotate(n=Count("id")).filter(n__gt=1)
+    )
+    for row in duplicates:
+        ids = list(
+            live.filter(tenant_id=row["tenant_id"], content_hash=row["content_hash"])
+            .order_by("-created_at")
+            .values_list("id", flat=True)
+        )
+        CV.objects.filter(id__in=ids[1:]).update(content_hash="")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("cv_analysis", "0012_job_searches"),
+    ]
+
+    operations = [
+        migrations.RunPython(clear_duplicate_hashes, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="cv",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(
+                    models.Q(("status", "failed"), _negated=True),
+                    models.Q(("content_hash", ""), _negated=True),
+                ),
+                fields=("tenant", "content_hash"),
+                name="uniq_cv_content_hash",
+            ),
+        ),
+    ]
@@ -64,11 +64,16 @@ class CV(TimestampedModel):
     filename = models.CharField(max_length=255)
     file_type = models.CharField(max_length=10)  # pdf, docx, txt
     file_size = models.IntegerField()  # bytes
+    content_hash = models.CharField(max_length=64, blank=True)  # SHA-256 of file contents
+    
+    # Set for CVs created by a bulk (ZIP) import
+    import_job = models.ForeignKey('CVImportJob', on_delete=models.SET_NULL, null=True, blank=True, related_name='cvs')
     
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='uploaded')
     
     # Extracted text
     raw_text = models.TextField(blank=True)
+    section_offsets = models.JSONField(default=dict, blank=True)  # {section: [start, end]} in raw_text
     
     # Processing metadata
     processed_at = models.DateTimeField(null=True, blank=True)
@@ -81,6 +86,15 @@ class CV(TimestampedModel):
             models.Index(fields=['tenant', '-created_at']),
             models.Index(fields=['user', '-created_at']),
             models.Index(fields=['status']),
+            models.Index(fields=['tenant', 'content_hash']),
+        ]
+        constraints = [
+            # One live copy per file contents; failed rows may be uploaded again
+            models.UniqueConstraint(
+                fields=['tenant', 'content_hash'],
+                condition=~models.Q(status='failed') & ~models.Q(content_hash=''),
+                name='uniq_cv_content_hash',
+            ),
         ]
         verbose_name = 'CV'
         verbose_name_plural = 'CVs'
@@ -89,6 +103,29 @@ class CV(TimestampedModel):
         return f"{self.filename} - {self.user.email} ({self.status})"
 
 
+class ParsedDocument(TimestampedModel):
+    """
+    Parsed text of a CV file, shared by every CV with the same contents.
+    Stored as zlib-compressed JSON so consumers never re-run the PDF parser.
+    """
+    content_hash = models.CharField(max_length=64, unique=True)  # SHA-256 of file contents
+    file_type = models.CharField(max_length=10)
+    parser_version = models.PositiveSmallIntegerField(default=1)
+    
+    page_count = models.IntegerField(default=0)
+    text_length = models.IntegerField(default=0)
+    truncated = models.BooleanField(default=False)  # page limit reached
+    
+    # zlib(JSON): normalized text, page start offsets, section offsets
+    data = models.BinaryField()
+    
+    class Meta:
+        db_table = 'cv_analysis_parsed_documents'
+    
+    def __str__(self):
+        return f"{self.content_hash[:12]} ({self.page_count} pages)"
+
+
 class CVAnalysis(TimestampedModel):
     """Stores analysis results for a CV"""
     cv = models.OneToOneField(CV, on_delete=models.CASCADE, related_name='analysis')
@@ -211,12 +248,16 @@ class Experience(TimestampedModel):
     def __str__(self):
         return f"{self.position} at {self.company}"
     
-    def save(self, *args, **kwargs):
-        # Calculate duration
+    def calculate_duration(self):
+        """Set duration_months from the dates (also needed before bulk_create, which skips save)"""
         if self.start_date:
             from django.utils import timezone
             end = self.end_date or timezone.now().date()
             self.duration_months = (end.year - self.start_date.year) * 12 + (end.month - self.start_date.month)
+    
+    def save(self, *args, **kwargs):
+        # Calculate duration
+        self.calculate_duration()
         super().save(*args, **kwargs)
 
 
@@ -276,9 +317,13 @@ class JobPosting(TimestampedModel):
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='active')
     
     # External job posting
-    external_url = models.URLField(blank=True)
+    external_url = models.URLField(max_length=2048, blank=True)
     source = models.CharField(max_length=100, blank=True)  # LinkedIn, Indeed, etc.
     
+    # Scraped postings: normalized title/company/location hash and last time a search returned it
+    fingerprint = models.CharField(max_length=64, null=True, blank=True)
+    last_seen_at = models.DateTimeField(null=True, blank=True)
+    
     # For matching
     years_experience_required = models.DecimalField(max_digits=4, decimal_places=1, null=True, blank=True)
     
@@ -288,12 +333,47 @@ class JobPosting(TimestampedModel):
         indexes = [
             models.Index(fields=['tenant', 'status', '-created_at']),
             models.Index(fields=['status']),
+            models.Index(fields=['status', 'last_seen_at']),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['tenant', 'fingerprint'], name='uniq_job_posting_fingerprint'),
         ]
     
     def __str__(self):
         return f"{self.title} at {self.company}"
 
 
+class DocumentEmbedding(TimestampedModel):
+    """
+    Sentence embedding of a CV or job posting, used for semantic search.
+    The tenant's ANN index is built from (and kept in sync with) these rows.
+    """
+    KIND_CHOICES = [
+        ('cv', 'CV'),
+        ('job', 'Job posting'),
+    ]
+    
+    tenant = models.ForeignKey('core.Tenant', on_delete=models.CASCADE, related_name='document_embeddings')
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    object_id = models.IntegerField()  # CV or JobPosting id
+    
+    model_name = models.CharField(max_length=100)
+    text_hash = models.CharField(max_length=64)  # SHA-256 of the embedded text; unchanged text isn't re-encoded
+    vector = models.BinaryField()  # float32, L2-normalized
+    
+    class Meta:
+        db_table = 'cv_analysis_embeddings'
+        indexes = [
+            models.Index(fields=['tenant', 'kind']),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['kind', 'object_id'], name='uniq_document_embedding'),
+        ]
+    
+    def __str__(self):
+        return f"{self.kind} {self.object_id} ({self.model_name})"
+
+
 class JobSkill(TimestampedModel):
     """Skills required for a job"""
     REQUIREMENT_LEVEL_CHOICES = [
@@ -316,6 +396,68 @@ class JobSkill(TimestampedModel):
         return f"{self.skill.name} for {self.job.title}"
 
 
+class SkillStat(models.Model):
+    """
+    Global usage rollup for one skill.
+    
+    Kept current incrementally from CVSkill/JobSkill writes and rebuilt by
+    the reconcile_skill_stats beat task.
+    """
+    skill = models.OneToOneField(Skill, on_delete=models.CASCADE, primary_key=True, related_name='stat')
+    cv_count = models.IntegerField(default=0)  # CVs listing the skill
+    job_count = models.IntegerField(default=0)  # Job postings requiring it
+    confidence_total = models.BigIntegerField(default=0)  # Sum of CVSkill.confidence
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'cv_analysis_skill_stats'
+        indexes = [
+            models.Index(fields=['-cv_count']),
+        ]
+    
+    def __str__(self):
+        return f"{self.skill_id}: {self.cv_count} CVs, {self.job_count} jobs"
+
+
+class TenantSkillStat(models.Model):
+    """Per-tenant usage rollup for one skill"""
+    tenant = models.ForeignKey('core.Tenant', on_delete=models.CASCADE, related_name='skill_stats')
+    skill = models.ForeignKey(Skill, on_delete=models.CASCADE, related_name='tenant_stats')
+    cv_count = models.IntegerField(default=0)
+    job_count = models.IntegerField(default=0)
+    confidence_total = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'cv_analysis_tenant_skill_stats'
+        unique_together = ['tenant', 'skill']
+        indexes = [
+            models.Index(fields=['tenant', '-cv_count']),
+        ]
+    
+    def __str__(self):
+        return f"{self.tenant_id} / {self.skill_id}: {self.cv_count} CVs"
+
+
+class SkillCategoryStat(models.Model):
+    """Global CV skill count and confidence total per skill category"""
+    category = models.CharField(max_length=50, primary_key=True)
+    cv_skill_count = models.IntegerField(default=0)
+    confidence_total = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'cv_analysis_skill_category_stats'
+    
+    def __str__(self):
+        return f"{self.category}: {self.cv_skill_count}"
+    
+    @property
+    def avg_confidence(self):
+        """Average CVSkill confidence in this category."""
+        return self.confidence_total / self.cv_skill_count if self.cv_skill_count else 0.0
+
+
 class JobMatch(TimestampedModel):
     """CV to Job matching results"""
     cv = models.ForeignKey(CV, on_delete=models.CASCADE, related_name='job_matches')
@@ -352,6 +494,32 @@ class JobMatch(TimestampedModel):
         return f"{self.cv.filename} → {self.job.title} ({self.overall_score}%)"
 
 
+class JobSearch(TimestampedModel):
+    """A find-jobs search, kept so repeats are answered from the stored postings"""
+    tenant = models.ForeignKey('core.Tenant', on_delete=models.CASCADE, related_name='job_searches')
+    cv = models.ForeignKey(CV, on_delete=models.CASCADE, related_name='job_searches')
+    
+    # Search parameters
+    country = models.CharField(max_length=100)
+    min_confidence = models.IntegerField()
+    max_jobs_per_title = models.IntegerField()
+    
+    # Results: per-search context of each posting, keyed by JobPosting fingerprint
+    possible_jobs = models.JSONField(default=list, blank=True)
+    postings = models.JSONField(default=list, blank=True)
+    summary = models.JSONField(default=dict, blank=True)
+    
+    class Meta:
+        db_table = 'cv_analysis_job_searches'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['cv', 'country', '-created_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.cv.filename} in {self.country} ({self.created_at})"
+
+
 class ATSAnalysis(TimestampedModel):
     """
     ATS Score Checker Module - Free with limited detailed reports
@@ -481,3 +649,118 @@ class ChatMessage(TimestampedModel):
     
     def __str__(self):
         return f"{self.role}: {self.content[:50]}..."
+
+
+class AnalysisJob(TimestampedModel):
+    """
+    Background run of an ATS check, CV-job match or advanced analysis.
+    Lets the HTTP request return immediately while a Celery worker calls the LLM.
+    """
+    KIND_CHOICES = [
+        ('ats', 'ATS Score Check'),
+        ('cv_match', 'CV-Job Match'),
+        ('advanced', 'Advanced CV Analysis'),
+    ]
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('processing', 'Processing'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ]
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    tenant = models.ForeignKey('core.Tenant', on_delete=models.CASCADE, related_name='analysis_jobs')
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='analysis_jobs')
+    cv = models.ForeignKey(CV, on_delete=models.CASCADE, related_name='analysis_jobs')
+    
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued')
+    
+    # Task inputs and serialized output
+    params = models.JSONField(default=dict, blank=True)
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    
+    celery_task_id = models.CharField(max_length=255, blank=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        db_table = 'cv_analysis_jobs'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['tenant', '-created_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.kind} job {self.id} ({self.status})"
+    
+    @property
+    def is_finished(self):
+        """Check if the job reached a terminal state."""
+        return self.status in ('completed', 'failed')
+
+
+class CVImportJob(TimestampedModel):
+    """
+    Bulk import of CVs from an uploaded archive.
+    Progress counters are updated by the Celery chunk tasks as CVs finish.
+    """
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('unpacking', 'Unpacking'),
+        ('processing', 'Processing'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ]
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    tenant = models.ForeignKey('core.Tenant', on_delete=models.CASCADE, related_name='cv_import_jobs')
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='cv_import_jobs')
+    
+    archive = models.FileField(upload_to='cv_imports/%Y/%m/%d/', blank=True)
+    archive_name = models.CharField(max_length=255)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued')
+    
+    # Progress
+    total = models.IntegerField(default=0)  # CVs created from the archive
+    processed = models.IntegerField(default=0)
+    failed = models.IntegerField(default=0)
+    skipped = models.IntegerField(default=0)  # unsupported, oversized or duplicate entries
+    chunks = models.IntegerField(default=0)
+    
+    # Final aggregation (score distribution, top skills, ...)
+    summary = models.JSONField(default=dict, blank=True)
+    error = models.TextField(blank=True)
+    
+    started_at = models.DateTimeField(null=True, blank=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        db_table = 'cv_analysis_import_jobs'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['tenant', '-created_at']),
+        ]
+    
+    def __str__(self):
+        return f"Import {self.archive_name} ({self.status})"
+    
+    @property
+    def is_finished(self):
+        """Check if the import reached a terminal state."""
+        return self.status in ('completed', 'failed')
+    
+    @property
+    def done(self):
+        """CVs that finished processing, successfully or not."""
+        return self.processed + self.failed
+    
+    @property
+    def throughput(self):
+        """CVs finished per minute since processing started."""
+        if not self.started_at or not self.done:
+            return 0.0
+        from django.utils import timezone
+        elapsed = ((self.completed_at or timezone.now()) - self.started_at).total_seconds()
+        return round(self.done / elapsed * 60, 2) if elapsed > 0 else 0.0
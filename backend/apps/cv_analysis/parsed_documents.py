@@ -0,0 +1,146 @@
+"""
+Parsed-document artifacts for CV files.
+
+A CV file is parsed once per content hash: the normalized text, page start
+offsets and section offsets are stored compressed in ParsedDocument and
+every consumer (processing, job search, ATS, matcher, analyzer) reads that
+artifact instead of running the PDF parser again.
+"""
+import re
+import json
+import zlib
+import hashlib
+import logging
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+from .models import CV, ParsedDocument
+from .text_extraction import TextExtractionService
+from .sections import SectionSegmenter
+
+logger = logging.getLogger(__name__)
+
+# Bump when extraction or normalization changes to re-parse stored artifacts
+PARSER_VERSION = 2
+
+
+@dataclass
+class ParsedText:
+    """Normalized text of a document with its page and section offsets"""
+    text: str
+    page_offsets: List[int] = field(default_factory=list)
+    section_offsets: Dict[str, List[int]] = field(default_factory=dict)
+    truncated: bool = False
+
+    @classmethod
+    def from_pages(cls, pages: List[str], truncated: bool = False) -> 'ParsedText':
+        offsets = []
+        position = 0
+        for page in pages:
+            offsets.append(position)
+            position += len(page) + 1
+        return cls(text='\n'.join(pages), page_offsets=offsets, truncated=truncated)
+
+    @property
+    def pages(self) -> List[str]:
+        bounds = self.page_offsets + [len(self.text) + 1]
+        return [self.text[start:end - 1] for start, end in zip(bounds, bounds[1:])]
+
+
+class ParsedDocumentStore:
+    """Read and write ParsedDocument artifacts keyed by file content hash"""
+
+    @staticmethod
+    def normalize_page(text: str) -> str:
+        """Unify newlines, drop NULs and trailing spaces, collapse blank-line runs"""
+        text = text.replace('\r\n', '\n').replace('\r', '\n').replace('\x00', '')
+        text = re.sub(r'[ \t]+\n', '\n', text)
+        return re.sub(r'\n{3,}', '\n\n', text).strip('\n')
+
+    @staticmethod
+    def encode(parsed: ParsedText) -> bytes:
+        payload = {
+            'text': parsed.text,
+            'pages': parsed.page_offsets,
+            'sections': parsed.section_offsets,
+        }
+        return zlib.compress(json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8'), 6)
+
+    @staticmethod
+    def decode(data: bytes, truncated: bool = False) -> ParsedText:
+        payload = json.loads(zlib.decompress(bytes(data)).decode('utf-8'))
+        return ParsedText(
+            text=payload['text'],
+            page_offsets=payload.get('pages', []),
+            section_offsets=payload.get('sections', {}),
+            truncated=truncated,
+        )
+
+    @staticmethod
+    def get(content_hash: str) -> Optional[ParsedText]:
+        """Stored artifact for a content hash, if parsed with the current parser"""
+        document = ParsedDocument.objects.filter(
+            content_hash=content_hash,
+            parser_version=PARSER_VERSION
+        ).only('data', 'truncated').first()
+        if document is None:
+            return None
+        return ParsedDocumentStore.decode(document.data, document.truncated)
+
+    @staticmethod
+    def _content_hash(cv: CV) -> str:
+        """The CV's content hash, computing (and saving) it for older rows"""
+        if cv.content_hash:
+            return cv.content_hash
+        digest = hashlib.sha256()
+        with cv.file.open('rb') as file:
+            for chunk in file.chunks():
+                digest.update(chunk)
+        cv.content_hash = digest.hexdigest()
+        if cv.pk:
+            CV.objects.filter(pk=cv.pk).update(content_hash=cv.content_hash)
+        return cv.content_hash
+
+    @staticmethod
+    def parse(cv: CV, file_type: Optional[str] = None) -> Tuple[ParsedText, bool]:
+        """Run extraction on the CV's stored file; returns (parsed, timed_out)"""
+        try:
+            # The extraction worker memory-maps local files itself
+            source = cv.file.path
+        except NotImplementedError:
+            with cv.file.open('rb') as file:
+                source = file.read()
+        result = TextExtractionService.extract(source, file_type or cv.file_type)
+
+        pages = [
+            ParsedDocumentStore.normalize_page(page)
+            for page in ParsedText(result.text, result.page_offsets).pages
+        ]
+        parsed = ParsedText.from_pages(pages, result.truncated)
+        parsed.section_offsets = SectionSegmenter.segment(parsed.text)
+        return parsed, result.timed_out
+
+    @staticmethod
+    def get_or_parse(cv: CV, file_type: Optional[str] = None) -> ParsedText:
+        """The CV's parsed text, parsing and storing it on first use"""
+        content_hash = ParsedDocumentStore._content_hash(cv)
+        parsed = ParsedDocumentStore.get(content_hash)
+        if parsed is not None:
+            return parsed
+
+        parsed, timed_out = ParsedDocumentStore.parse(cv, file_type)
+        if timed_out:
+            # A slow parse may succeed later; don't pin partial text to this hash
+            return parsed
+
+        ParsedDocument.objects.update_or_create(
+            content_hash=content_hash,
+            defaults={
+                'file_type': file_type or cv.file_type,
+                'parser_version': PARSER_VERSION,
+                'page_count': len(parsed.page_offsets),
+                'text_length': len(parsed.text),
+                'truncated': parsed.truncated,
+                'data': ParsedDocumentStore.encode(parsed),
+            }
+        )
+        return parsed
@@ -0,0 +1,124 @@
+"""
+One-pass CV section segmentation.
+
+Heading lines ("Experience", "EDUCATION:", "Compétences", ...) are found
+with a single combined regex; each section runs from its heading to the
+next one. The resulting offsets index is stored on the CV (and in its
+parsed-document artifact) so extractors and scorers work on slices instead
+of rescanning the whole text.
+"""
+import re
+from typing import Dict, List, Optional
+
+SECTIONS = ('contact', 'summary', 'experience', 'education', 'skills', 'projects')
+
+SECTION_HEADINGS = {
+    'contact': [
+        'contact', 'contact information', 'contact details', 'personal information',
+        'personal details', 'coordonnées', 'informations personnelles',
+    ],
+    'summary': [
+        'summary', 'professional summary', 'profile', 'professional profile', 'about me',
+        'objective', 'career objective', 'résumé', 'profil', 'à propos',
+    ],
+    'experience': [
+        'experience', 'work experience', 'professional experience', 'employment',
+        'employment history', 'work history', 'career history',
+        'expérience', 'expériences', 'expérience professionnelle', 'expériences professionnelles',
+    ],
+    'education': [
+        'education', 'academic background', 'qualifications', 'academic qualifications',
+        'formation', 'formations', 'éducation', 'diplômes',
+    ],
+    'skills': [
+        'skills', 'technical skills', 'core skills', 'key skills', 'competencies',
+        'core competencies', 'technologies', 'compétences', 'compétences techniques',
+    ],
+    'projects': [
+        'projects', 'personal projects', 'key projects', 'projets', 'projets personnels',
+    ],
+}
+
+# A heading starts a line: optional bullets/markdown, the title, then optionally
+# an "&"-joined title ("Education & Certifications"), a trailing qualifier
+# ("(2018-2023)", "- 2018 to date") and a colon, which may be followed by
+# the section's first content ("Skills: Python, Django")
+HEADING_REGEX = re.compile(
+    r'^[ \t#*•\-–]*(?:'
+    + '|'.join(
+        f"(?P<{section}>{'|'.join(re.escape(h) for h in sorted(headings, key=len, reverse=True))})"
+        for section, headings in SECTION_HEADINGS.items()
+    )
+    + r')'
+    r'(?:[ \t]*(?:&|\+|/|\band\b|\bet\b)[ \t]*[^\W\d_][\w\'’ \t-]{0,30}?)?'
+    r'(?:[ \t]*[(\[][^)\]\n]{0,40}[)\]]|[ \t]+[-–—|][^:\n]{0,40}?)?'
+    r'[ \t]*(?::[^\n]*|$)',
+    re.IGNORECASE | re.MULTILINE,
+)
+
+# Looser evidence of a section, for CVs whose headings are not recognised
+SECTION_KEYWORDS = {
+    'experience': re.compile(r'\b(?:experience|employment|work history|expériences?)\b', re.IGNORECASE),
+    'education': re.compile(r'\b(?:education|formations?|éducation|diplômes?)\b', re.IGNORECASE),
+    'skills': re.compile(r'\b(?:skills|competencies|compétences)\b', re.IGNORECASE),
+}
+
+
+class SectionSegmenter:
+    """Split CV text into sections by heading lines"""
+
+    @staticmethod
+    def segment(text: str) -> Dict[str, List[int]]:
+        """
+        Offsets index {section: [start, end]} in one pass over the text.
+
+        The first occurrence of a heading wins. Text above the first heading
+        is the contact block unless the CV has an explicit contact section.
+        """
+        if not text:
+            return {}
+
+        headings = [(match.lastgroup, match.start()) for match in HEADING_REGEX.finditer(text)]
+        index = {}
+        for position, (section, start) in enumerate(headings):
+            end = headings[position + 1][1] if position + 1 < len(headings) else len(text)
+            if section not in index:
+                index[section] = [start, end]
+
+        if 'contact' not in index:
+            first_heading = headings[0][1] if headings else len(text)
+            if first_heading > 0:
+                index['contact'] = [0, first_heading]
+        return index
+
+    @staticmethod
+    def slice(text: str, index: Optional[Dict[str, List[int]]], section: str) -> str:
+        """Text of one section ('' when the CV has no such section)"""
+        bounds = (index or {}).get(section)
+        return text[bounds[0]:bounds[1]] if bounds else ''
+
+    @staticmethod
+    def has_section(text: str, index: Optional[Dict[str, List[int]]], section: str) -> bool:
+        """Whether the CV has the section, by heading or else by keyword"""
+        if section in (index or {}):
+            return True
+        keywords = SECTION_KEYWORDS.get(section)
+        return bool(keywords and text and keywords.search(text))
+
+    @staticmethod
+    def find(text: str, index: Optional[Dict[str, List[int]]], section: str) -> str:
+        """
+        Text of one section; without a recognised heading, the text from the
+        first line mentioning the section's keyword ('' when there is none)
+        """
+        found = SectionSegmenter.slice(text, index, section)
+        if found or not text or section not in SECTION_KEYWORDS:
+            return found
+        match = SECTION_KEYWORDS[section].search(text)
+        return text[text.rfind('\n', 0, match.start()) + 1:] if match else ''
+
+    @staticmethod
+    def index_for(text: str, index: Optional[Dict[str, List[int]]]) -> Dict[str, List[int]]:
+        """A stored index, or a freshly computed one for CVs segmented before it existed"""
+        # Non-empty text always segments to something, so {} means "not computed yet"
+        return index if index else SectionSegmenter.segment(text)
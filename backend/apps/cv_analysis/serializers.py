@@ -1,7 +1,8 @@
+from django.conf import settings
 from rest_framework import serializers
 from .models import (
     CV, CVAnalysis, Skill, CVSkill, Experience, Education,
-    JobPosting, JobSkill, JobMatch
+    JobPosting, JobSkill, JobMatch, CVImportJob, SkillStat
 )
 
 
@@ -106,7 +107,12 @@ class SkillSerializer(serializers.ModelSerializer):
         fields = ['id', 'name', 'category', 'synonyms', 'importance_weight', 'usage_count']
     
     def get_usage_count(self, obj):
-        return obj.cv_skills.count()
+        # Annotated by the skill views; otherwise read the SkillStat rollup
+        usage_count = getattr(obj, 'usage_count', None)
+        if usage_count is not None:
+            return usage_count
+        stat = SkillStat.objects.filter(skill=obj).values_list('cv_count', flat=True).first()
+        return stat or 0
 
 
 class JobSkillSerializer(serializers.ModelSerializer):
@@ -127,11 +133,11 @@ class JobPostingSerializer(serializers.ModelSerializer):
             'id', 'tenant', 'created_by', 'created_by_name',
             'title', 'company', 'location',
             'salary_min', 'salary_max', 'description', 'requirements',
-            'status', 'external_url', 'source',
+            'status', 'external_url', 'source', 'last_seen_at',
             'years_experience_required', 'required_skills',
             'created_at', 'updated_at'
         ]
-        read_only_fields = ['id', 'tenant', 'created_by', 'created_at', 'updated_at']
+        read_only_fields = ['id', 'tenant', 'created_by', 'last_seen_at', 'created_at', 'updated_at']
 
 
 class JobMatchSerializer(serializers.ModelSerializer):
@@ -169,6 +175,35 @@ class CVUploadSerializer(serializers.Serializer):
         return file
 
 
+class CVBulkImportSerializer(serializers.Serializer):
+    """Serializer for bulk CV import (ZIP of PDF/DOCX/TXT files)"""
+    archive = serializers.FileField(required=True)
+    
+    def validate_archive(self, archive):
+        if not archive.name.lower().endswith('.zip'):
+            raise serializers.ValidationError("Only ZIP archives are allowed")
+        
+        max_size = getattr(settings, 'CV_IMPORT_MAX_ARCHIVE_SIZE', 500 * 1024 * 1024)
+        if archive.size > max_size:
+            raise serializers.ValidationError(f"Archive size must be under {max_size // (1024 * 1024)}MB")
+        
+        return archive
+
+
+class CVImportJobSerializer(serializers.ModelSerializer):
+    done = serializers.IntegerField(read_only=True)
+    throughput = serializers.FloatField(read_only=True)
+    
+    class Meta:
+        model = CVImportJob
+        fields = [
+            'id', 'archive_name', 'status', 'total', 'processed', 'failed', 'skipped',
+            'done', 'throughput', 'chunks', 'summary', 'error',
+            'started_at', 'completed_at', 'created_at', 'updated_at'
+        ]
+        read_only_fields = fields
+
+
 class JobMatchingSerializer(serializers.Serializer):
     """Serializer for job matching request"""
     cv_id = serializers.IntegerField(required=True)
@@ -4,7 +4,7 @@ Serializers for the 3 CV Analysis modules
 from rest_framework import serializers
 from .models import (
     CV, ATSAnalysis, CVJobMatch, AdvancedCVAnalysis, 
-    ChatMessage, CVAnalysisUsageTracker
+    ChatMessage, CVAnalysisUsageTracker, AnalysisJob
 )
 
 
@@ -44,6 +44,7 @@ class ATSAnalysisRequestSerializer(serializers.Serializer):
     """Request serializer for ATS analysis"""
     cv_file = serializers.FileField(required=True)
     request_detailed_report = serializers.BooleanField(default=False)
+    async_mode = serializers.BooleanField(default=False)  # Queue and return 202 with a job id
 
 
 class CVJobMatchSerializer(serializers.ModelSerializer):
@@ -67,6 +68,7 @@ class CVJobMatchRequestSerializer(serializers.Serializer):
     cv_file = serializers.FileField(required=True)
     job_title = serializers.CharField(max_length=255, required=True)
     job_description = serializers.CharField(required=True)
+    async_mode = serializers.BooleanField(default=False)
 
 
 class ChatMessageSerializer(serializers.ModelSerializer):
@@ -96,8 +98,21 @@ class AdvancedCVAnalysisRequestSerializer(serializers.Serializer):
     """Request serializer for Advanced CV analysis"""
     cv_file = serializers.FileField(required=True)
     job_description = serializers.CharField(required=False, allow_blank=True)
+    async_mode = serializers.BooleanField(default=False)
 
 
 class ChatMessageRequestSerializer(serializers.Serializer):
     """Request serializer for chatbot messages"""
     message = serializers.CharField(required=True)
+
+
+class AnalysisJobSerializer(serializers.ModelSerializer):
+    """Serializer for background analysis jobs"""
+    
+    class Meta:
+        model = AnalysisJob
+        fields = [
+            'id', 'kind', 'status', 'cv', 'result', 'error',
+            'started_at', 'completed_at', 'created_at'
+        ]
+        read_only_fields = fields
@@ -4,16 +4,25 @@ CV parsing and analysis services
 import re
 import os
 import json
+import hashlib
 import logging
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Callable, Tuple, Iterator
 from decimal import Decimal
 from datetime import datetime, timedelta
-import PyPDF2
-import docx
-import openai
 from django.conf import settings
 from django.utils import timezone
+from django.db import IntegrityError, transaction
 from .models import CV, CVAnalysis, Skill, CVSkill, Experience, Education
+from .llm_cache import LLMResponseCache
+from .skill_index import schedule_cv_refresh
+from .skill_stats import SkillStatsService
+from .text_extraction import TextExtractionService
+from .parsed_documents import ParsedDocumentStore
+from .sections import SectionSegmenter
+from .embeddings import schedule_embedding
+from apps.core.streaming import iter_ndjson
+from apps.core.response_cache import invalidate_responses
+from apps.integrations.gateway import get_gateway, get_openai_client as get_gateway_openai_client
 
 logger = logging.getLogger(__name__)
 
@@ -34,19 +43,8 @@ def get_nlp():
 
 # Lazy OpenAI accessor to avoid importing/initializing client at module import time
 def get_openai_client():
-    """Return the openai module with api key configured, or None if not available."""
-    api_key = getattr(settings, 'OPENAI_API_KEY', None)
-    if not api_key:
-        return None
-
-    # Configure top-level openai api_key to avoid constructing client wrappers
-    try:
-        openai.api_key = api_key
-    except Exception:
-        # Best-effort: if the openai package API differs, ignore and let calls fail later with clear errors
-        pass
-
-    return openai
+    """Return the shared pooled OpenAI client, or None if not available."""
+    return get_gateway_openai_client()
 
 
 class CVParser:
@@ -54,83 +52,196 @@ class CVParser:
     
     @staticmethod
     def extract_text(file_path: str, file_type: str) -> str:
-        """Extract text from CV file"""
+        """Extract text from CV file (in the extraction pool, with page/time limits)"""
         try:
-            if file_type == 'pdf':
-                return CVParser._extract_pdf(file_path)
-            elif file_type == 'docx':
-                return CVParser._extract_docx(file_path)
-            elif file_type == 'txt':
-                return CVParser._extract_txt(file_path)
-            else:
-                raise ValueError(f"Unsupported file type: {file_type}")
+            result = TextExtractionService.extract(file_path, file_type)
         except Exception as e:
             logger.error(f"Error extracting text from {file_path}: {e}")
             raise
+        if result.truncated:
+            logger.warning(
+                f"Partial text extracted from {file_path}: {result.pages} pages"
+                f"{' (timed out)' if result.timed_out else ''}"
+            )
+        return result.text
+
+
+class CVUploadService:
+    """Store uploaded CVs once per tenant, deduplicated by content hash"""
     
     @staticmethod
-    def _extract_pdf(file_path: str) -> str:
-        """Extract text from PDF"""
-        text = []
-        with open(file_path, 'rb') as file:
-            pdf_reader = PyPDF2.PdfReader(file)
-            for page in pdf_reader.pages:
-                text.append(page.extract_text())
-        return '\n'.join(text)
+    def compute_hash(file) -> str:
+        """SHA-256 of the uploaded file, read chunk by chunk"""
+        digest = hashlib.sha256()
+        for chunk in file.chunks():
+            digest.update(chunk)
+        file.seek(0)
+        return digest.hexdigest()
     
     @staticmethod
-    def _extract_docx(file_path: str) -> str:
-        """Extract text from DOCX"""
-        doc = docx.Document(file_path)
-        text = [para.text for para in doc.paragraphs]
-        return '\n'.join(text)
+    def extract_stored_text(cv: CV, file_type: Optional[str] = None) -> str:
+        """Text of the CV's stored file, from its parsed-document artifact (also sets section_offsets)"""
+        parsed = ParsedDocumentStore.get_or_parse(cv, file_type)
+        cv.section_offsets = parsed.section_offsets
+        return parsed.text
     
     @staticmethod
-    def _extract_txt(file_path: str) -> str:
-        """Extract text from TXT"""
-        with open(file_path, 'r', encoding='utf-8') as file:
-            return file.read()
+    def get_or_create_cv(
+        tenant,
+        user,
+        file,
+        extract_text: Optional[Callable] = None,
+        **fields
+    ) -> Tuple[CV, bool]:
+        """
+        Return the tenant's existing CV with the same contents, or create a new one
+        
+        Args:
+            tenant: Tenant uploading the file
+            user: Uploading user
+            file: Uploaded file (large uploads are spooled to disk by Django)
+            extract_text: Optional callable(cv) -> str used to fill raw_text (and
+                section_offsets), called once the file is stored so it reads the stored copy
+            **fields: Extra CV fields (file_type, status, ...); a reused row takes the
+                new upload's filename and these fields, but keeps its status
+        
+        Returns:
+            (cv, created) tuple
+        """
+        content_hash = CVUploadService.compute_hash(file)
+        duplicates = CV.objects.filter(
+            tenant=tenant,
+            content_hash=content_hash
+        ).exclude(status='failed')
+        
+        cv = duplicates.first()
+        if cv is None:
+            cv = CV(
+                tenant=tenant,
+                user=user,
+                filename=file.name,
+                file_size=file.size,
+                content_hash=content_hash,
+                **fields
+            )
+            # Write the blob once; text is extracted from that copy before the row is inserted
+            cv.file.save(file.name, file, save=False)
+            if extract_text:
+                cv.raw_text = extract_text(cv)
+            try:
+                with transaction.atomic():
+                    cv.save()
+                return cv, True
+            except IntegrityError:
+                # A concurrent upload of the same file was inserted first (uniq_cv_content_hash)
+                cv.file.delete(save=False)
+                cv = duplicates.first()
+                if cv is None:
+                    raise
+        
+        logger.info(f"Reusing CV {cv.id} for duplicate upload {file.name}")
+        cv.filename = file.name
+        update_fields = ['filename', 'updated_at']
+        for name, value in fields.items():
+            if name != 'status':
+                setattr(cv, name, value)
+                update_fields.append(name)
+        if extract_text and not cv.raw_text:
+            cv.raw_text = extract_text(cv)
+            update_fields += ['raw_text', 'section_offsets']
+        # Touch updated_at so the shared row isn't cleaned up while still in use
+        cv.save(update_fields=update_fields)
+        return cv, False
 
 
 class ContactExtractor:
-    """Extract contact information from CV text"""
+    """Extract contact information from CV text in a single combined scan"""
     
-    EMAIL_REGEX = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
-    PHONE_REGEX = r'(\+?\d{1,3}[-.\s]?)?\(?\d{3}\)?[-.\s]?\d{3}[-.\s]?\d{4}'
-    LINKEDIN_REGEX = r'(?:https?://)?(?:www\.)?linkedin\.com/in/[a-zA-Z0-9_-]+'
-    GITHUB_REGEX = r'(?:https?://)?(?:www\.)?github\.com/[a-zA-Z0-9_-]+'
+    # Every candidate starts with one of a few characters, so the engine skips
+    # between candidates in C; the lookbehinds then dispatch on that character.
+    SCANNER = re.compile(
+        r'[hwlg@+(\d](?:'
+        r'(?<=h)(?P<http>ttps?://)'
+        r'|(?<=w)(?P<www>ww\.)'
+        r'|(?<=l)(?P<linkedin>inkedin\.com/)'
+        r'|(?<=g)(?P<github>ithub\.com/)'
+        r'|(?<=@)(?P<email>)'
+        r'|(?<=[+(\d])(?P<phone>[\d\s().+-]{8,})'
+        r')',
+        re.IGNORECASE
+    )
+    URL_TAIL_REGEX = re.compile(r'[^\s<>"\'()\[\]]*')
+    EMAIL_LOCAL_REGEX = re.compile(r'[A-Za-z0-9._%+-]+\Z')
+    EMAIL_DOMAIN_REGEX = re.compile(r'[A-Za-z0-9-]+(?:\.[A-Za-z0-9-]+)*\.[A-Za-z]{2,}\b')
+    PHONE_REGEX = re.compile(
+        # French numbers: 06 12 34 56 78, +33 6 12 34 56 78
+        r'(?:\+33\s?(?:\(0\))?\s?|\b0)[1-9](?:[-.\s]?\d{2}){4}\b'
+        r'|(?:\+?\d{1,3}[-.\s]?)?\(?\d{3}\)?[-.\s]?\d{3}[-.\s]?\d{4}'
+    )
+    LINKEDIN_REGEX = re.compile(r'(?:https?://)?(?:[a-z]{2,3}\.)?(?:www\.)?linkedin\.com/in/[a-zA-Z0-9_-]+', re.IGNORECASE)
+    GITHUB_REGEX = re.compile(r'(?:https?://)?(?:www\.)?github\.com/[a-zA-Z0-9_-]+', re.IGNORECASE)
     
     @staticmethod
-    def extract(text: str) -> Dict[str, str]:
-        """Extract contact information"""
-        contact = {
-            'email': '',
-            'phone': '',
-            'linkedin_url': '',
-            'github_url': '',
-        }
-        
-        # Extract email
-        email_match = re.search(ContactExtractor.EMAIL_REGEX, text)
-        if email_match:
-            contact['email'] = email_match.group()
-        
-        # Extract phone
-        phone_match = re.search(ContactExtractor.PHONE_REGEX, text)
-        if phone_match:
-            contact['phone'] = phone_match.group()
+    def _add(values: List[str], value: str) -> None:
+        if value and value not in values:
+            values.append(value)
+    
+    @staticmethod
+    def extract(text: str) -> Dict[str, Any]:
+        """
+        Extract contact information in one pass.
         
-        # Extract LinkedIn
-        linkedin_match = re.search(ContactExtractor.LINKEDIN_REGEX, text, re.IGNORECASE)
-        if linkedin_match:
-            contact['linkedin_url'] = linkedin_match.group()
+        Returns the first email, phone, LinkedIn, GitHub and portfolio URL,
+        plus every distinct email, phone and portfolio URL found.
+        """
+        text = text or ''
+        found = {'email': [], 'phone': [], 'linkedin': [], 'github': [], 'url': []}
+        position = 0
         
-        # Extract GitHub
-        github_match = re.search(ContactExtractor.GITHUB_REGEX, text, re.IGNORECASE)
-        if github_match:
-            contact['github_url'] = github_match.group()
+        while True:
+            match = ContactExtractor.SCANNER.search(text, position)
+            if match is None:
+                break
+            start, end = match.span()
+            position = end
+            kind = match.lastgroup
+            
+            if kind == 'email':
+                local = ContactExtractor.EMAIL_LOCAL_REGEX.search(text, max(0, start - 64), start)
+                domain = ContactExtractor.EMAIL_DOMAIN_REGEX.match(text, end)
+                if local and domain:
+                    ContactExtractor._add(found['email'], text[local.start():domain.end()])
+                    position = domain.end()
+            
+            elif kind == 'phone':
+                for phone in ContactExtractor.PHONE_REGEX.finditer(text, start, end):
+                    ContactExtractor._add(found['phone'], phone.group().strip())
+            
+            else:
+                # URL: consume the rest of it so nothing inside is re-scanned
+                position = ContactExtractor.URL_TAIL_REGEX.match(text, end).end()
+                url = text[start:position].rstrip('.,;:')
+                profile = ContactExtractor.LINKEDIN_REGEX.match(url)
+                if profile:
+                    ContactExtractor._add(found['linkedin'], profile.group())
+                    continue
+                profile = ContactExtractor.GITHUB_REGEX.match(url)
+                if profile:
+                    ContactExtractor._add(found['github'], profile.group())
+                    continue
+                if kind in ('http', 'www'):
+                    ContactExtractor._add(found['url'], url)
         
-        return contact
+        return {
+            'email': found['email'][0] if found['email'] else '',
+            'phone': found['phone'][0] if found['phone'] else '',
+            'linkedin_url': found['linkedin'][0] if found['linkedin'] else '',
+            'github_url': found['github'][0] if found['github'] else '',
+            'portfolio_url': found['url'][0] if found['url'] else '',
+            'emails': found['email'],
+            'phones': found['phone'],
+            'portfolio_urls': found['url'],
+        }
 
 
 class SkillExtractor:
@@ -173,70 +284,55 @@ class SkillExtractor:
         'Attention to Detail', 'Collaboration', 'Mentoring', 'Public Speaking',
     ]
     
+    @staticmethod
+    def confidence(category: str, frequency: int) -> int:
+        """Confidence from how often a skill is mentioned"""
+        if category == 'Soft':
+            return min(100, 40 + frequency * 15)
+        return min(100, 50 + frequency * 10)
+    
     @staticmethod
     def extract(text: str, cv: CV) -> List[CVSkill]:
-        """Extract skills from CV text"""
-        skills_found = []
-        text_lower = text.lower()
-        
-        # Check for tech skills
-        for skill_name in SkillExtractor.TECH_SKILLS:
-            if skill_name.lower() in text_lower:
-                # Get or create skill
-                skill, created = Skill.objects.get_or_create(
-                    name=skill_name,
-                    defaults={'category': 'Technical'}
-                )
-                
-                # Calculate confidence based on frequency
-                frequency = text_lower.count(skill_name.lower())
-                confidence = min(100, 50 + frequency * 10)
-                
-                # Create CV skill
-                cv_skill, created = CVSkill.objects.get_or_create(
-                    cv=cv,
-                    skill=skill,
-                    defaults={
-                        'confidence': confidence,
-                        'context': SkillExtractor._extract_context(text, skill_name)
-                    }
-                )
-                
-                if created:
-                    skills_found.append(cv_skill)
-        
-        # Check for soft skills
-        for skill_name in SkillExtractor.SOFT_SKILLS:
-            if skill_name.lower() in text_lower:
-                skill, created = Skill.objects.get_or_create(
-                    name=skill_name,
-                    defaults={'category': 'Soft'}
-                )
-                
-                frequency = text_lower.count(skill_name.lower())
-                confidence = min(100, 40 + frequency * 15)
-                
-                cv_skill, created = CVSkill.objects.get_or_create(
-                    cv=cv,
-                    skill=skill,
-                    defaults={
-                        'confidence': confidence,
-                        'context': SkillExtractor._extract_context(text, skill_name)
-                    }
-                )
-                
-                if created:
-                    skills_found.append(cv_skill)
+        """
+        Extract skills from CV text (single pass over the text)
+        Skills are resolved and CV skills inserted in bulk; returns the new CVSkill rows
+        """
+        from .skill_matcher import get_skill_matcher
+        
+        matches = get_skill_matcher().find(text)
+        if not matches:
+            return []
+        
+        # Resolve skill ids: one lookup, one insert for unknown skills, one re-read
+        skills = {skill.name: skill for skill in Skill.objects.filter(name__in=list(matches))}
+        missing = [
+            Skill(name=match.name, category=match.category)
+            for match in matches.values() if match.name not in skills
+        ]
+        if missing:
+            Skill.objects.bulk_create(missing, ignore_conflicts=True)
+            skills.update(
+                (skill.name, skill)
+                for skill in Skill.objects.filter(name__in=[skill.name for skill in missing])
+            )
+        
+        existing = set(
+            CVSkill.objects.filter(cv=cv, skill__in=list(skills.values())).values_list('skill_id', flat=True)
+        )
+        skills_found = [
+            CVSkill(
+                cv=cv,
+                skill=skills[match.name],
+                confidence=SkillExtractor.confidence(skills[match.name].category, match.count),
+                context=match.context(text)
+            )
+            for match in matches.values()
+            if match.name in skills and skills[match.name].id not in existing
+        ]
+        CVSkill.objects.bulk_create(skills_found, ignore_conflicts=True)
+        SkillStatsService.record_cv_skills(cv.tenant_id, skills_found)
         
         return skills_found
-    
-    @staticmethod
-    def _extract_context(text: str, skill: str) -> str:
-        """Extract context around skill mention"""
-        # Find the skill in text and grab surrounding words
-        pattern = r'(.{0,50}' + re.escape(skill) + r'.{0,50})'
-        match = re.search(pattern, text, re.IGNORECASE)
-        return match.group(0) if match else ''
 
 
 class ExperienceExtractor:
@@ -247,23 +343,17 @@ class ExperienceExtractor:
         """Extract work experience using pattern matching"""
         experiences = []
         
-        # Split text into lines
-        lines = text.split('\n')
-        
-        # Find experience section
-        exp_section_start = None
-        for i, line in enumerate(lines):
-            if re.search(r'\b(experience|employment|work history)\b', line, re.IGNORECASE):
-                exp_section_start = i
-                break
-        
-        if exp_section_start is None:
+        # Only the experience section is scanned
+        section = SectionSegmenter.find(
+            text, SectionSegmenter.index_for(text, cv.section_offsets), 'experience'
+        )
+        if not section:
             return experiences
         
         # Extract experience entries (simplified)
         # In production, use more sophisticated NLP
         current_exp = {}
-        for line in lines[exp_section_start:]:
+        for line in section.split('\n'):
             # Check for company/position pattern
             if re.search(r'\b(at|@)\b', line, re.IGNORECASE) and len(line) < 200:
                 if current_exp:
@@ -299,12 +389,14 @@ class ExperienceExtractor:
         if current_exp:
             experiences.append(ExperienceExtractor._create_experience(cv, current_exp))
         
+        # Insert all entries at once
+        Experience.objects.bulk_create(experiences)
         return experiences
     
     @staticmethod
     def _create_experience(cv: CV, data: Dict) -> Experience:
-        """Create Experience object"""
-        return Experience.objects.create(
+        """Build an (unsaved) Experience object"""
+        experience = Experience(
             cv=cv,
             company=data.get('company', 'Unknown'),
             position=data.get('position', 'Unknown'),
@@ -313,6 +405,8 @@ class ExperienceExtractor:
             is_current=data.get('is_current', False),
             description=data.get('description', '')
         )
+        experience.calculate_duration()
+        return experience
 
 
 class CVAnalyzer:
@@ -348,6 +442,7 @@ class CVAnalyzer:
                 'phone': contact.get('phone', ''),
                 'linkedin_url': contact.get('linkedin_url', ''),
                 'github_url': contact.get('github_url', ''),
+                'portfolio_url': contact.get('portfolio_url', '')[:200],
                 'total_years_experience': total_years,
                 'highest_degree': highest_degree,
                 **scores,
@@ -391,9 +486,9 @@ class CVAnalyzer:
             scores['skills_score'] = int((avg_confidence * 0.5) + skill_count_score)
         
         # Formatting score (based on text structure)
-        text = cv.raw_text
+        index = SectionSegmenter.index_for(cv.raw_text, cv.section_offsets)
         sections = ['experience', 'education', 'skills']
-        found_sections = sum(1 for s in sections if s in text.lower())
+        found_sections = sum(1 for s in sections if SectionSegmenter.has_section(cv.raw_text, index, s))
         scores['formatting_score'] = int((found_sections / len(sections)) * 100)
         
         # Overall score (weighted average)
@@ -492,21 +587,28 @@ class CVProcessingService:
             cv.status = 'processing'
             cv.save()
             
-            # 1. Extract text
-            file_path = cv.file.path
-            raw_text = CVParser.extract_text(file_path, cv.file_type)
+            # 1. Extract text and section offsets (parsed once per file contents, reused on reprocess)
+            parsed = ParsedDocumentStore.get_or_parse(cv)
+            raw_text = parsed.text
             cv.raw_text = raw_text
+            cv.section_offsets = parsed.section_offsets
             cv.save()
             
-            # 2. Extract skills
-            SkillExtractor.extract(raw_text, cv)
+            # 2-3. Extract skills and experience (bulk inserts, one transaction)
+            with transaction.atomic():
+                SkillExtractor.extract(raw_text, cv)
+                ExperienceExtractor.extract(raw_text, cv)
             
-            # 3. Extract experience
-            ExperienceExtractor.extract(raw_text, cv)
+            # Bulk inserts skip the signals that maintain the skill index and response caches
+            schedule_cv_refresh(cv.tenant_id, [cv.id])
+            invalidate_responses(None, 'skills')
             
             # 4. Analyze
             analysis = CVAnalyzer.analyze(cv)
             
+            # 5. Semantic index (encoded in the background)
+            schedule_embedding('cv', [cv.id])
+            
             logger.info(f"Successfully processed CV {cv.id}")
             return analysis
         
@@ -526,28 +628,43 @@ class CVAnalysisService:
     def __init__(self):
         self.ollama_url = getattr(settings, 'OLLAMA_API_URL', 'http://ollama:11434')
         self.model_name = "llama3.1:8b"
+        self.llama_options = {
+            "temperature": 0.0,
+            "top_p": 0.1,
+            "seed": 42,
+        }
+        self.llm_cache = LLMResponseCache()
     
-    def call_llama(self, messages: List[dict]) -> str:
+    def call_llama(self, messages: List[dict], use_cache: bool = True) -> str:
         """Call Llama 3.1 via Ollama API with deterministic settings"""
-        import requests
+        if use_cache:
+            cached = self.llm_cache.get(self.model_name, messages, self.llama_options)
+            if cached is not None:
+                return cached
+        
         payload = {
             "model": self.model_name,
             "messages": messages,
             "stream": False,
-            "options": {
-                "temperature": 0.0,
-                "top_p": 0.1,
-                "seed": 42,
-            }
+            "options": self.llama_options,
         }
         try:
-            resp = requests.post(f"{self.ollama_url}/api/chat", json=payload, timeout=500)
+            resp = get_gateway().post(
+                f"{self.ollama_url}/api/chat",
+                endpoint='ollama.chat',
+                json=payload,
+                timeout=500
+            )
             resp.raise_for_status()
             data = resp.json()
-            return data.get("message", {}).get("content", "")
+            content = data.get("message", {}).get("content", "")
         except Exception as e:
             logger.error(f"Llama API error: {e}")
             raise
+        
+        if use_cache:
+            self.llm_cache.set(self.model_name, messages, self.llama_options, content)
+        return content
     
     def extract_json_from_llm(self, text: str) -> dict:
         """Extract JSON from LLM output"""
@@ -565,7 +682,7 @@ class CVAnalysisService:
         except Exception:
             return {}
     
-    def calculate_ats_score(self, cv_text: str) -> dict:
+    def calculate_ats_score(self, cv_text: str, sections: Optional[dict] = None) -> dict:
         """
         Calculate ATS compatibility score using Llama 3.1
         Returns comprehensive ATS analysis with score, keywords, and suggestions
@@ -630,7 +747,9 @@ Respond in this EXACT JSON format:
             
             if not result:
                 logger.warning("Failed to parse Llama response, using fallback")
-                return self._basic_ats_score(cv_text)
+                # Don't keep serving an unusable answer from the cache
+                self.llm_cache.delete(self.model_name, messages, self.llama_options)
+                return self._basic_ats_score(cv_text, sections)
             
             # Normalize response format
             return {
@@ -648,28 +767,29 @@ Respond in this EXACT JSON format:
             
         except Exception as e:
             logger.error(f"Llama ATS analysis error: {e}")
-            return self._basic_ats_score(cv_text)
+            return self._basic_ats_score(cv_text, sections)
     
-    def _basic_ats_score(self, cv_text: str) -> dict:
+    def _basic_ats_score(self, cv_text: str, sections: Optional[dict] = None) -> dict:
         """Basic ATS scoring without AI"""
         score = 50
         keyword_matches = []
         missing_keywords = []
+        sections = SectionSegmenter.index_for(cv_text, sections)
         
         # Check for basic sections
-        if 'experience' in cv_text.lower() or 'work history' in cv_text.lower():
+        if SectionSegmenter.has_section(cv_text, sections, 'experience'):
             score += 15
             keyword_matches.append("Experience section")
         else:
             missing_keywords.append("Experience section")
         
-        if 'education' in cv_text.lower():
+        if SectionSegmenter.has_section(cv_text, sections, 'education'):
             score += 10
             keyword_matches.append("Education section")
         else:
             missing_keywords.append("Education section")
         
-        if 'skills' in cv_text.lower():
+        if SectionSegmenter.has_section(cv_text, sections, 'skills'):
             score += 15
             keyword_matches.append("Skills section")
         else:
@@ -685,7 +805,8 @@ Respond in this EXACT JSON format:
         
         # Look for common technical keywords
         tech_keywords = ['python', 'java', 'javascript', 'react', 'node', 'sql', 'aws', 'docker', 'git']
-        found_tech = [kw for kw in tech_keywords if kw in cv_text.lower()]
+        cv_lower = cv_text.lower()
+        found_tech = [kw for kw in tech_keywords if kw in cv_lower]
         keyword_matches.extend(found_tech[:5])
         
         return {
@@ -738,13 +859,21 @@ Respond in JSON format:
 }}
 """
             
-            response = openai_client.chat.completions.create(
-                model="gpt-4",
-                messages=[{"role": "user", "content": prompt}],
-                temperature=0.3
-            )
+            messages = [{"role": "user", "content": prompt}]
+            options = {"temperature": 0.3}
+            
+            content = self.llm_cache.get("gpt-4", messages, options)
+            if content is None:
+                response = openai_client.chat.completions.create(
+                    model="gpt-4",
+                    messages=messages,
+                    **options
+                )
+                content = response.choices[0].message.content
             
-            result = json.loads(response.choices[0].message.content)
+            result = json.loads(content)
+            # Only cache answers that parsed cleanly
+            self.llm_cache.set("gpt-4", messages, options, content)
             return result
             
         except Exception as e:
@@ -807,11 +936,13 @@ Summarize the work experience from this CV in 2-3 sentences:
         except:
             return "Unable to generate experience summary."
     
-    def summarize_education(self, cv_text: str) -> str:
+    def summarize_education(self, cv_text: str, sections: Optional[dict] = None) -> str:
         """Summarize education"""
-        # Simple pattern matching for degrees
+        # Simple pattern matching for degrees, within the education section when there is one
+        education = SectionSegmenter.find(cv_text, SectionSegmenter.index_for(cv_text, sections), 'education')
+        education = (education or cv_text).lower()
         degrees = ['bachelor', 'master', 'phd', 'doctorate', 'mba', 'associate']
-        found = [d for d in degrees if d in cv_text.lower()]
+        found = [d for d in degrees if d in education]
         if found:
             return f"Education includes: {', '.join(found).title()}"
         return "Education details not clearly identified."
@@ -841,8 +972,7 @@ Summarize the work experience from this CV in 2-3 sentences:
             return self._basic_advanced_analysis(cv_text)
         
         try:
-            from openai import OpenAI
-            client = OpenAI(api_key=api_key)
+            client = get_openai_client()
             
             prompt = f"""
 You are an expert career consultant and CV specialist. Perform a comprehensive analysis of this CV.
@@ -934,6 +1064,48 @@ Be specific, actionable, and professional. Use real examples from the CV.
             ]
         }
 
+    def _build_chat_messages(self, cv_text: str, user_message: str, analysis) -> List[dict]:
+        """Build the Ollama chat messages: system context, recent history, new question"""
+        # Get previous chat messages for context
+        previous_messages = []
+        for msg in analysis.chat_messages.order_by('created_at')[:10]:
+            previous_messages.append({
+                "role": msg.role,
+                "content": msg.content
+            })
+        
+        # Build context from analysis
+        context_parts = []
+        context_parts.append(f"Full Analysis: {analysis.full_analysis}")
+        
+        if analysis.strengths:
+            context_parts.append(f"Strengths: {', '.join(analysis.strengths[:5])}")
+        
+        if analysis.weaknesses:
+            context_parts.append(f"Weaknesses: {', '.join(analysis.weaknesses[:3])}")
+        
+        system_prompt = f"""You are an expert CV consultant AI. You have analyzed the user's CV and are helping them improve it.
+
+Analysis Context:
+{chr(10).join(context_parts)}
+
+CV Excerpt (first 1500 chars):
+{cv_text[:1500]}
+
+Provide helpful, specific, and actionable advice. Be conversational and supportive."""
+        
+        # Build conversation history
+        messages = []
+        if previous_messages:
+            for msg in previous_messages[-5:]:  # Last 5 messages for context
+                messages.append(msg)
+        
+        return [
+            {"role": "system", "content": system_prompt}
+        ] + messages + [
+            {"role": "user", "content": user_message}
+        ]
+    
     def chat_about_cv_llama(self, cv_text: str, user_message: str, analysis) -> str:
         """
         Chat with Llama 3.1 about CV (via Ollama)
@@ -945,48 +1117,10 @@ Be specific, actionable, and professional. Use real examples from the CV.
             # Check if Ollama is running
             ollama_url = os.getenv('OLLAMA_API_URL', 'http://localhost:11434')
             
-            # Get previous chat messages for context
-            previous_messages = []
-            for msg in analysis.chat_messages.order_by('created_at')[:10]:
-                previous_messages.append({
-                    "role": msg.role,
-                    "content": msg.content
-                })
-            
-            # Build context from analysis
-            context_parts = []
-            context_parts.append(f"Full Analysis: {analysis.full_analysis}")
-            
-            if analysis.strengths:
-                context_parts.append(f"Strengths: {', '.join(analysis.strengths[:5])}")
-            
-            if analysis.weaknesses:
-                context_parts.append(f"Weaknesses: {', '.join(analysis.weaknesses[:3])}")
-            
-            system_prompt = f"""You are an expert CV consultant AI. You have analyzed the user's CV and are helping them improve it.
-
-Analysis Context:
-{chr(10).join(context_parts)}
-
-CV Excerpt (first 1500 chars):
-{cv_text[:1500]}
-
-Provide helpful, specific, and actionable advice. Be conversational and supportive."""
-            
-            # Build conversation history
-            messages = []
-            if previous_messages:
-                for msg in previous_messages[-5:]:  # Last 5 messages for context
-                    messages.append(msg)
-            
             # Prepare Ollama request
             payload = {
                 "model": "llama3.1",
-                "messages": [
-                    {"role": "system", "content": system_prompt}
-                ] + messages + [
-                    {"role": "user", "content": user_message}
-                ],
+                "messages": self._build_chat_messages(cv_text, user_message, analysis),
                 "stream": False,
                 "options": {
                     "temperature": 0.7,
@@ -994,8 +1128,9 @@ Provide helpful, specific, and actionable advice. Be conversational and supporti
                 }
             }
             
-            response = requests.post(
+            response = get_gateway().post(
                 f"{ollama_url}/api/chat",
+                endpoint='ollama.chat',
                 json=payload,
                 timeout=30
             )
@@ -1014,6 +1149,55 @@ Provide helpful, specific, and actionable advice. Be conversational and supporti
             logger.error(f"Llama chat error: {e}")
             return self._fallback_chat_response(user_message)
     
+    def stream_chat_about_cv_llama(self, cv_text: str, user_message: str, analysis) -> Iterator[str]:
+        """
+        Streaming variant of chat_about_cv_llama
+        Yields response tokens as Ollama produces them
+        """
+        import requests
+        
+        ollama_url = os.getenv('OLLAMA_API_URL', 'http://localhost:11434')
+        payload = {
+            "model": "llama3.1",
+            "messages": self._build_chat_messages(cv_text, user_message, analysis),
+            "stream": True,
+            "options": {
+                "temperature": 0.7,
+                "num_predict": 500
+            }
+        }
+        
+        streamed_any = False
+        try:
+            with get_gateway().post(
+                f"{ollama_url}/api/chat",
+                endpoint='ollama.chat_stream',
+                json=payload,
+                stream=True,
+                timeout=30  # max gap between tokens
+            ) as response:
+                if response.status_code != 200:
+                    logger.error(f"Ollama API error: {response.status_code}")
+                else:
+                    for chunk in iter_ndjson(response):
+                        token = chunk.get('message', {}).get('content', '')
+                        if token:
+                            streamed_any = True
+                            yield token
+                        if chunk.get('done'):
+                            break
+        except requests.exceptions.ConnectionError:
+            if not streamed_any:
+                logger.warning("Ollama not available, using fallback")
+                yield "Llama 3.1 chatbot is currently unavailable. Please ensure Ollama is running with `ollama run llama3.1`"
+                return
+            logger.error("Ollama stream interrupted")
+        except Exception as e:
+            logger.error(f"Llama chat stream error: {e}")
+        
+        if not streamed_any:
+            yield self._fallback_chat_response(user_message)
+    
     def _fallback_chat_response(self, user_message: str) -> str:
         """Fallback response when AI chat is unavailable"""
         responses = {
@@ -0,0 +1,113 @@
+"""
+Signal handlers keeping the skill bitset index, semantic embedding index,
+skill matcher, skill rollups and cached statistics/history responses in
+sync with the database. Bulk writes bypass signals and refresh explicitly.
+"""
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from apps.core.response_cache import invalidate_responses
+from .models import (
+    CV, CVAnalysis, CVSkill, JobPosting, JobSkill, Skill,
+    JobMatch, ATSAnalysis, CVJobMatch, AdvancedCVAnalysis
+)
+from .skill_index import schedule_job_refresh, schedule_cv_refresh
+from .skill_matcher import invalidate_skill_matcher
+from .embeddings import schedule_embedding, schedule_embedding_removal
+from .skill_stats import SkillStatsService
+
+
+def _row_delta(kwargs) -> int:
+    """+1 for an inserted row, -1 for a deleted one, 0 for an update"""
+    if kwargs['signal'] is post_delete:
+        return -1
+    return 1 if kwargs.get('created') else 0
+
+
+@receiver([post_save, post_delete], sender=JobPosting)
+def job_posting_changed(sender, instance, **kwargs):
+    schedule_job_refresh(instance.tenant_id, [instance.id])
+
+
+@receiver(post_save, sender=JobPosting)
+def job_posting_saved(sender, instance, **kwargs):
+    schedule_embedding('job', [instance.id])
+
+
+@receiver(post_delete, sender=JobPosting)
+def job_posting_deleted(sender, instance, **kwargs):
+    schedule_embedding_removal(instance.tenant_id, 'job', [instance.id])
+
+
+@receiver([post_save, post_delete], sender=JobSkill)
+def job_skill_changed(sender, instance, **kwargs):
+    tenant_id = JobPosting.objects.filter(id=instance.job_id).values_list('tenant_id', flat=True).first()
+    if tenant_id is not None:
+        schedule_job_refresh(tenant_id, [instance.job_id])
+        invalidate_responses(tenant_id, 'jobs')
+        sign = _row_delta(kwargs)
+        if sign:
+            SkillStatsService.record_job_skills(tenant_id, [instance.skill_id], sign)
+
+
+@receiver(post_delete, sender=CV)
+def cv_deleted(sender, instance, **kwargs):
+    schedule_cv_refresh(instance.tenant_id, [instance.id])
+    schedule_embedding_removal(instance.tenant_id, 'cv', [instance.id])
+
+
+@receiver([post_save, post_delete], sender=CVSkill)
+def cv_skill_changed(sender, instance, **kwargs):
+    tenant_id = CV.objects.filter(id=instance.cv_id).values_list('tenant_id', flat=True).first()
+    if tenant_id is not None:
+        schedule_cv_refresh(tenant_id, [instance.cv_id])
+        invalidate_responses(tenant_id, 'cvs')
+        sign = _row_delta(kwargs)
+        if sign:
+            SkillStatsService.record_cv_skills(tenant_id, [instance], sign)
+    invalidate_responses(None, 'skills')
+
+
+@receiver([post_save, post_delete], sender=Skill)
+def skill_changed(sender, instance, **kwargs):
+    invalidate_skill_matcher()
+    invalidate_responses(None, 'skills')
+
+
+@receiver([post_save, post_delete], sender=CV)
+def cv_changed(sender, instance, **kwargs):
+    # ATS, CV-match and advanced history responses embed the CV's serialized data
+    invalidate_responses(instance.tenant_id, 'cvs', 'ats', 'cv_matches', 'advanced')
+
+
+@receiver([post_save, post_delete], sender=CVAnalysis)
+def cv_analysis_changed(sender, instance, **kwargs):
+    tenant_id = CV.objects.filter(id=instance.cv_id).values_list('tenant_id', flat=True).first()
+    if tenant_id is not None:
+        invalidate_responses(tenant_id, 'cvs')
+
+
+@receiver([post_save, post_delete], sender=JobPosting)
+def job_posting_stats_changed(sender, instance, **kwargs):
+    invalidate_responses(instance.tenant_id, 'jobs')
+
+
+@receiver([post_save, post_delete], sender=JobMatch)
+def job_match_changed(sender, instance, **kwargs):
+    tenant_id = JobPosting.objects.filter(id=instance.job_id).values_list('tenant_id', flat=True).first()
+    if tenant_id is not None:
+        invalidate_responses(tenant_id, 'jobs')
+
+
+@receiver([post_save, post_delete], sender=ATSAnalysis)
+def ats_analysis_changed(sender, instance, **kwargs):
+    invalidate_responses(instance.tenant_id, 'ats')
+
+
+@receiver([post_save, post_delete], sender=CVJobMatch)
+def cv_job_match_changed(sender, instance, **kwargs):
+    invalidate_responses(instance.tenant_id, 'cv_matches')
+
+
+@receiver([post_save, post_delete], sender=AdvancedCVAnalysis)
+def advanced_analysis_changed(sender, instance, **kwargs):
+    invalidate_responses(instance.tenant_id, 'advanced')
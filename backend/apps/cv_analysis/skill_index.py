@@ -0,0 +1,372 @@
+"""
+Per-tenant skill bitset index for fast CV <-> job ranking.
+
+Every Skill gets a dense bit position. Each active JobPosting is stored as
+two packed bit vectors (required and preferred skills) and each CV as one
+(its CVSkills). Vectors live in Redis hashes so all workers share them, and
+are updated incrementally by signals (see signals.py) or explicit refresh
+calls after bulk writes. Ranking ANDs the vectors and popcounts the result,
+scoring with the same skills formula as JobMatchingService.
+"""
+import logging
+import threading
+from typing import Dict, Iterable, List
+import numpy as np
+from django.db import transaction
+from .models import CV, CVSkill, JobPosting, JobSkill, Skill
+from apps.core.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+# Set bits per byte value
+POPCOUNT = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+
+def popcount_rows(matrix: np.ndarray) -> np.ndarray:
+    """Number of set bits in each row of a packed uint8 matrix"""
+    if matrix.size == 0:
+        return np.zeros(matrix.shape[0], dtype=np.int64)
+    return POPCOUNT[matrix].sum(axis=1, dtype=np.int64)
+
+
+class SkillBitsetIndex:
+    """Packed skill bit vectors for one tenant's active jobs and CVs"""
+
+    BITS_KEY = 'skill_index:bits'
+    NEXT_BIT_KEY = 'skill_index:next_bit'
+
+    # Process-local decoded matrices: tenant_id -> (version, data)
+    _local: Dict[int, tuple] = {}
+    _local_lock = threading.Lock()
+
+    def __init__(self, tenant_id: int):
+        self.tenant_id = tenant_id
+        prefix = f"skill_index:{tenant_id}"
+        self.job_required_key = f"{prefix}:job_required"
+        self.job_preferred_key = f"{prefix}:job_preferred"
+        self.cv_key = f"{prefix}:cv"
+        self.version_key = f"{prefix}:version"
+        self.built_key = f"{prefix}:built"
+
+    # Skill bit positions -------------------------------------------------
+
+    @staticmethod
+    def local_skill_bits(skill_ids: Iterable[int]) -> Dict[int, int]:
+        """Bit positions that need no Redis (the skill id), for indexes computed in-process"""
+        return {skill_id: skill_id for skill_id in set(skill_ids)}
+
+    @classmethod
+    def skill_bits(cls, skill_ids: Iterable[int]) -> Dict[int, int]:
+        """Bit position for each skill id, allocating new positions as needed"""
+        skill_ids = sorted(set(skill_ids))
+        client = get_redis()
+        if client is None:
+            return cls.local_skill_bits(skill_ids)
+        if not skill_ids:
+            return {}
+
+        values = client.hmget(cls.BITS_KEY, skill_ids)
+        bits = {skill_id: int(value) for skill_id, value in zip(skill_ids, values) if value is not None}
+
+        for skill_id in skill_ids:
+            if skill_id in bits:
+                continue
+            candidate = client.incr(cls.NEXT_BIT_KEY) - 1
+            if not client.hsetnx(cls.BITS_KEY, skill_id, candidate):
+                # Another worker allocated it first; its position wins
+                candidate = int(client.hget(cls.BITS_KEY, skill_id))
+            bits[skill_id] = candidate
+        return bits
+
+    @staticmethod
+    def pack(bit_positions: Iterable[int]) -> bytes:
+        """Packed little-endian bit vector with the given positions set"""
+        positions = list(bit_positions)
+        if not positions:
+            return b''
+        bits = np.zeros(max(positions) + 1, dtype=bool)
+        bits[positions] = True
+        return np.packbits(bits, bitorder='little').tobytes()
+
+    # Building and incremental updates -------------------------------------
+
+    def _job_vectors(self, job_ids: List[int], local: bool = False) -> Dict[int, tuple]:
+        """(required, preferred) packed vectors for the given jobs (local: in-process bit positions)"""
+        rows = list(
+            JobSkill.objects.filter(
+                job_id__in=job_ids,
+                requirement_level__in=['required', 'preferred']
+            ).values_list('job_id', 'skill_id', 'requirement_level')
+        )
+        bits = (self.local_skill_bits if local else self.skill_bits)(skill_id for _, skill_id, _ in rows)
+
+        required = {job_id: [] for job_id in job_ids}
+        preferred = {job_id: [] for job_id in job_ids}
+        for job_id, skill_id, level in rows:
+            (required if level == 'required' else preferred)[job_id].append(bits[skill_id])
+        return {job_id: (self.pack(required[job_id]), self.pack(preferred[job_id])) for job_id in job_ids}
+
+    def _cv_vectors(self, cv_ids: List[int], local: bool = False) -> Dict[int, bytes]:
+        """Packed skill vectors for the given CVs (local: in-process bit positions)"""
+        rows = list(CVSkill.objects.filter(cv_id__in=cv_ids).values_list('cv_id', 'skill_id'))
+        bits = (self.local_skill_bits if local else self.skill_bits)(skill_id for _, skill_id in rows)
+
+        skills = {cv_id: [] for cv_id in cv_ids}
+        for cv_id, skill_id in rows:
+            skills[cv_id].append(bits[skill_id])
+        return {cv_id: self.pack(positions) for cv_id, positions in skills.items()}
+
+    def build(self) -> None:
+        """Rebuild the tenant's index from the database"""
+        client = get_redis()
+        if client is None:
+            return
+
+        # Allocate bits in Skill id order so the initial mapping is dense
+        self.skill_bits(Skill.objects.order_by('id').values_list('id', flat=True))
+
+        job_ids = list(JobPosting.objects.filter(tenant_id=self.tenant_id, status='active').values_list('id', flat=True))
+        cv_ids = list(CV.objects.filter(tenant_id=self.tenant_id).values_list('id', flat=True))
+        job_vectors = self._job_vectors(job_ids)
+        cv_vectors = self._cv_vectors(cv_ids)
+
+        pipe = client.pipeline()
+        pipe.delete(self.job_required_key, self.job_preferred_key, self.cv_key)
+        if job_vectors:
+            pipe.hset(self.job_required_key, mapping={job_id: v[0] for job_id, v in job_vectors.items()})
+            pipe.hset(self.job_preferred_key, mapping={job_id: v[1] for job_id, v in job_vectors.items()})
+        if cv_vectors:
+            pipe.hset(self.cv_key, mapping=cv_vectors)
+        pipe.set(self.built_key, 1)
+        pipe.incr(self.version_key)
+        pipe.execute()
+        logger.info(f"Built skill index for tenant {self.tenant_id}: {len(job_ids)} jobs, {len(cv_ids)} CVs")
+
+    def refresh_jobs(self, job_ids: Iterable[int]) -> None:
+        """Re-index jobs after their skills or status changed"""
+        client = get_redis()
+        if client is None or not client.exists(self.built_key):
+            return
+
+        job_ids = list(job_ids)
+        active_ids = list(
+            JobPosting.objects.filter(id__in=job_ids, tenant_id=self.tenant_id, status='active').values_list('id', flat=True)
+        )
+        inactive_ids = list(set(job_ids) - set(active_ids))
+        job_vectors = self._job_vectors(active_ids)
+
+        pipe = client.pipeline()
+        if job_vectors:
+            pipe.hset(self.job_required_key, mapping={job_id: v[0] for job_id, v in job_vectors.items()})
+            pipe.hset(self.job_preferred_key, mapping={job_id: v[1] for job_id, v in job_vectors.items()})
+        if inactive_ids:
+            pipe.hdel(self.job_required_key, *inactive_ids)
+            pipe.hdel(self.job_preferred_key, *inactive_ids)
+        pipe.incr(self.version_key)
+        pipe.execute()
+
+    def refresh_cvs(self, cv_ids: Iterable[int]) -> None:
+        """Re-index CVs after their skills changed"""
+        client = get_redis()
+        if client is None or not client.exists(self.built_key):
+            return
+
+        cv_ids = list(cv_ids)
+        existing_ids = list(CV.objects.filter(id__in=cv_ids, tenant_id=self.tenant_id).values_list('id', flat=True))
+        removed_ids = list(set(cv_ids) - set(existing_ids))
+        cv_vectors = self._cv_vectors(existing_ids)
+
+        pipe = client.pipeline()
+        if cv_vectors:
+            pipe.hset(self.cv_key, mapping=cv_vectors)
+        if removed_ids:
+            pipe.hdel(self.cv_key, *removed_ids)
+        pipe.incr(self.version_key)
+        pipe.execute()
+
+    # Loading and ranking --------------------------------------------------
+
+    @staticmethod
+    def _to_matrix(vectors: List[bytes], width: int) -> np.ndarray:
+        matrix = np.zeros((len(vectors), width), dtype=np.uint8)
+        for row, vector in enumerate(vectors):
+            matrix[row, :len(vector)] = np.frombuffer(vector, dtype=np.uint8)
+        return matrix
+
+    def _decode(self, job_required: Dict, job_preferred: Dict, cvs: Dict, local: bool = False) -> dict:
+        width = max([len(v) for v in list(job_required.values()) + list(job_preferred.values()) + list(cvs.values())] or [0])
+        job_ids = sorted(job_required)
+        cv_ids = sorted(cvs)
+
+        required = self._to_matrix([job_required[j] for j in job_ids], width)
+        preferred = self._to_matrix([job_preferred.get(j, b'') for j in job_ids], width)
+        return {
+            'job_ids': np.array(job_ids, dtype=np.int64),
+            'job_required': required,
+            'job_preferred': preferred,
+            'job_required_counts': popcount_rows(required),
+            'job_preferred_counts': popcount_rows(preferred),
+            'cv_ids': np.array(cv_ids, dtype=np.int64),
+            'cv': self._to_matrix([cvs[c] for c in cv_ids], width),
+            # Bit positions of this data: in-process ones, or the shared Redis mapping
+            'local': local,
+        }
+
+    def _load_from_db(self) -> dict:
+        """Compute the index directly (never touching Redis) when Redis is unavailable"""
+        job_ids = list(JobPosting.objects.filter(tenant_id=self.tenant_id, status='active').values_list('id', flat=True))
+        cv_ids = list(CV.objects.filter(tenant_id=self.tenant_id).values_list('id', flat=True))
+        job_vectors = self._job_vectors(job_ids, local=True)
+        return self._decode(
+            {job_id: v[0] for job_id, v in job_vectors.items()},
+            {job_id: v[1] for job_id, v in job_vectors.items()},
+            self._cv_vectors(cv_ids, local=True),
+            local=True,
+        )
+
+    def load(self) -> dict:
+        """Decoded matrices for the tenant, reloaded only when the index version changes"""
+        client = get_redis()
+        if client is None:
+            return self._load_from_db()
+
+        try:
+            if not client.exists(self.built_key):
+                self.build()
+            version = int(client.get(self.version_key) or 0)
+
+            cached = self._local.get(self.tenant_id)
+            if cached and cached[0] == version:
+                return cached[1]
+
+            data = self._decode(*[
+                {int(key): value for key, value in client.hgetall(name).items()}
+                for name in (self.job_required_key, self.job_preferred_key, self.cv_key)
+            ])
+        except Exception as e:
+            logger.warning(f"Skill index unavailable, computing from database: {e}")
+            return self._load_from_db()
+        with self._local_lock:
+            self._local[self.tenant_id] = (version, data)
+        return data
+
+    @staticmethod
+    def _skills_score(matched_required, total_required, matched_preferred, total_preferred) -> np.ndarray:
+        """JobMatchingService skills score, vectorized"""
+        with np.errstate(divide='ignore', invalid='ignore'):
+            required_score = np.where(total_required > 0, matched_required / total_required * 80, 0)
+            preferred_score = np.where(total_preferred > 0, matched_preferred / total_preferred * 20, 0)
+        scores = np.floor(required_score + preferred_score).astype(np.int64)
+        return np.where((total_required == 0) & (total_preferred == 0), 70, scores)
+
+    @staticmethod
+    def _fit(vector: np.ndarray, width: int) -> np.ndarray:
+        fitted = np.zeros(width, dtype=np.uint8)
+        fitted[:min(width, len(vector))] = vector[:width]
+        return fitted
+
+    def _unindexed_vectors(self, data: dict, vectors, object_id: int):
+        """
+        Vectors of a document missing from the loaded data, with the data's
+        bit positions; if Redis fails meanwhile, both are recomputed locally.
+        """
+        try:
+            return data, vectors([object_id], local=data['local'])[object_id]
+        except Exception as e:
+            logger.warning(f"Skill index unavailable, computing from database: {e}")
+            return self._load_from_db(), vectors([object_id], local=True)[object_id]
+
+    def top_jobs_for_cv(self, cv_id: int, k: int = 20) -> List[Dict[str, int]]:
+        """Best active jobs for a CV by skills score"""
+        data = self.load()
+        if not len(data['job_ids']):
+            return []
+
+        rows = np.nonzero(data['cv_ids'] == cv_id)[0]
+        if len(rows):
+            cv_vector = data['cv'][rows[0]]
+        else:
+            data, vector = self._unindexed_vectors(data, self._cv_vectors, cv_id)
+            cv_vector = self._fit(np.frombuffer(vector, dtype=np.uint8), data['job_required'].shape[1])
+
+        matched_required = popcount_rows(data['job_required'] & cv_vector)
+        matched_preferred = popcount_rows(data['job_preferred'] & cv_vector)
+        scores = self._skills_score(
+            matched_required, data['job_required_counts'],
+            matched_preferred, data['job_preferred_counts']
+        )
+
+        top = np.argsort(-scores, kind='stable')[:k]
+        return [
+            {
+                'job_id': int(data['job_ids'][i]),
+                'skills_score': int(scores[i]),
+                'matched_required': int(matched_required[i]),
+                'total_required': int(data['job_required_counts'][i]),
+                'matched_preferred': int(matched_preferred[i]),
+                'total_preferred': int(data['job_preferred_counts'][i]),
+            }
+            for i in top
+        ]
+
+    def top_cvs_for_job(self, job_id: int, k: int = 20) -> List[Dict[str, int]]:
+        """Best CVs for a job by skills score"""
+        data = self.load()
+        if not len(data['cv_ids']):
+            return []
+
+        rows = np.nonzero(data['job_ids'] == job_id)[0]
+        if len(rows):
+            required = data['job_required'][rows[0]]
+            preferred = data['job_preferred'][rows[0]]
+        else:
+            data, vectors = self._unindexed_vectors(data, self._job_vectors, job_id)
+            required = np.frombuffer(vectors[0], dtype=np.uint8)
+            preferred = np.frombuffer(vectors[1], dtype=np.uint8)
+        width = data['cv'].shape[1]
+
+        # Count before fitting: skills no CV has still count as unmatched
+        total_required = int(POPCOUNT[required].sum())
+        total_preferred = int(POPCOUNT[preferred].sum())
+        required = self._fit(required, width)
+        preferred = self._fit(preferred, width)
+        matched_required = popcount_rows(data['cv'] & required)
+        matched_preferred = popcount_rows(data['cv'] & preferred)
+        scores = self._skills_score(matched_required, total_required, matched_preferred, total_preferred)
+
+        top = np.argsort(-scores, kind='stable')[:k]
+        return [
+            {
+                'cv_id': int(data['cv_ids'][i]),
+                'skills_score': int(scores[i]),
+                'matched_required': int(matched_required[i]),
+                'total_required': total_required,
+                'matched_preferred': int(matched_preferred[i]),
+                'total_preferred': total_preferred,
+            }
+            for i in top
+        ]
+
+
+def schedule_job_refresh(tenant_id: int, job_ids: Iterable[int]) -> None:
+    """Re-index jobs once the current transaction commits; failures are only logged"""
+    job_ids = list(job_ids)
+
+    def refresh():
+        try:
+            SkillBitsetIndex(tenant_id).refresh_jobs(job_ids)
+        except Exception as e:
+            logger.warning(f"Skill index job refresh failed: {e}")
+    transaction.on_commit(refresh)
+
+
+def schedule_cv_refresh(tenant_id: int, cv_ids: Iterable[int]) -> None:
+    """Re-index CVs once the current transaction commits; failures are only logged"""
+    cv_ids = list(cv_ids)
+
+    def refresh():
+        try:
+            SkillBitsetIndex(tenant_id).refresh_cvs(cv_ids)
+        except Exception as e:
+            logger.warning(f"Skill index CV refresh failed: {e}")
+    transaction.on_commit(refresh)
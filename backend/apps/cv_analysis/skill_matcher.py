@@ -0,0 +1,218 @@
+"""
+Single-pass multi-pattern skill matching (Aho-Corasick).
+
+All skill names and synonyms are compiled into one automaton, so a text is
+scanned once regardless of taxonomy size. Matches must sit on word
+boundaries ('R' does not match inside 'Research', 'Java' not inside
+'JavaScript'); patterns of one or two characters ('R', 'Go') are also
+case-sensitive, since lowercase they are ordinary words.
+"""
+import time
+import logging
+import threading
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple
+from django.conf import settings
+from .models import Skill
+from .services import SkillExtractor
+
+logger = logging.getLogger(__name__)
+
+# Patterns this short only match with their exact casing
+CASE_SENSITIVE_MAX_LEN = 2
+
+CONTEXT_CHARS = 50
+
+
+@dataclass
+class SkillMatch:
+    """All occurrences of one skill in a text"""
+    name: str
+    category: str
+    offsets: List[Tuple[int, int]] = field(default_factory=list)
+
+    @property
+    def count(self) -> int:
+        return len(self.offsets)
+
+    def context(self, text: str) -> str:
+        """Up to 50 characters either side of the first occurrence, within its line"""
+        start, end = self.offsets[0]
+        line_start = text.rfind('\n', 0, start) + 1
+        line_end = text.find('\n', end)
+        if line_end == -1:
+            line_end = len(text)
+        return text[max(line_start, start - CONTEXT_CHARS):min(line_end, end + CONTEXT_CHARS)]
+
+
+class SkillAutomaton:
+    """Aho-Corasick automaton over skill names and synonyms"""
+
+    def __init__(self, entries: Iterable[Tuple[str, str, str]]):
+        """
+        Args:
+            entries: (pattern, canonical skill name, category) triples
+        """
+        self.goto: List[Dict[str, int]] = [{}]
+        self.fail: List[int] = [0]
+        # Pattern ids ending at each node, and the nearest proper suffix node with output
+        self.out: List[List[int]] = [[]]
+        self.out_link: List[int] = [-1]
+        self.patterns: List[Tuple[str, str, str]] = []
+
+        seen = set()
+        for pattern, name, category in entries:
+            pattern = (pattern or '').strip()
+            if not pattern:
+                continue
+            key = pattern if len(pattern) <= CASE_SENSITIVE_MAX_LEN else pattern.lower()
+            if key in seen:
+                continue
+            seen.add(key)
+            self._add(pattern.lower(), len(self.patterns))
+            self.patterns.append((pattern, name, category))
+
+        self._build_links()
+
+    def __len__(self) -> int:
+        return len(self.patterns)
+
+    def _add(self, pattern: str, pattern_id: int) -> None:
+        node = 0
+        for char in pattern:
+            next_node = self.goto[node].get(char)
+            if next_node is None:
+                next_node = len(self.goto)
+                self.goto[node][char] = next_node
+                self.goto.append({})
+                self.fail.append(0)
+                self.out.append([])
+                self.out_link.append(-1)
+            node = next_node
+        self.out[node].append(pattern_id)
+
+    def _build_links(self) -> None:
+        queue = deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self.goto[node].items():
+                queue.append(child)
+                state = self.fail[node]
+                while state and char not in self.goto[state]:
+                    state = self.fail[state]
+                target = self.goto[state].get(char, 0)
+                self.fail[child] = target if target != child else 0
+                fail = self.fail[child]
+                self.out_link[child] = fail if self.out[fail] else self.out_link[fail]
+
+    @staticmethod
+    def _lower(text: str) -> str:
+        """Lowercase without changing string length, so offsets stay valid"""
+        lowered = text.lower()
+        if len(lowered) == len(text):
+            return lowered
+        return ''.join(c if len(c.lower()) != 1 else c.lower() for c in text)
+
+    def find(self, text: str) -> Dict[str, SkillMatch]:
+        """Word-boundary matches in one pass, grouped by canonical skill name"""
+        results: Dict[str, SkillMatch] = {}
+        if not text or not self.patterns:
+            return results
+
+        lowered = self._lower(text)
+        length = len(text)
+        goto, fail, out, out_link = self.goto, self.fail, self.out, self.out_link
+        node = 0
+
+        for index, char in enumerate(lowered):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+
+            state = node if out[node] else out_link[node]
+            while state > 0:
+                for pattern_id in out[state]:
+                    pattern, name, category = self.patterns[pattern_id]
+                    end = index + 1
+                    start = end - len(pattern)
+                    if not self._is_match(text, start, end, pattern, length):
+                        continue
+                    match = results.get(name)
+                    if match is None:
+                        match = results[name] = SkillMatch(name=name, category=category)
+                    match.offsets.append((start, end))
+                state = out_link[state]
+
+        return results
+
+    @staticmethod
+    def _is_match(text: str, start: int, end: int, pattern: str, length: int) -> bool:
+        if len(pattern) <= CASE_SENSITIVE_MAX_LEN and text[start:end] != pattern:
+            return False
+        # Word boundaries only matter where the pattern itself starts/ends with a word character
+        if pattern[0].isalnum() and start > 0 and text[start - 1].isalnum():
+            return False
+        if pattern[-1].isalnum() and end < length and text[end].isalnum():
+            return False
+        return True
+
+
+def _builtin_entries() -> List[Tuple[str, str, str]]:
+    return (
+        [(name, name, 'Technical') for name in SkillExtractor.TECH_SKILLS] +
+        [(name, name, 'Soft') for name in SkillExtractor.SOFT_SKILLS]
+    )
+
+
+def _database_entries() -> List[Tuple[str, str, str]]:
+    entries = []
+    for name, category, synonyms in Skill.objects.values_list('name', 'category', 'synonyms').iterator():
+        entries.append((name, name, category))
+        for synonym in synonyms or []:
+            if isinstance(synonym, str):
+                entries.append((synonym, name, category))
+    return entries
+
+
+_matcher: Optional[SkillAutomaton] = None
+_matcher_built_at = 0.0
+_matcher_lock = threading.Lock()
+
+
+def get_skill_matcher() -> SkillAutomaton:
+    """
+    Shared automaton of the built-in skill lists plus every Skill name and
+    synonym in the database. Rebuilt after SKILL_MATCHER_TTL seconds or when
+    a Skill changes in this process (see invalidate_skill_matcher).
+    """
+    global _matcher, _matcher_built_at
+    ttl = getattr(settings, 'SKILL_MATCHER_TTL', 600)
+    if _matcher is not None and time.monotonic() - _matcher_built_at < ttl:
+        return _matcher
+
+    with _matcher_lock:
+        if _matcher is None or time.monotonic() - _matcher_built_at >= ttl:
+            try:
+                database_entries = _database_entries()
+            except Exception as e:
+                logger.warning(f"Could not load skill synonyms: {e}")
+                database_entries = []
+            started = time.monotonic()
+            if database_entries:
+                _matcher = SkillAutomaton(_builtin_entries() + database_entries)
+            else:
+                _matcher = BUILTIN_SKILL_MATCHER
+            _matcher_built_at = time.monotonic()
+            logger.info(f"Built skill matcher: {len(_matcher)} patterns in {_matcher_built_at - started:.3f}s")
+    return _matcher
+
+
+def invalidate_skill_matcher() -> None:
+    """Force the next get_skill_matcher() call to rebuild"""
+    global _matcher_built_at
+    _matcher_built_at = 0.0
+
+
+# Built-in taxonomy, compiled once at import
+BUILTIN_SKILL_MATCHER = SkillAutomaton(_builtin_entries())
@@ -0,0 +1,173 @@
+"""
+Skill usage rollups (SkillStat, TenantSkillStat, SkillCategoryStat).
+
+Trending skills, the skill catalog ordering, tenant CV statistics and
+skill insights read these precomputed rows instead of aggregating the whole
+cv_skills table. Inserts and deletes of CVSkill/JobSkill rows are applied
+as count/confidence deltas after commit (signals for single rows, explicit
+calls after bulk inserts); the reconcile_skill_stats beat task rebuilds
+everything from the source tables to correct drift (upserts that changed a
+confidence, raced inserts, raw SQL).
+"""
+import logging
+from collections import defaultdict
+from typing import Dict, Iterable, Tuple
+from django.db import transaction
+from django.db.models import Case, Count, F, IntegerField, Sum, Value, When
+from django.db.models.functions import Coalesce
+from .models import (
+    CVSkill, JobSkill, Skill, SkillStat, TenantSkillStat, SkillCategoryStat
+)
+
+logger = logging.getLogger(__name__)
+
+# (tenant_id, skill_id) -> [cv_count, job_count, confidence_total]
+Deltas = Dict[Tuple[object, int], list]
+
+
+class SkillStatsService:
+    """Incremental maintenance and full reconciliation of skill rollups"""
+
+    @staticmethod
+    def _increment(model, key_field: str, deltas: Dict[object, list], fields: Tuple[str, ...], **filters) -> None:
+        """Add per-key deltas to the given counter fields in one UPDATE (rows are created first)"""
+        model.objects.bulk_create(
+            [model(**{key_field: key}, **filters) for key in deltas],
+            ignore_conflicts=True,
+        )
+        model.objects.filter(**{f'{key_field}__in': list(deltas)}, **filters).update(**{
+            field: F(field) + Case(
+                *[When(**{key_field: key}, then=Value(values[position])) for key, values in deltas.items()],
+                default=Value(0),
+                output_field=IntegerField(),
+            )
+            for position, field in enumerate(fields)
+        })
+
+    @staticmethod
+    def apply(deltas: Deltas) -> None:
+        """Apply (tenant, skill) deltas to the tenant, global and category rollups"""
+        deltas = {key: values for key, values in deltas.items() if any(values)}
+        if not deltas:
+            return
+
+        by_skill = defaultdict(lambda: [0, 0, 0])
+        by_tenant = defaultdict(dict)
+        for (tenant_id, skill_id), values in deltas.items():
+            by_tenant[tenant_id][skill_id] = values
+            for position, value in enumerate(values):
+                by_skill[skill_id][position] += value
+
+        # Skills deleted since (their rollups went with them) are dropped
+        categories = dict(Skill.objects.filter(id__in=list(by_skill)).values_list('id', 'category'))
+        by_skill = {skill_id: values for skill_id, values in by_skill.items() if skill_id in categories}
+        for tenant_deltas in by_tenant.values():
+            for skill_id in [skill_id for skill_id in tenant_deltas if skill_id not in categories]:
+                del tenant_deltas[skill_id]
+        by_category = defaultdict(lambda: [0, 0])
+        for skill_id, (cv_count, _, confidence) in by_skill.items():
+            if cv_count or confidence:
+                by_category[categories[skill_id]][0] += cv_count
+                by_category[categories[skill_id]][1] += confidence
+
+        fields = ('cv_count', 'job_count', 'confidence_total')
+        with transaction.atomic():
+            if by_skill:
+                SkillStatsService._increment(SkillStat, 'skill_id', by_skill, fields)
+            for tenant_id, tenant_deltas in by_tenant.items():
+                if tenant_deltas:
+                    SkillStatsService._increment(
+                        TenantSkillStat, 'skill_id', tenant_deltas, fields, tenant_id=tenant_id
+                    )
+            if by_category:
+                SkillStatsService._increment(
+                    SkillCategoryStat, 'category', dict(by_category), ('cv_skill_count', 'confidence_total')
+                )
+
+    @staticmethod
+    def schedule(deltas: Deltas) -> None:
+        """Apply deltas once the current transaction commits; failures are only logged"""
+        def apply():
+            try:
+                SkillStatsService.apply(deltas)
+            except Exception as e:
+                logger.warning(f"Skill stats update failed (next reconcile fixes it): {e}")
+        transaction.on_commit(apply)
+
+    @staticmethod
+    def record_cv_skills(tenant_id, cv_skills: Iterable[CVSkill], sign: int = 1) -> None:
+        """Count inserted (sign=1) or deleted (sign=-1) CV skills of one tenant"""
+        deltas = {}
+        for cv_skill in cv_skills:
+            values = deltas.setdefault((tenant_id, cv_skill.skill_id), [0, 0, 0])
+            values[0] += sign
+            values[2] += sign * cv_skill.confidence
+        SkillStatsService.schedule(deltas)
+
+    @staticmethod
+    def record_job_skills(tenant_id, skill_ids: Iterable[int], sign: int = 1) -> None:
+        """Count inserted (sign=1) or deleted (sign=-1) job skills of one tenant"""
+        deltas = {}
+        for skill_id in skill_ids:
+            deltas.setdefault((tenant_id, skill_id), [0, 0, 0])[1] += sign
+        SkillStatsService.schedule(deltas)
+
+    @staticmethod
+    def reconcile() -> Dict[str, int]:
+        """Rebuild every rollup from cv_skills and job_skills"""
+        cv_rows = (
+            CVSkill.objects.values('cv__tenant_id', 'skill_id')
+            .annotate(count=Count('id'), confidence=Coalesce(Sum('confidence'), 0))
+        )
+        job_rows = JobSkill.objects.values('job__tenant_id', 'skill_id').annotate(count=Count('id'))
+
+        tenant_stats = {}
+        for row in cv_rows:
+            stat = tenant_stats.setdefault(
+                (row['cv__tenant_id'], row['skill_id']),
+                TenantSkillStat(tenant_id=row['cv__tenant_id'], skill_id=row['skill_id'])
+            )
+            stat.cv_count = row['count']
+            stat.confidence_total = row['confidence']
+        for row in job_rows:
+            stat = tenant_stats.setdefault(
+                (row['job__tenant_id'], row['skill_id']),
+                TenantSkillStat(tenant_id=row['job__tenant_id'], skill_id=row['skill_id'])
+            )
+            stat.job_count = row['count']
+
+        skill_stats = {}
+        for stat in tenant_stats.values():
+            total = skill_stats.setdefault(stat.skill_id, SkillStat(skill_id=stat.skill_id))
+            total.cv_count += stat.cv_count
+            total.job_count += stat.job_count
+            total.confidence_total += stat.confidence_total
+
+        categories = dict(Skill.objects.filter(id__in=list(skill_stats)).values_list('id', 'category'))
+        category_stats = {}
+        for stat in skill_stats.values():
+            if stat.cv_count and stat.skill_id in categories:
+                total = category_stats.setdefault(
+                    categories[stat.skill_id], SkillCategoryStat(category=categories[stat.skill_id])
+                )
+                total.cv_skill_count += stat.cv_count
+                total.confidence_total += stat.confidence_total
+
+        with transaction.atomic():
+            for model, rows in (
+                (TenantSkillStat, tenant_stats),
+                (SkillStat, skill_stats),
+                (SkillCategoryStat, category_stats),
+            ):
+                model.objects.all().delete()
+                model.objects.bulk_create(list(rows.values()), batch_size=1000)
+
+        logger.info(
+            f"Reconciled skill stats: {len(skill_stats)} skills, {len(tenant_stats)} tenant rows, "
+            f"{len(category_stats)} categories"
+        )
+        return {
+            'skills': len(skill_stats),
+            'tenant_skills': len(tenant_stats),
+            'categories': len(category_stats),
+        }
@@ -2,9 +2,10 @@
 Celery tasks for CV analysis
 """
 from celery import shared_task
+from celery.signals import worker_process_init
 import logging
 from .services import CVProcessingService
-from .models import CV
+from .models import CV, AnalysisJob
 
 logger = logging.getLogger(__name__)
 
@@ -37,6 +38,44 @@ def process_cv_task(self, cv_id: int):
         raise self.retry(exc=e, countdown=60 * (2 ** self.request.retries))
 
 
+@shared_task(bind=True)
+def run_analysis_job_task(self, job_id: str):
+    """
+    Run an ATS / CV-job match / advanced analysis job queued by the API
+    
+    Args:
+        job_id: AnalysisJob ID
+    
+    Returns:
+        dict: Final job status
+    """
+    from .analysis_jobs import AnalysisJobService
+    
+    try:
+        job = AnalysisJobService.run(job_id)
+    except AnalysisJob.DoesNotExist:
+        logger.error(f"Analysis job {job_id} not found")
+        return {'success': False, 'error': 'Job not found'}
+    
+    return {
+        'success': job.status == 'completed',
+        'job_id': job_id,
+        'status': job.status
+    }
+
+
+@shared_task
+def refresh_job_search_task(query_text: str, gl: str, hl: str):
+    """Revalidate a stale cached SerpAPI search"""
+    from .job_scraper import JobScraperService
+    try:
+        jobs = JobScraperService().fetch_google_jobs(query_text, gl, hl)
+        return {'success': True, 'query': query_text, 'jobs': len(jobs)}
+    except Exception as e:
+        logger.error(f"Error refreshing job search '{query_text}': {e}")
+        return {'success': False, 'error': str(e)}
+
+
 @shared_task
 def batch_process_cvs(cv_ids: list):
     """
@@ -65,17 +104,103 @@ def batch_process_cvs(cv_ids: list):
     }
 
 
+@shared_task
+def import_cv_archive_task(job_id: str):
+    """Unpack a bulk import archive and fan processing out as a chord"""
+    from .cv_import import CVImportService
+    from .models import CVImportJob
+    
+    try:
+        CVImportService.run(job_id)
+    except CVImportJob.DoesNotExist:
+        logger.error(f"CV import {job_id} not found")
+        return {'success': False, 'error': 'Import not found'}
+    return {'success': True, 'job_id': job_id}
+
+
+@shared_task
+def process_cv_import_chunk_task(job_id: str, cv_ids: list):
+    """Process one chunk of a bulk import; failures are counted, not retried"""
+    from .cv_import import CVImportService
+    return CVImportService.process_chunk(job_id, cv_ids)
+
+
+@shared_task
+def finalize_cv_import_task(results: list, job_id: str):
+    """Chord callback aggregating a bulk import once every chunk has run"""
+    from .cv_import import CVImportService
+    
+    job = CVImportService.finalize(job_id, results)
+    return {'job_id': job_id, 'status': job.status, 'processed': job.processed, 'failed': job.failed}
+
+
+@shared_task
+def fail_cv_import_task(request, exc, traceback, job_id: str):
+    """Chord error callback: close a bulk import whose chunk crashed or timed out"""
+    from .cv_import import CVImportService
+    
+    logger.error(f"CV import {job_id} failed during processing: {exc}")
+    CVImportService.fail(job_id, f"Processing failed: {exc}")
+
+
+@shared_task
+def embed_documents_task(kind: str, ids: list):
+    """Encode CVs or job postings and insert them into the semantic index"""
+    from .embeddings import EmbeddingService
+    
+    count = EmbeddingService.embed(kind, ids)
+    return {'kind': kind, 'requested': len(ids), 'embedded': count}
+
+
+@shared_task(ignore_result=True)
+def flush_embedding_queue_task():
+    """Encode pending CVs and job postings in micro-batches (embeddings queue)"""
+    from .embedding_queue import EmbeddingBatcher
+    
+    encoded = EmbeddingBatcher().flush()
+    if any(encoded.values()):
+        logger.info(f"Embedding flush encoded {encoded}")
+
+
+@worker_process_init.connect
+def preload_embedding_model(**kwargs):
+    """Load the embedding model once per process on dedicated embedding workers"""
+    from django.conf import settings
+    
+    if getattr(settings, 'EMBEDDING_WORKER_PRELOAD', False):
+        from .embeddings import get_encoder
+        get_encoder()
+
+
+@shared_task
+def expire_job_postings_task():
+    """Close scraped job postings not seen in recent searches (run periodically)"""
+    from .job_ingestion import JobPostingIngestionService
+    
+    count = JobPostingIngestionService.expire_stale()
+    logger.info(f"Closed {count} stale scraped job postings")
+    return {'closed': count}
+
+
+@shared_task
+def reconcile_skill_stats_task():
+    """Rebuild the skill rollups from cv_skills/job_skills to correct drift (run periodically)"""
+    from .skill_stats import SkillStatsService
+    
+    return SkillStatsService.reconcile()
+
+
 @shared_task
 def cleanup_old_cvs():
     """
     Clean up old processed CVs (run periodically)
-    Deletes CVs older than 90 days
+    Deletes CVs not used for 90 days (re-uploads of the same file touch updated_at)
     """
     from django.utils import timezone
     from datetime import timedelta
     
     cutoff_date = timezone.now() - timedelta(days=90)
-    old_cvs = CV.objects.filter(created_at__lt=cutoff_date)
+    old_cvs = CV.objects.filter(updated_at__lt=cutoff_date)
     count = old_cvs.count()
     
     # Delete files
@@ -98,26 +223,29 @@ def generate_skill_insights():
     Generate insights about skill trends across all CVs
     Run periodically to update skill statistics
     """
-    from django.db.models import Count, Avg
-    from .models import CVSkill, Skill
+    from .models import SkillStat, SkillCategoryStat
     
-    # Most common skills
-    common_skills = Skill.objects.annotate(
-        cv_count=Count('cv_skills')
-    ).filter(cv_count__gt=0).order_by('-cv_count')[:20]
+    # Most common skills (read from the rollups, not the cv_skills table)
+    common_skills = SkillStat.objects.filter(
+        cv_count__gt=0
+    ).select_related('skill').order_by('-cv_count')[:20]
     
     # Average confidence by category
-    category_confidence = CVSkill.objects.values('skill__category').annotate(
-        avg_confidence=Avg('confidence'),
-        count=Count('id')
-    )
+    category_confidence = [
+        {
+            'skill__category': stat.category,
+            'avg_confidence': stat.avg_confidence,
+            'count': stat.cv_skill_count,
+        }
+        for stat in SkillCategoryStat.objects.filter(cv_skill_count__gt=0)
+    ]
     
     insights = {
         'common_skills': [
-            {'skill': s.name, 'count': s.cv_count}
+            {'skill': s.skill.name, 'count': s.cv_count}
             for s in common_skills
         ],
-        'category_confidence': list(category_confidence)
+        'category_confidence': category_confidence
     }
     
     logger.info(f"Generated skill insights: {len(common_skills)} common skills")
@@ -0,0 +1,262 @@
+"""
+CV text extraction in a bounded process pool.
+
+PDF parsing runs in worker processes so a malformed or very long document
+cannot pin a gunicorn or Celery worker: each document gets a wall-clock
+budget and a page limit, and workers are recycled after
+TEXT_EXTRACTION_MAX_TASKS_PER_CHILD documents to cap memory growth.
+
+Workers append text page by page to a temporary file (pages separated by
+form feeds, so page boundaries survive), and when a document
+overruns its budget the pages read so far are still returned. Where a pool
+cannot be started (e.g. inside daemonic Celery prefork children) each
+document is parsed in a short-lived subprocess that is killed at the hard
+deadline. A worker that dies mid-document is reported as an error, never
+as (partial) text.
+"""
+import io
+import os
+import sys
+import json
+import mmap
+import time
+import logging
+import subprocess
+import tempfile
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import List, Optional, Union
+import PyPDF2
+import docx
+
+logger = logging.getLogger(__name__)
+
+# Seconds to wait past the soft deadline before the worker is considered stuck
+HARD_TIMEOUT_GRACE = 5.0
+
+# Directory holding the `apps` package, for the standalone extraction subprocess
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+SUBPROCESS_SCRIPT = (
+    'import json, sys\n'
+    'from apps.cv_analysis.text_extraction import _extract_to_file\n'
+    'source, file_type, output_path, deadline, max_pages = sys.argv[1:]\n'
+    'print(json.dumps(_extract_to_file(source, file_type, output_path, float(deadline), int(max_pages))))\n'
+)
+
+
+PAGE_BREAK = '\f'
+
+
+@dataclass
+class ExtractionResult:
+    """Extracted text, where each page starts, and whether limits cut it short"""
+    text: str
+    pages: int = 0
+    truncated: bool = False
+    timed_out: bool = False
+    page_offsets: List[int] = field(default_factory=list)
+
+
+@contextmanager
+def _open_source(source: Union[str, bytes]):
+    """Readable stream over raw bytes, or a read-only memory map of a file path"""
+    if isinstance(source, bytes):
+        yield io.BytesIO(source)
+        return
+    with open(source, 'rb') as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            yield file
+            return
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            yield mapped
+
+
+def _extract_to_file(source: Union[str, bytes], file_type: str, output_path: str,
+                     deadline: float, max_pages: int) -> dict:
+    """
+    Worker entry point: write the document's text to output_path.
+
+    deadline is a time.time() timestamp; pages are checked against it (and
+    max_pages) one by one, so slow documents stop with partial text.
+    """
+    pages = 0
+    truncated = timed_out = False
+    with open(output_path, 'w', encoding='utf-8') as output:
+        if file_type == 'pdf':
+            with _open_source(source) as stream:
+                reader = PyPDF2.PdfReader(stream)
+                for page in reader.pages:
+                    if pages >= max_pages or time.time() > deadline:
+                        truncated = True
+                        timed_out = pages < max_pages
+                        break
+                    output.write((page.extract_text() or '').replace(PAGE_BREAK, '\n') + PAGE_BREAK)
+                    output.flush()
+                    pages += 1
+        elif file_type == 'docx':
+            document = docx.Document(io.BytesIO(source) if isinstance(source, bytes) else source)
+            output.write('\n'.join(para.text for para in document.paragraphs))
+        elif file_type == 'txt':
+            if isinstance(source, bytes):
+                output.write(source.decode('utf-8'))
+            else:
+                with open(source, 'r', encoding='utf-8') as file:
+                    output.write(file.read())
+        else:
+            raise ValueError(f"Unsupported file type: {file_type}")
+    return {'pages': pages, 'truncated': truncated, 'timed_out': timed_out}
+
+
+class TextExtractionService:
+    """Process-pool backed text extraction with per-document limits"""
+
+    _pool: Optional[ProcessPoolExecutor] = None
+    _pool_pid: Optional[int] = None
+    _lock = threading.Lock()
+
+    @staticmethod
+    def _settings():
+        from django.conf import settings
+        return {
+            'workers': getattr(settings, 'TEXT_EXTRACTION_WORKERS', 2),
+            'max_tasks_per_child': getattr(settings, 'TEXT_EXTRACTION_MAX_TASKS_PER_CHILD', 50),
+            'timeout': getattr(settings, 'TEXT_EXTRACTION_TIMEOUT', 20.0),
+            'max_pages': getattr(settings, 'TEXT_EXTRACTION_MAX_PAGES', 30),
+            'use_pool': getattr(settings, 'TEXT_EXTRACTION_USE_POOL', True),
+        }
+
+    @classmethod
+    def _get_pool(cls, config) -> Optional[ProcessPoolExecutor]:
+        """Per-process pool, created lazily; None when a pool can't be used here"""
+        if multiprocessing.current_process().daemon:
+            return None
+        with cls._lock:
+            if cls._pool is None or cls._pool_pid != os.getpid():
+                cls._pool = ProcessPoolExecutor(
+                    max_workers=config['workers'],
+                    mp_context=multiprocessing.get_context('spawn'),
+                    max_tasks_per_child=config['max_tasks_per_child'],
+                )
+                cls._pool_pid = os.getpid()
+            return cls._pool
+
+    @classmethod
+    def _discard_pool(cls, pool: ProcessPoolExecutor) -> None:
+        """Kill a pool whose worker is stuck; the next call starts a fresh one"""
+        with cls._lock:
+            if cls._pool is pool:
+                cls._pool = None
+        for process in list((pool._processes or {}).values()):
+            process.terminate()
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    @staticmethod
+    def _extract_in_subprocess(source: Union[str, bytes], file_type: str, output_path: str,
+                               deadline: float, max_pages: int, timeout: float) -> dict:
+        """Run one extraction in a fresh interpreter, killed if it outlives `timeout`"""
+        source_path = None
+        if isinstance(source, bytes):
+            fd, source_path = tempfile.mkstemp(prefix='cv_source_')
+            with os.fdopen(fd, 'wb') as file:
+                file.write(source)
+            source = source_path
+
+        env = dict(os.environ)
+        env['PYTHONPATH'] = os.pathsep.join(filter(None, [PROJECT_ROOT, env.get('PYTHONPATH')]))
+        try:
+            completed = subprocess.run(
+                [sys.executable, '-c', SUBPROCESS_SCRIPT, source, file_type, output_path, str(deadline), str(max_pages)],
+                capture_output=True,
+                text=True,
+                timeout=timeout,
+                env=env,
+            )
+        finally:
+            if source_path:
+                os.unlink(source_path)
+
+        if completed.returncode != 0:
+            error = completed.stderr.strip().splitlines()
+            raise RuntimeError(f"Text extraction failed on a {file_type} document: {error[-1] if error else completed.returncode}")
+        return json.loads(completed.stdout.strip().splitlines()[-1])
+
+    @classmethod
+    def extract(cls, source: Union[str, bytes], file_type: str) -> ExtractionResult:
+        """
+        Extract text from a file path or raw bytes.
+
+        Returns partial text (timed_out/truncated set) when the document
+        exceeds its time or page budget; parse errors propagate.
+        """
+        config = cls._settings()
+        fd, output_path = tempfile.mkstemp(prefix='cv_text_', suffix='.txt')
+        os.close(fd)
+        deadline = time.time() + config['timeout']
+        args = (source, file_type, output_path, deadline, config['max_pages'])
+
+        hard_timeout = config['timeout'] + HARD_TIMEOUT_GRACE
+
+        try:
+            if not config['use_pool']:
+                meta = _extract_to_file(*args)
+                return cls._result(output_path, **meta)
+
+            pool = cls._get_pool(config)
+            future = None
+            if pool is not None:
+                try:
+                    future = pool.submit(_extract_to_file, *args)
+                except (AssertionError, OSError, RuntimeError) as e:
+                    # e.g. "daemonic processes are not allowed to have children"
+                    logger.warning(f"Text extraction pool unavailable ({e}); extracting in a subprocess")
+                    cls._discard_pool(pool)
+
+            if future is None:
+                try:
+                    meta = cls._extract_in_subprocess(*args, timeout=hard_timeout)
+                except subprocess.TimeoutExpired:
+                    logger.warning(f"Text extraction ({file_type}) exceeded {config['timeout']}s; returning partial text")
+                    return cls._result(output_path, truncated=True, timed_out=True)
+                return cls._result(output_path, **meta)
+
+            try:
+                meta = future.result(timeout=hard_timeout)
+            except FutureTimeoutError:
+                logger.warning(f"Text extraction ({file_type}) exceeded {config['timeout']}s; returning partial text")
+                cls._discard_pool(pool)
+                return cls._result(output_path, truncated=True, timed_out=True)
+            except BrokenProcessPool:
+                cls._discard_pool(pool)
+                raise RuntimeError(f"Text extraction worker died on a {file_type} document")
+
+            return cls._result(output_path, **meta)
+        finally:
+            try:
+                os.unlink(output_path)
+            except OSError:
+                pass
+
+    @staticmethod
+    def _result(path: str, pages: int = 0, truncated: bool = False, timed_out: bool = False) -> ExtractionResult:
+        """Build the result from the worker's output file (complete or partial)"""
+        with open(path, 'r', encoding='utf-8', errors='replace') as file:
+            parts = file.read().split(PAGE_BREAK)
+        if len(parts) > 1 and not parts[-1]:
+            parts.pop()
+        offsets = []
+        position = 0
+        for part in parts:
+            offsets.append(position)
+            position += len(part) + 1
+        return ExtractionResult(
+            text='\n'.join(parts),
+            pages=pages or len(parts),
+            truncated=truncated,
+            timed_out=timed_out,
+            page_offsets=offsets,
+        )
@@ -5,6 +5,7 @@ from . import views_new
 
 router = DefaultRouter()
 router.register('cvs', views.CVViewSet, basename='cv')
+router.register('cv-imports', views.CVImportJobViewSet, basename='cv-import')
 router.register('skills', views.SkillViewSet, basename='skill')
 router.register('jobs', views.JobPostingViewSet, basename='job')
 router.register('matches', views.JobMatchViewSet, basename='match')
@@ -13,6 +14,7 @@ router.register('matches', views.JobMatchViewSet, basename='match')
 router.register('ats-checker', views_new.ATSCheckerViewSet, basename='ats-checker')
 router.register('cv-job-matcher', views_new.CVJobMatcherViewSet, basename='cv-job-matcher')
 router.register('advanced-cv-analyzer', views_new.AdvancedCVAnalyzerViewSet, basename='advanced-cv-analyzer')
+router.register('analysis-jobs', views_new.AnalysisJobViewSet, basename='analysis-job')
 
 app_name = 'cv_analysis'
 urlpatterns = [
@@ -0,0 +1,56 @@
+"""
+Free-tier usage quotas (ATS detailed reports, CV-job matches).
+
+A free use is granted with a single conditional UPDATE
+(... SET used_count = used_count + 1 WHERE used_count < free_limit), so
+concurrent requests can never push a tenant past its limit and the common
+case costs one query. The tracker row is only created on a tenant's first
+use.
+"""
+from django.db.models import F
+from django.utils import timezone
+from apps.core.models import Tenant
+from .models import CVAnalysisUsageTracker
+
+DEFAULT_FREE_LIMIT = 3
+
+
+class UsageQuotaService:
+    """Atomic check-and-increment of CVAnalysisUsageTracker counters"""
+
+    @staticmethod
+    def get_tracker(tenant: Tenant, module_type: str) -> CVAnalysisUsageTracker:
+        tracker, _ = CVAnalysisUsageTracker.objects.get_or_create(
+            tenant=tenant,
+            module_type=module_type,
+            defaults={'free_limit': DEFAULT_FREE_LIMIT, 'used_count': 0}
+        )
+        return tracker
+
+    @staticmethod
+    def _increment(tenant: Tenant, module_type: str) -> bool:
+        return CVAnalysisUsageTracker.objects.filter(
+            tenant=tenant,
+            module_type=module_type,
+            used_count__lt=F('free_limit')
+        ).update(used_count=F('used_count') + 1, updated_at=timezone.now()) > 0
+
+    @staticmethod
+    def consume(tenant: Tenant, module_type: str) -> bool:
+        """Use one free unit; False when the tenant's free quota is exhausted"""
+        if UsageQuotaService._increment(tenant, module_type):
+            return True
+        # No row matched: either the quota is used up or this is the first use
+        tracker = UsageQuotaService.get_tracker(tenant, module_type)
+        if not tracker.can_use_free:
+            return False
+        return UsageQuotaService._increment(tenant, module_type)
+
+    @staticmethod
+    def release(tenant: Tenant, module_type: str) -> None:
+        """Give back a unit consumed for work that then failed"""
+        CVAnalysisUsageTracker.objects.filter(
+            tenant=tenant,
+            module_type=module_type,
+            used_count__gt=0
+        ).update(used_count=F('used_count') - 1, updated_at=timezone.now())
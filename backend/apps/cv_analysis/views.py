@@ -3,25 +3,47 @@ from rest_framework.decorators import api_view, permission_classes, action
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
-from django.db.models import Q, Count, Avg
+from django.db.models import Q, F, Count, Avg
+from django.db.models.functions import Coalesce
 from apps.core.permissions import HasModuleAccess
-from .models import CV, CVAnalysis, Skill, CVSkill, Experience, Education, JobPosting, JobMatch
+from apps.core.response_cache import cached_response
+from apps.core.pagination import CreatedAtCursorPagination
+from .models import (
+    CV, CVAnalysis, Skill, CVSkill, Experience, Education, JobPosting, JobMatch, CVImportJob,
+    TenantSkillStat
+)
 from .serializers import (
     CVSerializer, CVDetailSerializer, CVAnalysisSerializer,
     SkillSerializer, CVSkillSerializer, ExperienceSerializer, EducationSerializer,
-    JobPostingSerializer, JobMatchSerializer, CVUploadSerializer, JobMatchingSerializer
+    JobPostingSerializer, JobMatchSerializer, CVUploadSerializer, JobMatchingSerializer,
+    CVBulkImportSerializer, CVImportJobSerializer
 )
 from .tasks import process_cv_task
-from .matching import JobMatchingService
+from .matching import BatchMatchingEngine
+from .skill_index import SkillBitsetIndex
+from .embeddings import EmbeddingService, schedule_embedding, cv_texts, job_texts
 from .job_scraper import JobScraperService
-from .services import CVParser
+from .job_ingestion import JobPostingIngestionService, JobSearchService
+from .cv_import import CVImportService
+from .parsed_documents import ParsedDocumentStore
+from .services import CVUploadService
 import os
 
 
+def top_k_param(request, default: int = 20, maximum: int = 100) -> int:
+    """?k= clamped to [1, maximum]; missing or non-numeric values give the default"""
+    try:
+        k = int(request.query_params.get('k', default))
+    except (TypeError, ValueError):
+        k = default
+    return min(max(k, 1), maximum)
+
+
 class CVViewSet(viewsets.ModelViewSet):
     """CV CRUD operations"""
     permission_classes = [IsAuthenticated]
     parser_classes = [MultiPartParser, FormParser]
+    pagination_class = CreatedAtCursorPagination
     
     def get_serializer_class(self):
         if self.action == 'retrieve':
@@ -29,7 +51,11 @@ class CVViewSet(viewsets.ModelViewSet):
         return CVSerializer
     
     def get_queryset(self):
-        return CV.objects.filter(tenant=self.request.user.tenant).select_related(
+        queryset = CV.objects.filter(tenant=self.request.user.tenant)
+        if self.action == 'list':
+            # CVSerializer needs none of the text, offsets or related rows
+            return queryset.select_related('user').defer('raw_text', 'section_offsets')
+        return queryset.select_related(
             'user', 'analysis'
         ).prefetch_related('skills', 'experiences', 'education')
     
@@ -45,25 +71,38 @@ class CVViewSet(viewsets.ModelViewSet):
         file_type_map = {'.pdf': 'pdf', '.docx': 'docx', '.txt': 'txt'}
         file_type = file_type_map.get(ext, 'unknown')
         
-        # Create CV record
-        cv = CV.objects.create(
-            tenant=request.user.tenant,
-            user=request.user,
-            file=file,
-            filename=file.name,
+        # Create CV record (an identical file already uploaded by the tenant is reused)
+        cv, created = CVUploadService.get_or_create_cv(
+            request.user.tenant,
+            request.user,
+            file,
             file_type=file_type,
-            file_size=file.size,
             status='uploaded'
         )
         
-        # Queue for processing
-        process_cv_task.delay(cv.id)
-        
+        # Queue for processing (a reused CV only when it has no finished analysis yet)
+        if created or cv.status != 'analyzed' or not CVAnalysis.objects.filter(cv=cv).exists():
+            process_cv_task.delay(cv.id)
+
         return Response(
             CVSerializer(cv, context={'request': request}).data,
-            status=status.HTTP_201_CREATED
+            status=status.HTTP_201_CREATED if created else status.HTTP_200_OK
         )
     
+    @action(detail=False, methods=['post'], url_path='bulk-import')
+    def bulk_import(self, request):
+        """Import a ZIP archive of CVs; progress is tracked on /cv-imports/<id>/"""
+        serializer = CVBulkImportSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        
+        job = CVImportService.start(
+            request.user.tenant,
+            request.user,
+            serializer.validated_data['archive']
+        )
+        
+        return Response(CVImportJobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
+    
     @action(detail=True, methods=['post'])
     def reprocess(self, request, pk=None):
         """Reprocess a CV"""
@@ -95,6 +134,49 @@ class CVViewSet(viewsets.ModelViewSet):
         
         return Response(JobMatchSerializer(matches, many=True).data)
     
+    @action(detail=True, methods=['get'], url_path='ranked-jobs')
+    def ranked_jobs(self, request, pk=None):
+        """Top-k active jobs for this CV by skills score (skill bitset index), ?k= (default 20)"""
+        cv = self.get_object()
+        k = top_k_param(request)
+        
+        ranking = SkillBitsetIndex(cv.tenant_id).top_jobs_for_cv(cv.id, k)
+        jobs = JobPosting.objects.in_bulk([item['job_id'] for item in ranking])
+        for item in ranking:
+            job = jobs.get(item['job_id'])
+            item['job_title'] = job.title if job else None
+            item['job_company'] = job.company if job else None
+        
+        return Response(ranking)
+    
+    @action(detail=True, methods=['get'], url_path='semantic-jobs')
+    def semantic_jobs(self, request, pk=None):
+        """Top-k active jobs for this CV by embedding similarity, ?k= (default 20)"""
+        cv = self.get_object()
+        k = top_k_param(request)
+        
+        ranking = EmbeddingService.similar_jobs(cv, k)
+        if ranking is None:
+            if cv.status in ('analyzed', 'failed') and not cv_texts(cv):
+                # Nothing to encode: re-queueing would never make it searchable
+                return Response(
+                    {'error': 'CV has no extracted text and cannot be indexed'},
+                    status=status.HTTP_422_UNPROCESSABLE_ENTITY
+                )
+            schedule_embedding('cv', [cv.id])
+            return Response(
+                {'error': 'CV is not indexed yet, try again shortly'},
+                status=status.HTTP_409_CONFLICT
+            )
+        
+        jobs = JobPosting.objects.in_bulk([item['job_id'] for item in ranking])
+        for item in ranking:
+            job = jobs.get(item['job_id'])
+            item['job_title'] = job.title if job else None
+            item['job_company'] = job.company if job else None
+        
+        return Response(ranking)
+    
     @action(detail=True, methods=['post'], parser_classes=[JSONParser])
     def find_jobs(self, request, pk=None):
         """
@@ -104,7 +186,12 @@ class CVViewSet(viewsets.ModelViewSet):
         Optional params:
         - min_confidence: Minimum confidence score (default: 70)
         - max_jobs_per_title: Max jobs to fetch per job title (default: 5)
+        - refresh: Scrape again even if the same search ran recently (default: false)
         """
+        tenant = request.user.tenant
+        if not tenant:
+            return Response({'error': 'No tenant'}, status=status.HTTP_400_BAD_REQUEST)
+        
         cv = self.get_object()
         
         # Get parameters
@@ -117,11 +204,24 @@ class CVViewSet(viewsets.ModelViewSet):
         
         min_confidence = int(request.data.get('min_confidence', 70))
         max_jobs_per_title = int(request.data.get('max_jobs_per_title', 5))
+        params = {
+            'country': country,
+            'min_confidence': min_confidence,
+            'max_jobs_per_title': max_jobs_per_title,
+        }
         
-        # Get CV text
+        # A recent identical search is answered from the stored postings
+        if str(request.data.get('refresh', '')).lower() not in ('true', '1'):
+            results = JobSearchService.reuse(tenant, cv, params)
+            if results is not None:
+                return Response(results, status=status.HTTP_200_OK)
+        
+        # Get CV text (stored by process_cv, else from the parsed-document artifact)
         try:
-            if cv.file and hasattr(cv.file, 'path'):
-                cv_text = CVParser.extract_text(cv.file.path, cv.file_type)
+            if cv.raw_text:
+                cv_text = cv.raw_text
+            elif cv.file:
+                cv_text = ParsedDocumentStore.get_or_parse(cv).text
             else:
                 return Response(
                     {'error': 'CV file not found or inaccessible'},
@@ -143,6 +243,14 @@ class CVViewSet(viewsets.ModelViewSet):
                 max_jobs_per_title=max_jobs_per_title
             )
             
+            # Keep the postings in the tenant's corpus for later searches and matching
+            stored = JobPostingIngestionService.ingest(tenant, request.user, results['job_postings'])
+            for posting in results['job_postings']:
+                job = stored.get(JobPostingIngestionService.posting_fingerprint(posting))
+                posting['job_posting_id'] = job.id if job else None
+            if not results['summary'].get('partial'):
+                JobSearchService.record(tenant, cv, params, results)
+            
             return Response(results, status=status.HTTP_200_OK)
             
         except Exception as e:
@@ -152,6 +260,15 @@ class CVViewSet(viewsets.ModelViewSet):
             )
 
 
+class CVImportJobViewSet(viewsets.ReadOnlyModelViewSet):
+    """Bulk CV import progress"""
+    serializer_class = CVImportJobSerializer
+    permission_classes = [IsAuthenticated]
+    
+    def get_queryset(self):
+        return CVImportJob.objects.filter(tenant=self.request.user.tenant, user=self.request.user)
+
+
 class SkillViewSet(viewsets.ReadOnlyModelViewSet):
     """Skill catalog"""
     serializer_class = SkillSerializer
@@ -172,7 +289,10 @@ class SkillViewSet(viewsets.ReadOnlyModelViewSet):
                 Q(name__icontains=search) | Q(synonyms__contains=[search])
             )
         
-        return queryset.annotate(cv_count=Count('cv_skills')).order_by('-cv_count')
+        # CV counts come from the SkillStat rollup, not a Count over cv_skills
+        return queryset.select_related('stat').annotate(
+            usage_count=Coalesce(F('stat__cv_count'), 0)
+        ).order_by('-usage_count', 'name')
     
     @action(detail=False, methods=['get'])
     def categories(self, request):
@@ -181,11 +301,12 @@ class SkillViewSet(viewsets.ReadOnlyModelViewSet):
         return Response(list(categories))
     
     @action(detail=False, methods=['get'])
+    @cached_response('skills_trending', ['skills'], shared=True)
     def trending(self, request):
         """Get trending skills"""
-        trending = Skill.objects.annotate(
-            usage_count=Count('cv_skills')
-        ).filter(usage_count__gt=0).order_by('-usage_count')[:20]
+        trending = Skill.objects.filter(stat__cv_count__gt=0).annotate(
+            usage_count=F('stat__cv_count')
+        ).order_by('-usage_count')[:20]
         
         return Response(SkillSerializer(trending, many=True).data)
 
@@ -227,6 +348,46 @@ class JobPostingViewSet(viewsets.ModelViewSet):
         matches = job.cv_matches.all().order_by('-overall_score')[:20]
         
         return Response(JobMatchSerializer(matches, many=True).data)
+    
+    @action(detail=True, methods=['get'], url_path='ranked-cvs')
+    def ranked_cvs(self, request, pk=None):
+        """Top-k tenant CVs for this job by skills score (skill bitset index), ?k= (default 20)"""
+        job = self.get_object()
+        k = top_k_param(request)
+        
+        ranking = SkillBitsetIndex(job.tenant_id).top_cvs_for_job(job.id, k)
+        cvs = CV.objects.in_bulk([item['cv_id'] for item in ranking])
+        for item in ranking:
+            cv = cvs.get(item['cv_id'])
+            item['cv_filename'] = cv.filename if cv else None
+        
+        return Response(ranking)
+    
+    @action(detail=True, methods=['get'], url_path='semantic-cvs')
+    def semantic_cvs(self, request, pk=None):
+        """Top-k tenant CVs for this job by embedding similarity, ?k= (default 20)"""
+        job = self.get_object()
+        k = top_k_param(request)
+        
+        ranking = EmbeddingService.similar_cvs(job, k)
+        if ranking is None:
+            if not job_texts(job):
+                return Response(
+                    {'error': 'Job posting has no text and cannot be indexed'},
+                    status=status.HTTP_422_UNPROCESSABLE_ENTITY
+                )
+            schedule_embedding('job', [job.id])
+            return Response(
+                {'error': 'Job posting is not indexed yet, try again shortly'},
+                status=status.HTTP_409_CONFLICT
+            )
+        
+        cvs = CV.objects.in_bulk([item['cv_id'] for item in ranking])
+        for item in ranking:
+            cv = cvs.get(item['cv_id'])
+            item['cv_filename'] = cv.filename if cv else None
+        
+        return Response(ranking)
 
 
 class JobMatchViewSet(viewsets.ReadOnlyModelViewSet):
@@ -277,29 +438,24 @@ def match_cv_to_jobs(request):
     except CV.DoesNotExist:
         return Response({'error': 'CV not found'}, status=status.HTTP_404_NOT_FOUND)
     
-    # Get active jobs
-    jobs = JobPosting.objects.filter(
-        tenant=request.user.tenant,
-        status='active'
-    )
-    
-    # Perform matching
-    matching_service = JobMatchingService()
-    matches = []
+    # Score all active jobs in one pass
+    engine = BatchMatchingEngine(request.user.tenant.id)
+    engine.match(cv)
     
-    for job in jobs:
-        match = matching_service.match_cv_to_job(cv, job)
-        if match.overall_score >= min_score:
-            matches.append(match)
-    
-    # Sort by score and limit
-    matches = sorted(matches, key=lambda m: m.overall_score, reverse=True)[:limit]
+    # Best matches above the threshold
+    matches = JobMatch.objects.filter(
+        cv=cv,
+        job__tenant=request.user.tenant,
+        job__status='active',
+        overall_score__gte=min_score
+    ).select_related('cv', 'job').order_by('-overall_score')[:limit]
     
     return Response(JobMatchSerializer(matches, many=True).data)
 
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@cached_response('cv_statistics', ['cvs'])
 def cv_statistics(request):
     """Get CV analysis statistics for tenant"""
     tenant = request.user.tenant
@@ -318,12 +474,11 @@ def cv_statistics(request):
         avg_skills=Avg('skills_score')
     )
     
-    # Most common skills
-    common_skills = CVSkill.objects.filter(
-        cv__tenant=tenant
-    ).values('skill__name', 'skill__category').annotate(
-        count=Count('id')
-    ).order_by('-count')[:10]
+    # Most common skills (TenantSkillStat rollup)
+    common_skills = TenantSkillStat.objects.filter(
+        tenant=tenant,
+        cv_count__gt=0
+    ).values('skill__name', 'skill__category', count=F('cv_count')).order_by('-count')[:10]
     
     return Response({
         'total_cvs': total_cvs,
@@ -335,6 +490,7 @@ def cv_statistics(request):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@cached_response('job_statistics', ['jobs'])
 def job_statistics(request):
     """Get job posting statistics"""
     tenant = request.user.tenant
@@ -7,26 +7,31 @@ Views for the 3 CV Analysis modules:
 import logging
 from rest_framework import viewsets, status, permissions
 from rest_framework.decorators import action
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
+from django.conf import settings
 from django.utils import timezone
 from django.db import transaction
-import PyPDF2
-import io
 
 logger = logging.getLogger(__name__)
 
 from .models import (
     CV, ATSAnalysis, CVJobMatch, AdvancedCVAnalysis,
-    ChatMessage, CVAnalysisUsageTracker
+    ChatMessage, AnalysisJob
 )
 from .serializers_new import (
     CVSerializer, ATSAnalysisSerializer, ATSAnalysisRequestSerializer,
     CVJobMatchSerializer, CVJobMatchRequestSerializer,
     AdvancedCVAnalysisSerializer, AdvancedCVAnalysisRequestSerializer,
-    ChatMessageRequestSerializer, ChatMessageSerializer, UsageTrackerSerializer
+    ChatMessageRequestSerializer, ChatMessageSerializer, UsageTrackerSerializer,
+    AnalysisJobSerializer
 )
-from .services import CVAnalysisService
+from .services import CVAnalysisService, CVUploadService
+from .analysis_jobs import AnalysisJobService
+from .usage_quota import UsageQuotaService
 from apps.core.permissions import HasModuleAccess
+from apps.core.response_cache import cached_response
+from apps.core.streaming import EventStreamRenderer, sse_event, sse_response
 
 
 class ATSCheckerViewSet(viewsets.ViewSet):
@@ -61,37 +66,22 @@ class ATSCheckerViewSet(viewsets.ViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Extract text from CV
-        cv_text = self._extract_text(cv_file)
-        
-        # Save CV
-        cv = CV.objects.create(
-            tenant=tenant,
-            user=request.user,
-            file=cv_file,
-            filename=cv_file.name,
+        # Save CV (or reuse the stored copy of an identical upload)
+        cv, _ = CVUploadService.get_or_create_cv(
+            tenant,
+            request.user,
+            cv_file,
+            extract_text=self._extract_text,
             file_type=cv_file.name.split('.')[-1].lower(),
-            file_size=cv_file.size,
-            raw_text=cv_text,
             status='analyzed'
         )
         
-        # Always calculate basic ATS score (FREE)
-        service = CVAnalysisService()
-        ats_data = service.calculate_ats_score(cv_text)
-        
         # Check if detailed report requested
         can_get_detailed = False
         is_free_detailed = False
+        limit_reached = False
         
         if request_detailed:
-            # Check usage tracker
-            tracker, created = CVAnalysisUsageTracker.objects.get_or_create(
-                tenant=tenant,
-                module_type='ats_detailed',
-                defaults={'free_limit': 3, 'used_count': 0}
-            )
-            
             # Check if has paid module access
             has_paid_access = request.user.has_module_access('ats_checker')
             
@@ -99,47 +89,51 @@ class ATSCheckerViewSet(viewsets.ViewSet):
                 # Paid user - always get detailed
                 can_get_detailed = True
                 is_free_detailed = False
-            elif tracker.can_use_free:
+            elif UsageQuotaService.consume(tenant, 'ats_detailed'):
                 # Free user within limit
                 can_get_detailed = True
                 is_free_detailed = True
-                tracker.used_count += 1
-                tracker.save()
             else:
                 # Free user exceeded limit - still return basic analysis
-                basic_analysis = ATSAnalysis.objects.create(
-                    tenant=tenant,
-                    user=request.user,
-                    cv=cv,
-                    ats_score=ats_data['score'],
-                    keyword_matches=ats_data.get('keyword_matches', []),
-                    missing_keywords=ats_data.get('missing_keywords', []),
-                    quick_suggestions=ats_data.get('suggestions', []),
-                    has_detailed_report=False,
-                    detailed_report='',
-                    is_free_detailed_report=False
-                )
-                
-                return Response({
-                    'error': 'You have used all 3 free detailed reports. Please upgrade to continue.',
-                    'upgrade_required': True,
-                    'module_code': 'ats_checker',
-                    'analysis': ATSAnalysisSerializer(basic_analysis).data
-                }, status=status.HTTP_402_PAYMENT_REQUIRED)
-        
-        # Create analysis record with appropriate detail level
-        analysis = ATSAnalysis.objects.create(
-            tenant=tenant,
-            user=request.user,
-            cv=cv,
-            ats_score=ats_data['score'],
-            keyword_matches=ats_data.get('keyword_matches', []),
-            missing_keywords=ats_data.get('missing_keywords', []),
-            quick_suggestions=ats_data.get('suggestions', []),
-            has_detailed_report=can_get_detailed,
-            detailed_report=ats_data.get('detailed_report', '') if can_get_detailed else '',
-            is_free_detailed_report=is_free_detailed
-        )
+                limit_reached = True
+        
+        limit_error = {
+            'error': 'You have used all 3 free detailed reports. Please upgrade to continue.',
+            'upgrade_required': True,
+            'module_code': 'ats_checker',
+        }
+        
+        try:
+            if serializer.validated_data.get('async_mode'):
+                # A free detailed report stays reserved; the worker releases it if the job fails
+                job = AnalysisJobService.enqueue('ats', tenant, request.user, cv, params={
+                    'request_detailed': request_detailed,
+                    'can_get_detailed': can_get_detailed,
+                    'is_free_detailed': is_free_detailed,
+                })
+                data = AnalysisJobSerializer(job).data
+                if limit_reached:
+                    data.update(limit_error)
+                return Response(data, status=status.HTTP_202_ACCEPTED)
+            
+            # Always calculate basic ATS score (FREE) and record it with the appropriate detail level
+            analysis = AnalysisJobService.run_ats(
+                cv,
+                request.user,
+                request_detailed=request_detailed,
+                can_get_detailed=can_get_detailed,
+                is_free_detailed=is_free_detailed
+            )
+        except Exception:
+            if is_free_detailed:
+                UsageQuotaService.release(tenant, 'ats_detailed')
+            raise
+        
+        if limit_reached:
+            return Response({
+                **limit_error,
+                'analysis': ATSAnalysisSerializer(analysis).data
+            }, status=status.HTTP_402_PAYMENT_REQUIRED)
         
         return Response(ATSAnalysisSerializer(analysis).data, status=status.HTTP_201_CREATED)
     
@@ -150,11 +144,7 @@ class ATSCheckerViewSet(viewsets.ViewSet):
         if not tenant:
             return Response({'error': 'No tenant'}, status=status.HTTP_400_BAD_REQUEST)
         
-        tracker, created = CVAnalysisUsageTracker.objects.get_or_create(
-            tenant=tenant,
-            module_type='ats_detailed',
-            defaults={'free_limit': 3, 'used_count': 0}
-        )
+        tracker = UsageQuotaService.get_tracker(tenant, 'ats_detailed')
         
         has_paid = request.user.has_module_access('ats_checker')
         
@@ -167,6 +157,7 @@ class ATSCheckerViewSet(viewsets.ViewSet):
         })
     
     @action(detail=False, methods=['get'])
+    @cached_response('ats_history', ['ats'])
     def history(self, request):
         """Get ATS analysis history"""
         tenant = request.user.tenant
@@ -192,17 +183,10 @@ class ATSCheckerViewSet(viewsets.ViewSet):
         if analysis.has_detailed_report:
             return Response(ATSAnalysisSerializer(analysis).data)
         
-        # Check usage tracker
-        tracker, created = CVAnalysisUsageTracker.objects.get_or_create(
-            tenant=tenant,
-            module_type='ats_detailed',
-            defaults={'free_limit': 3, 'used_count': 0}
-        )
-        
-        # Check if has paid access
+        # Check if has paid access, otherwise reserve a free detailed report
         has_paid_access = request.user.has_module_access('ats_checker')
         
-        if not has_paid_access and not tracker.can_use_free:
+        if not has_paid_access and not UsageQuotaService.consume(tenant, 'ats_detailed'):
             return Response({
                 'error': 'You have used all 3 free detailed reports. Please upgrade to continue.',
                 'upgrade_required': True,
@@ -210,32 +194,27 @@ class ATSCheckerViewSet(viewsets.ViewSet):
             }, status=status.HTTP_402_PAYMENT_REQUIRED)
         
         # Generate detailed report
-        service = CVAnalysisService()
-        ats_data = service.calculate_ats_score(analysis.cv.raw_text)
-        
-        # Update analysis with detailed report
-        analysis.has_detailed_report = True
-        analysis.detailed_report = ats_data.get('detailed_report', '')
-        analysis.is_free_detailed_report = not has_paid_access
-        analysis.save()
-        
-        # Increment usage if free
-        if not has_paid_access:
-            tracker.used_count += 1
-            tracker.save()
+        try:
+            service = CVAnalysisService()
+            ats_data = service.calculate_ats_score(analysis.cv.raw_text, analysis.cv.section_offsets)
+            
+            # Update analysis with detailed report
+            analysis.has_detailed_report = True
+            analysis.detailed_report = ats_data.get('detailed_report', '')
+            analysis.is_free_detailed_report = not has_paid_access
+            analysis.save()
+        except Exception:
+            if not has_paid_access:
+                UsageQuotaService.release(tenant, 'ats_detailed')
+            raise
         
         return Response(ATSAnalysisSerializer(analysis).data)
     
-    def _extract_text(self, file):
-        """Extract text from PDF file"""
+    def _extract_text(self, cv):
+        """Extract text from the stored file (PDF, DOCX or TXT)"""
         try:
-            pdf_reader = PyPDF2.PdfReader(io.BytesIO(file.read()))
-            text = ''
-            for page in pdf_reader.pages:
-                text += page.extract_text()
-            file.seek(0)  # Reset file pointer
-            return text
-        except:
+            return CVUploadService.extract_stored_text(cv, cv.file_type)
+        except Exception:
             return ''
 
 
@@ -266,67 +245,49 @@ class CVJobMatcherViewSet(viewsets.ViewSet):
         if not tenant:
             return Response({'error': 'No tenant'}, status=status.HTTP_400_BAD_REQUEST)
         
-        # Check usage tracker
-        tracker, created = CVAnalysisUsageTracker.objects.get_or_create(
-            tenant=tenant,
-            module_type='cv_matcher',
-            defaults={'free_limit': 3, 'used_count': 0}
-        )
-        
+        # Free users reserve one of their matches up front
         has_paid_access = request.user.has_module_access('cv_job_matcher')
         
-        if not has_paid_access and not tracker.can_use_free:
+        if not has_paid_access and not UsageQuotaService.consume(tenant, 'cv_matcher'):
             return Response({
                 'error': 'You have used all 3 free job matches. Please upgrade to continue.',
                 'upgrade_required': True,
                 'module_code': 'cv_job_matcher'
             }, status=status.HTTP_402_PAYMENT_REQUIRED)
         
-        # Extract CV text
-        cv_file = serializer.validated_data['cv_file']
-        cv_text = self._extract_text(cv_file)
-        
-        # Save CV
-        cv = CV.objects.create(
-            tenant=tenant,
-            user=request.user,
-            file=cv_file,
-            filename=cv_file.name,
-            file_type=cv_file.name.split('.')[-1].lower(),
-            file_size=cv_file.size,
-            raw_text=cv_text,
-            status='analyzed'
-        )
-        
-        # Perform matching
-        service = CVAnalysisService()
-        match_data = service.match_cv_to_job(
-            cv_text,
-            serializer.validated_data['job_title'],
-            serializer.validated_data['job_description']
-        )
-        
-        # Increment usage if free
-        is_free_match = False
-        if not has_paid_access:
-            tracker.used_count += 1
-            tracker.save()
-            is_free_match = True
-        
-        # Create match record
-        match = CVJobMatch.objects.create(
-            tenant=tenant,
-            user=request.user,
-            cv=cv,
-            job_title=serializer.validated_data['job_title'],
-            job_description=serializer.validated_data['job_description'],
-            match_score=match_data['match_score'],
-            matched_skills=match_data['matched_skills'],
-            missing_skills=match_data['missing_skills'],
-            matching_report=match_data['matching_report'],
-            recommendations=match_data['recommendations'],
-            is_free_match=is_free_match
-        )
+        try:
+            # Save CV (or reuse the stored copy of an identical upload)
+            cv_file = serializer.validated_data['cv_file']
+            cv, _ = CVUploadService.get_or_create_cv(
+                tenant,
+                request.user,
+                cv_file,
+                extract_text=self._extract_text,
+                file_type=cv_file.name.split('.')[-1].lower(),
+                status='analyzed'
+            )
+            
+            if serializer.validated_data.get('async_mode'):
+                # The free use stays reserved; the match itself runs in the worker
+                job = AnalysisJobService.enqueue('cv_match', tenant, request.user, cv, params={
+                    'job_title': serializer.validated_data['job_title'],
+                    'job_description': serializer.validated_data['job_description'],
+                    'is_free_match': not has_paid_access,
+                })
+                return Response(AnalysisJobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
+            
+            # Perform matching and create match record
+            match = AnalysisJobService.run_cv_match(
+                cv,
+                request.user,
+                job_title=serializer.validated_data['job_title'],
+                job_description=serializer.validated_data['job_description'],
+                is_free_match=not has_paid_access
+            )
+        except Exception:
+            if not has_paid_access:
+                UsageQuotaService.release(tenant, 'cv_matcher')
+            raise
         
         return Response(CVJobMatchSerializer(match).data, status=status.HTTP_201_CREATED)
     
@@ -337,11 +298,7 @@ class CVJobMatcherViewSet(viewsets.ViewSet):
         if not tenant:
             return Response({'error': 'No tenant'}, status=status.HTTP_400_BAD_REQUEST)
         
-        tracker, created = CVAnalysisUsageTracker.objects.get_or_create(
-            tenant=tenant,
-            module_type='cv_matcher',
-            defaults={'free_limit': 3, 'used_count': 0}
-        )
+        tracker = UsageQuotaService.get_tracker(tenant, 'cv_matcher')
         
         has_paid = request.user.has_module_access('cv_job_matcher')
         
@@ -354,6 +311,7 @@ class CVJobMatcherViewSet(viewsets.ViewSet):
         })
     
     @action(detail=False, methods=['get'])
+    @cached_response('cv_match_history', ['cv_matches'])
     def history(self, request):
         """Get matching history"""
         tenant = request.user.tenant
@@ -363,16 +321,11 @@ class CVJobMatcherViewSet(viewsets.ViewSet):
         matches = CVJobMatch.objects.filter(tenant=tenant).order_by('-created_at')[:20]
         return Response(CVJobMatchSerializer(matches, many=True).data)
     
-    def _extract_text(self, file):
-        """Extract text from PDF file"""
+    def _extract_text(self, cv):
+        """Extract text from the stored file (PDF, DOCX or TXT)"""
         try:
-            pdf_reader = PyPDF2.PdfReader(io.BytesIO(file.read()))
-            text = ''
-            for page in pdf_reader.pages:
-                text += page.extract_text()
-            file.seek(0)
-            return text
-        except:
+            return CVUploadService.extract_stored_text(cv, cv.file_type)
+        except Exception:
             return ''
 
 
@@ -400,19 +353,14 @@ class AdvancedCVAnalyzerViewSet(viewsets.ViewSet):
         if not tenant:
             return Response({'error': 'No tenant'}, status=status.HTTP_400_BAD_REQUEST)
         
-        # Extract CV text
+        # Save CV (or reuse the stored copy of an identical upload)
         cv_file = serializer.validated_data['cv_file']
-        cv_text = self._extract_text(cv_file)
-        
-        # Save CV
-        cv = CV.objects.create(
-            tenant=tenant,
-            user=request.user,
-            file=cv_file,
-            filename=cv_file.name,
+        cv, _ = CVUploadService.get_or_create_cv(
+            tenant,
+            request.user,
+            cv_file,
+            extract_text=self._extract_text,
             file_type=cv_file.name.split('.')[-1].lower(),
-            file_size=cv_file.size,
-            raw_text=cv_text,
             status='processing'
         )
         
@@ -424,21 +372,16 @@ class AdvancedCVAnalyzerViewSet(viewsets.ViewSet):
             status='processing'
         )
         
-        # Perform comprehensive analysis
-        service = CVAnalysisService()
-        analysis_data = service.analyze_advanced_cv(cv_text)
-        
-        # Update analysis with results
-        analysis.full_analysis = analysis_data['full_analysis']
-        analysis.strengths = analysis_data['strengths']
-        analysis.weaknesses = analysis_data['weaknesses']
-        analysis.improvement_suggestions = analysis_data['improvement_suggestions']
-        analysis.career_recommendations = analysis_data['career_recommendations']
-        analysis.status = 'completed'
-        analysis.save()
+        if serializer.validated_data.get('async_mode'):
+            job = AnalysisJobService.enqueue('advanced', tenant, request.user, cv, params={
+                'analysis_id': str(analysis.id),
+            })
+            data = AnalysisJobSerializer(job).data
+            data['analysis_id'] = str(analysis.id)
+            return Response(data, status=status.HTTP_202_ACCEPTED)
         
-        cv.status = 'analyzed'
-        cv.save()
+        # Perform comprehensive analysis
+        analysis = AnalysisJobService.run_advanced(analysis)
         
         return Response(AdvancedCVAnalysisSerializer(analysis).data, status=status.HTTP_201_CREATED)
     
@@ -484,8 +427,65 @@ class AdvancedCVAnalyzerViewSet(viewsets.ViewSet):
         )
         
         return Response(ChatMessageSerializer(assistant_message).data)
-    
+
+    @action(detail=True, methods=['post'], url_path='chat-stream',
+            renderer_classes=[JSONRenderer, EventStreamRenderer])
+    def chat_stream(self, request, pk=None):
+        """
+        Streaming variant of chat (server-sent events)
+        Emits one 'token' event per generated chunk, then a 'done' event
+        with the saved assistant message
+        """
+        try:
+            analysis = AdvancedCVAnalysis.objects.select_related('cv').get(
+                id=pk,
+                tenant=request.user.tenant
+            )
+        except AdvancedCVAnalysis.DoesNotExist:
+            return Response({'error': 'Analysis not found'}, status=status.HTTP_404_NOT_FOUND)
+
+        serializer = ChatMessageRequestSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        user_message = serializer.validated_data['message']
+
+        # Save user message
+        ChatMessage.objects.create(
+            advanced_analysis=analysis,
+            role='user',
+            content=user_message
+        )
+
+        service = CVAnalysisService()
+
+        def stream():
+            parts = []
+            finished = False
+            try:
+                for token in service.stream_chat_about_cv_llama(analysis.cv.raw_text, user_message, analysis):
+                    parts.append(token)
+                    yield sse_event({'content': token}, event='token')
+                finished = True
+            finally:
+                # Persist whatever was generated, even if the client disconnected
+                content = ''.join(parts).strip()
+                assistant_message = None
+                if content:
+                    assistant_message = ChatMessage.objects.create(
+                        advanced_analysis=analysis,
+                        role='assistant',
+                        content=content
+                    )
+            if finished:
+                yield sse_event(
+                    ChatMessageSerializer(assistant_message).data if assistant_message else {},
+                    event='done'
+                )
+
+        return sse_response(request, stream())
+
     @action(detail=False, methods=['get'])
+    @cached_response('advanced_history', ['advanced'])
     def history(self, request):
         """Get advanced analysis history"""
         tenant = request.user.tenant
@@ -497,14 +497,62 @@ class AdvancedCVAnalyzerViewSet(viewsets.ViewSet):
         ).order_by('-created_at')[:20]
         return Response(AdvancedCVAnalysisSerializer(analyses, many=True).data)
     
-    def _extract_text(self, file):
-        """Extract text from PDF file"""
+    def _extract_text(self, cv):
+        """Extract text from the stored file (PDF, DOCX or TXT)"""
         try:
-            pdf_reader = PyPDF2.PdfReader(io.BytesIO(file.read()))
-            text = ''
-            for page in pdf_reader.pages:
-                text += page.extract_text()
-            file.seek(0)
-            return text
-        except:
+            return CVUploadService.extract_stored_text(cv, cv.file_type)
+        except Exception:
             return ''
+
+
+class AnalysisJobViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Status and results of analyses queued with async_mode=true
+    - GET /analysis-jobs/{id}/          current status (+ result when completed)
+    - GET /analysis-jobs/{id}/wait/     long-poll until finished or ?timeout= seconds
+    - GET /analysis-jobs/{id}/events/   server-sent events until finished
+    wait/ and events/ return after at most ANALYSIS_JOB_MAX_WAIT seconds;
+    clients repeat the request until the job has finished.
+    """
+    serializer_class = AnalysisJobSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get_queryset(self):
+        return AnalysisJob.objects.filter(
+            tenant=self.request.user.tenant,
+            user=self.request.user
+        ).order_by('-created_at')
+    
+    def _wait_timeout(self, request):
+        """Requested wait in seconds, capped by ANALYSIS_JOB_MAX_WAIT"""
+        max_wait = getattr(settings, 'ANALYSIS_JOB_MAX_WAIT', 5)
+        try:
+            return max(0.0, min(float(request.query_params.get('timeout', max_wait)), max_wait))
+        except ValueError:
+            return max_wait
+    
+    @action(detail=True, methods=['get'])
+    def wait(self, request, pk=None):
+        """Long-poll: return once the job has finished or the timeout expires (re-poll if unfinished)"""
+        job = self.get_object()
+        for job in AnalysisJobService.watch(job, self._wait_timeout(request)):
+            pass
+        
+        return Response(self.get_serializer(job).data)
+    
+    @action(detail=True, methods=['get'], renderer_classes=[JSONRenderer, EventStreamRenderer])
+    def events(self, request, pk=None):
+        """Server-sent events: one 'status' event per status change, closed when finished or on 'timeout' (reconnect)"""
+        job = self.get_object()
+        timeout = self._wait_timeout(request)
+        serializer_class = self.get_serializer_class()
+        
+        def stream():
+            last_status = None
+            for current in AnalysisJobService.watch(job, timeout):
+                if current.status != last_status:
+                    last_status = current.status
+                    yield sse_event(serializer_class(current).data, event='status')
+            yield sse_event({'id': str(job.id)}, event='done' if job.is_finished else 'timeout')
+        
+        return sse_response(request, stream())
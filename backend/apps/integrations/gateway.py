@@ -0,0 +1,340 @@
+"""
+Shared outbound HTTP gateway for Ollama, SerpAPI and OpenAI.
+
+Keeps one pooled keep-alive session per host (per process), applies the
+configured connect timeout, retries transient failures with jittered
+exponential backoff and records per-endpoint latency.
+"""
+import os
+import time
+import atexit
+import random
+import logging
+import threading
+from typing import Any, Dict, Optional, Tuple, Union
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+from django.conf import settings
+from apps.core.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+# Responses worth retrying: rate limiting and upstream/gateway hiccups
+RETRY_STATUSES = {429, 502, 503, 504}
+
+# Methods safe to resend after a read timeout, when the server may already be working on them
+IDEMPOTENT_METHODS = {'GET', 'HEAD', 'OPTIONS'}
+
+Timeout = Union[float, Tuple[float, float]]
+
+
+class LatencyMetrics:
+    """
+    Per-endpoint call counters and latency histogram.
+    Kept in process memory; a background thread adds the increments to
+    Redis (best effort) every FLUSH_INTERVAL seconds so the metrics
+    endpoint can report across gunicorn and Celery workers.
+    """
+
+    KEY_PREFIX = 'http_gateway:metrics:'
+    ENDPOINTS_KEY = 'http_gateway:endpoints'
+    BUCKETS_MS = (50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000)
+
+    def __init__(self):
+        self.flush_interval = getattr(settings, 'HTTP_METRICS_FLUSH_INTERVAL', 10.0)
+        self._lock = threading.Lock()
+        self._local: Dict[str, Dict[str, float]] = {}
+        # Increments not yet added to Redis
+        self._pending: Dict[str, Dict[str, float]] = {}
+        self._flusher: Optional[threading.Thread] = None
+        self._pid = os.getpid()
+        atexit.register(self.flush)
+
+    def _bucket(self, elapsed_ms: float) -> str:
+        for bound in self.BUCKETS_MS:
+            if elapsed_ms <= bound:
+                return f"le_{bound}"
+        return 'le_inf'
+
+    def record(self, endpoint: str, elapsed: float, ok: bool, attempts: int = 1) -> None:
+        """Record one logical call (including its retries)"""
+        elapsed_ms = elapsed * 1000
+        increments = {
+            'count': 1,
+            'errors': 0 if ok else 1,
+            'retries': attempts - 1,
+            'total_ms': elapsed_ms,
+            self._bucket(elapsed_ms): 1,
+        }
+
+        with self._lock:
+            # A forked child (Celery prefork, gunicorn) starts with its own counters and flusher
+            if self._pid != os.getpid():
+                self._local, self._pending = {}, {}
+                self._flusher = None
+                self._pid = os.getpid()
+
+            stats = self._local.setdefault(endpoint, {})
+            pending = self._pending.setdefault(endpoint, {})
+            for field, value in increments.items():
+                stats[field] = stats.get(field, 0) + value
+                pending[field] = pending.get(field, 0) + value
+            stats['max_ms'] = max(stats.get('max_ms', 0.0), elapsed_ms)
+
+            if self._flusher is None:
+                self._flusher = threading.Thread(target=self._flush_loop, name='gateway-metrics', daemon=True)
+                self._flusher.start()
+
+    def _flush_loop(self) -> None:
+        while True:
+            time.sleep(self.flush_interval)
+            self.flush()
+
+    def flush(self) -> None:
+        """Add the increments recorded since the last flush to Redis"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return
+
+        client = get_redis()
+        if client is None:
+            return
+        try:
+            pipe = client.pipeline()
+            pipe.sadd(self.ENDPOINTS_KEY, *pending)
+            for endpoint, increments in pending.items():
+                key = f"{self.KEY_PREFIX}{endpoint}"
+                for field, value in increments.items():
+                    if field == 'total_ms':
+                        pipe.hincrbyfloat(key, field, value)
+                    elif value:
+                        pipe.hincrby(key, field, int(value))
+            pipe.execute()
+        except Exception as e:
+            logger.debug(f"Gateway metrics write failed: {e}")
+            # Keep the increments for the next flush
+            with self._lock:
+                for endpoint, increments in pending.items():
+                    merged = self._pending.setdefault(endpoint, {})
+                    for field, value in increments.items():
+                        merged[field] = merged.get(field, 0) + value
+
+    def _summarize(self, raw: Dict[str, float]) -> Dict[str, Any]:
+        count = int(raw.get('count', 0))
+        summary = {
+            'count': count,
+            'errors': int(raw.get('errors', 0)),
+            'retries': int(raw.get('retries', 0)),
+            'avg_ms': round(float(raw.get('total_ms', 0)) / count, 1) if count else 0.0,
+        }
+        if 'max_ms' in raw:
+            summary['max_ms'] = round(float(raw['max_ms']), 1)
+
+        # Approximate percentiles from the histogram (upper bucket bound)
+        for label, quantile in (('p50_ms', 0.5), ('p95_ms', 0.95), ('p99_ms', 0.99)):
+            target = count * quantile
+            seen = 0
+            value = None
+            for bound in list(self.BUCKETS_MS) + ['inf']:
+                seen += int(raw.get(f"le_{bound}", 0))
+                if count and seen >= target:
+                    value = bound if bound != 'inf' else None
+                    break
+            summary[label] = value
+        return summary
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Metrics for all endpoints; cluster-wide when Redis is available"""
+        self.flush()
+        client = get_redis()
+        if client is not None:
+            try:
+                endpoints = sorted(e.decode('utf-8') for e in client.smembers(self.ENDPOINTS_KEY))
+                result = {}
+                for endpoint in endpoints:
+                    raw = client.hgetall(f"{self.KEY_PREFIX}{endpoint}")
+                    result[endpoint] = self._summarize(
+                        {k.decode('utf-8'): float(v) for k, v in raw.items()}
+                    )
+                return {'scope': 'cluster', 'endpoints': result}
+            except Exception as e:
+                logger.warning(f"Gateway metrics read failed: {e}")
+
+        with self._lock:
+            local = {endpoint: dict(stats) for endpoint, stats in self._local.items()}
+        return {
+            'scope': 'process',
+            'endpoints': {endpoint: self._summarize(stats) for endpoint, stats in sorted(local.items())},
+        }
+
+
+class HTTPGateway:
+    """Pooled, retrying HTTP client shared by every outbound integration"""
+
+    def __init__(self):
+        self.connect_timeout = getattr(settings, 'HTTP_CONNECT_TIMEOUT', 5.0)
+        self.default_read_timeout = getattr(settings, 'HTTP_READ_TIMEOUT', 30.0)
+        self.max_retries = getattr(settings, 'HTTP_MAX_RETRIES', 2)
+        self.backoff_base = getattr(settings, 'HTTP_BACKOFF_BASE', 0.5)
+        self.backoff_max = getattr(settings, 'HTTP_BACKOFF_MAX', 8.0)
+        self.pool_maxsize = getattr(settings, 'HTTP_POOL_MAXSIZE', 20)
+        self.metrics = LatencyMetrics()
+        self._lock = threading.Lock()
+        self._sessions: Dict[str, requests.Session] = {}
+        self._pid = os.getpid()
+
+    def session_for(self, url: str) -> requests.Session:
+        """Return the keep-alive session for the URL's host"""
+        parts = urlsplit(url)
+        host = f"{parts.scheme}://{parts.netloc}"
+
+        with self._lock:
+            # Never share sockets with a forked parent (Celery prefork, gunicorn)
+            if self._pid != os.getpid():
+                self._sessions = {}
+                self._pid = os.getpid()
+
+            session = self._sessions.get(host)
+            if session is None:
+                session = requests.Session()
+                # Retries are handled in request() so they can be jittered and counted
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_maxsize, max_retries=0)
+                session.mount(host, adapter)
+                self._sessions[host] = session
+        return session
+
+    def _timeout(self, timeout: Optional[Timeout]) -> Tuple[float, float]:
+        if isinstance(timeout, tuple):
+            return timeout
+        return (self.connect_timeout, timeout if timeout is not None else self.default_read_timeout)
+
+    def _backoff(self, attempt: int) -> float:
+        """Full-jitter exponential backoff"""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        endpoint: Optional[str] = None,
+        timeout: Optional[Timeout] = None,
+        retries: Optional[int] = None,
+        **kwargs
+    ) -> requests.Response:
+        """
+        Send a request through the host's pooled session.
+
+        `endpoint` names the call in the latency metrics (defaults to the URL
+        path). `timeout` is the read timeout in seconds, or a (connect, read)
+        tuple. Connection errors, connect timeouts and 429/5xx responses are
+        retried up to `retries` times, read timeouts only for idempotent
+        methods (a timed-out POST such as an LLM generation is still running
+        upstream); the last response or exception is returned or raised.
+        For stream=True the latency covers time to response headers.
+        """
+        endpoint = endpoint or urlsplit(url).path or '/'
+        max_retries = self.max_retries if retries is None else retries
+        session = self.session_for(url)
+        timeout = self._timeout(timeout)
+
+        start = time.monotonic()
+        attempt = 0
+        while True:
+            try:
+                response = session.request(method, url, timeout=timeout, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                read_timeout = not isinstance(e, requests.exceptions.ConnectionError)
+                if attempt >= max_retries or (read_timeout and method.upper() not in IDEMPOTENT_METHODS):
+                    self.metrics.record(endpoint, time.monotonic() - start, ok=False, attempts=attempt + 1)
+                    raise
+                logger.warning(f"{endpoint} failed ({e.__class__.__name__}), retrying")
+            except Exception:
+                self.metrics.record(endpoint, time.monotonic() - start, ok=False, attempts=attempt + 1)
+                raise
+            else:
+                if response.status_code not in RETRY_STATUSES or attempt >= max_retries:
+                    self.metrics.record(
+                        endpoint, time.monotonic() - start,
+                        ok=response.status_code < 400, attempts=attempt + 1
+                    )
+                    return response
+                logger.warning(f"{endpoint} returned {response.status_code}, retrying")
+                response.close()
+
+            time.sleep(self._backoff(attempt))
+            attempt += 1
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request('POST', url, **kwargs)
+
+
+# Lazily created so importing this module never opens a socket
+_gateway = None
+_openai_client = None
+_openai_lock = threading.Lock()
+
+
+def get_gateway() -> HTTPGateway:
+    """Return the process-wide HTTP gateway"""
+    global _gateway
+    if _gateway is None:
+        _gateway = HTTPGateway()
+    return _gateway
+
+
+def get_openai_client():
+    """
+    Return a shared OpenAI client using a pooled httpx transport that feeds
+    the gateway latency metrics, or None if no API key is configured.
+    """
+    global _openai_client
+    api_key = getattr(settings, 'OPENAI_API_KEY', None)
+    if not api_key:
+        return None
+
+    with _openai_lock:
+        if _openai_client is None or _openai_client[0] != os.getpid():
+            try:
+                import httpx
+                from openai import OpenAI
+            except ImportError as e:
+                logger.warning(f"OpenAI client unavailable: {e}")
+                return None
+
+            gateway = get_gateway()
+
+            class MetricsTransport(httpx.HTTPTransport):
+                """Times each OpenAI HTTP request into the gateway metrics"""
+
+                def handle_request(self, request):
+                    start = time.monotonic()
+                    endpoint = f"openai{request.url.path}"
+                    try:
+                        response = super().handle_request(request)
+                    except Exception:
+                        gateway.metrics.record(endpoint, time.monotonic() - start, ok=False)
+                        raise
+                    gateway.metrics.record(endpoint, time.monotonic() - start, ok=response.status_code < 400)
+                    return response
+
+            http_client = httpx.Client(
+                transport=MetricsTransport(
+                    limits=httpx.Limits(
+                        max_connections=gateway.pool_maxsize,
+                        max_keepalive_connections=gateway.pool_maxsize,
+                    ),
+                ),
+                timeout=httpx.Timeout(getattr(settings, 'OPENAI_TIMEOUT', 120.0), connect=gateway.connect_timeout),
+            )
+            # The OpenAI SDK retries 408/429/5xx itself with jittered backoff
+            _openai_client = (os.getpid(), OpenAI(
+                api_key=api_key,
+                http_client=http_client,
+                max_retries=gateway.max_retries,
+            ))
+    return _openai_client[1]
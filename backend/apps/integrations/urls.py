@@ -1,4 +1,7 @@
 from django.urls import path
+from . import views
 
 app_name = 'integrations'
-urlpatterns = []
+urlpatterns = [
+    path('metrics/', views.gateway_metrics, name='gateway-metrics'),
+]
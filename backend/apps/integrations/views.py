@@ -0,0 +1,22 @@
+"""
+Views for outbound integrations.
+"""
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from apps.cv_analysis.llm_cache import LLMResponseCache
+from apps.cv_analysis.job_search_cache import JobSearchCache
+from apps.cv_analysis.embedding_queue import EmbeddingBatcher
+from .gateway import get_gateway
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def gateway_metrics(request):
+    """Per-endpoint latency of outbound HTTP calls, cache stats and embedding queue throughput"""
+    return Response({
+        'http': get_gateway().metrics.snapshot(),
+        'llm_cache': LLMResponseCache().stats(),
+        'job_search_cache': JobSearchCache().stats(),
+        'embeddings': EmbeddingBatcher().stats(),
+    })
@@ -4,18 +4,17 @@ Handles video-based AI interview with conversation
 """
 import logging
 import json
-import requests
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Iterator, Tuple
 from django.conf import settings
 from django.utils import timezone
 from django.db import models
-from openai import OpenAI
+from apps.core.streaming import iter_ndjson
+from apps.integrations.gateway import get_gateway, get_openai_client
 from .models import InterviewSession, ConversationMessage
 
 logger = logging.getLogger(__name__)
 
-# Initialize clients
-openai_client = OpenAI(api_key=settings.OPENAI_API_KEY) if hasattr(settings, 'OPENAI_API_KEY') else None
+# Ollama endpoint
 OLLAMA_API_URL = getattr(settings, 'OLLAMA_API_URL', 'http://ollama:11434')
 
 
@@ -82,32 +81,17 @@ Let's begin. Can you start by telling me a bit about yourself and why you're int
         Returns:
             AI interviewer's next question/response
         """
-        # Save candidate response
-        candidate_msg = ConversationMessage.objects.create(
-            session=self.session,
-            role='candidate',
-            content=response_text,
-            audio_url=audio_url or '',
-            timestamp_seconds=timestamp
-        )
+        candidate_msg = self.save_candidate_response(response_text, audio_url, timestamp)
         
         # Analyze response sentiment and quality
         analysis = self._analyze_response(response_text)
-        candidate_msg.sentiment = analysis.get('sentiment', 'neutral')
-        candidate_msg.confidence_score = analysis.get('confidence', 50)
-        candidate_msg.keywords_detected = analysis.get('keywords', [])
-        candidate_msg.save()
+        self._apply_analysis(candidate_msg, analysis)
         
         # Generate follow-up question
         next_question = self._generate_next_question(response_text)
         
         # Save interviewer response
-        interviewer_msg = ConversationMessage.objects.create(
-            session=self.session,
-            role='interviewer',
-            content=next_question,
-            timestamp_seconds=timestamp + 5  # Small delay
-        )
+        interviewer_msg = self._save_interviewer_question(next_question, timestamp)
         
         return {
             'question': next_question,
@@ -115,6 +99,70 @@ Let's begin. Can you start by telling me a bit about yourself and why you're int
             'message_id': str(interviewer_msg.id)
         }
     
+    def stream_candidate_response(
+        self,
+        response_text: str,
+        audio_url: str = None,
+        timestamp: float = 0
+    ) -> Iterator[Tuple[str, Any]]:
+        """
+        Streaming variant of process_candidate_response
+        
+        Yields ('token', text) pairs while the next question is generated,
+        then a single ('done', result) pair with the same result dict as
+        process_candidate_response. The response analysis runs after the
+        question so the first tokens are not delayed by it.
+        """
+        candidate_msg = self.save_candidate_response(response_text, audio_url, timestamp)
+        
+        parts = []
+        for token in self._stream_next_question(response_text):
+            parts.append(token)
+            yield 'token', token
+        next_question = ''.join(parts).strip()
+        
+        analysis = self._analyze_response(response_text)
+        self._apply_analysis(candidate_msg, analysis)
+        
+        interviewer_msg = self._save_interviewer_question(next_question, timestamp)
+        
+        yield 'done', {
+            'question': next_question,
+            'analysis': analysis,
+            'message_id': str(interviewer_msg.id)
+        }
+    
+    def save_candidate_response(
+        self,
+        response_text: str,
+        audio_url: str = None,
+        timestamp: float = 0
+    ) -> ConversationMessage:
+        """Save candidate's answer to the conversation"""
+        return ConversationMessage.objects.create(
+            session=self.session,
+            role='candidate',
+            content=response_text,
+            audio_url=audio_url or '',
+            timestamp_seconds=timestamp
+        )
+    
+    def _apply_analysis(self, candidate_msg: ConversationMessage, analysis: Dict[str, Any]):
+        """Store response analysis on the candidate message"""
+        candidate_msg.sentiment = analysis.get('sentiment', 'neutral')
+        candidate_msg.confidence_score = analysis.get('confidence', 50)
+        candidate_msg.keywords_detected = analysis.get('keywords', [])
+        candidate_msg.save()
+    
+    def _save_interviewer_question(self, question: str, timestamp: float) -> ConversationMessage:
+        """Save interviewer's next question to the conversation"""
+        return ConversationMessage.objects.create(
+            session=self.session,
+            role='interviewer',
+            content=question,
+            timestamp_seconds=timestamp + 5  # Small delay
+        )
+    
     def _analyze_response(self, response_text: str) -> Dict[str, Any]:
         """
         Analyze candidate's response using AI
@@ -122,6 +170,7 @@ Let's begin. Can you start by telling me a bit about yourself and why you're int
         Returns:
             sentiment, confidence score, keywords
         """
+        openai_client = get_openai_client()
         if not openai_client:
             return {
                 'sentiment': 'neutral',
@@ -157,17 +206,8 @@ Format as JSON."""
             logger.error(f"Error analyzing response: {e}")
             return {'sentiment': 'neutral', 'confidence': 50, 'keywords': []}
     
-    def _generate_next_question(self, previous_response: str) -> str:
-        """
-        Generate contextual follow-up question using AI
-        
-        Args:
-            previous_response: Candidate's last answer
-            
-        Returns:
-            Next interview question
-        """
-        # Get conversation context
+    def _question_context(self):
+        """Conversation transcript and job role used to prompt for the next question"""
         messages = ConversationMessage.objects.filter(
             session=self.session
         ).order_by('timestamp_seconds')
@@ -177,14 +217,13 @@ Format as JSON."""
         ])
         
         job_role = self.session.job_role or "the position"
-        
-        # Try Llama via Ollama first (faster, free)
-        try:
-            ollama_response = requests.post(
-                f"{OLLAMA_API_URL}/api/generate",
-                json={
-                    "model": "llama3.1",
-                    "prompt": f"""You are conducting a job interview for a {job_role} position.
+        return conversation_context, job_role
+    
+    def _ollama_question_payload(self, conversation_context: str, job_role: str, stream: bool) -> Dict[str, Any]:
+        """Ollama /api/generate request for the next interview question"""
+        return {
+            "model": "llama3.1",
+            "prompt": f"""You are conducting a job interview for a {job_role} position.
 
 Previous conversation:
 {conversation_context}
@@ -192,12 +231,32 @@ Previous conversation:
 Generate the next natural interview question based on the candidate's last response. Keep it professional, relevant, and conversational. If they mentioned something interesting, ask a follow-up. Otherwise, move to a new topic.
 
 Just provide the question, nothing else.""",
-                    "stream": False,
-                    "options": {
-                        "temperature": 0.7,
-                        "max_tokens": 200
-                    }
-                },
+            "stream": stream,
+            "options": {
+                "temperature": 0.7,
+                "max_tokens": 200
+            }
+        }
+    
+    def _generate_next_question(self, previous_response: str) -> str:
+        """
+        Generate contextual follow-up question using AI
+        
+        Args:
+            previous_response: Candidate's last answer
+            
+        Returns:
+            Next interview question
+        """
+        # Get conversation context
+        conversation_context, job_role = self._question_context()
+        
+        # Try Llama via Ollama first (faster, free)
+        try:
+            ollama_response = get_gateway().post(
+                f"{OLLAMA_API_URL}/api/generate",
+                endpoint='ollama.generate',
+                json=self._ollama_question_payload(conversation_context, job_role, stream=False),
                 timeout=30
             )
             
@@ -211,7 +270,48 @@ Just provide the question, nothing else.""",
         except Exception as e:
             logger.warning(f"Ollama unavailable, falling back to GPT-4: {e}")
         
+        return self._generate_fallback_question(conversation_context, job_role)
+    
+    def _stream_next_question(self, previous_response: str) -> Iterator[str]:
+        """
+        Streaming variant of _generate_next_question
+        Yields Llama tokens as they arrive; falls back to a single GPT-4 or
+        generic question if Ollama produces nothing
+        """
+        conversation_context, job_role = self._question_context()
+        
+        streamed_any = False
+        try:
+            with get_gateway().post(
+                f"{OLLAMA_API_URL}/api/generate",
+                endpoint='ollama.generate_stream',
+                json=self._ollama_question_payload(conversation_context, job_role, stream=True),
+                stream=True,
+                timeout=30  # max gap between tokens
+            ) as ollama_response:
+                if ollama_response.status_code == 200:
+                    for chunk in iter_ndjson(ollama_response):
+                        token = chunk.get('response', '')
+                        if token:
+                            streamed_any = True
+                            yield token
+                        if chunk.get('done'):
+                            break
+        except Exception as e:
+            if streamed_any:
+                logger.error(f"Ollama question stream interrupted: {e}")
+                return
+            logger.warning(f"Ollama unavailable, falling back to GPT-4: {e}")
+        
+        if streamed_any:
+            logger.info("Streamed question using Llama 3.1")
+        else:
+            yield self._generate_fallback_question(conversation_context, job_role)
+    
+    def _generate_fallback_question(self, conversation_context: str, job_role: str) -> str:
+        """Next question from GPT-4, or a generic question if that fails too"""
         # Fallback to GPT-4
+        openai_client = get_openai_client()
         if openai_client:
             try:
                 response = openai_client.chat.completions.create(
@@ -328,6 +428,7 @@ Just provide the question, nothing else.""",
         # Calculate average confidence
         avg_confidence = messages.aggregate(models.Avg('confidence_score'))['confidence_score__avg'] or 50
         
+        openai_client = get_openai_client()
         if not openai_client:
             # Basic scoring without AI
             return {
@@ -44,6 +44,22 @@ class InterviewSessionSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'started_at', 'completed_at', 'created_at']
 
 
+class InterviewSessionListSerializer(serializers.ModelSerializer):
+    """Session summary for listings (no messages, transcript or feedback blobs)"""
+    template_name = serializers.CharField(source='template.name', read_only=True)
+    
+    class Meta:
+        model = InterviewSession
+        fields = [
+            'id', 'title', 'job_role', 'company_name', 'status', 'mode',
+            'started_at', 'completed_at', 'duration_seconds',
+            'overall_score', 'technical_score', 'communication_score',
+            'confidence_score', 'problem_solving_score',
+            'template_name', 'created_at'
+        ]
+        read_only_fields = fields
+
+
 class StartSessionSerializer(serializers.Serializer):
     """Serializer for starting a new interview session"""
     title = serializers.CharField(max_length=255)
@@ -4,9 +4,8 @@ Interview simulation services with OpenAI integration
 import logging
 import json
 from typing import Dict, List, Any
-from django.conf import settings
 from django.utils import timezone
-from openai import OpenAI
+from apps.integrations.gateway import get_openai_client
 from .models import (
     InterviewTemplate, InterviewSession, Question, SessionQuestion,
     InterviewFeedback, PracticeArea
@@ -14,9 +13,6 @@ from .models import (
 
 logger = logging.getLogger(__name__)
 
-# Initialize OpenAI client
-client = OpenAI(api_key=settings.OPENAI_API_KEY) if hasattr(settings, 'OPENAI_API_KEY') else None
-
 
 class QuestionGenerator:
     """Generate interview questions using OpenAI"""
@@ -36,6 +32,7 @@ class QuestionGenerator:
         Returns:
             List of Question instances
         """
+        client = get_openai_client()
         if not client:
             logger.warning("OpenAI not configured, using fallback questions")
             return QuestionGenerator._get_fallback_questions(template, count)
@@ -143,6 +140,7 @@ class AnswerEvaluator:
         question = session_question.question
         user_answer = session_question.user_answer
         
+        client = get_openai_client()
         if not client or not user_answer:
             return {
                 'score': 0,
@@ -370,6 +368,7 @@ class FeedbackGenerator:
         Returns:
             InterviewFeedback instance
         """
+        client = get_openai_client()
         if not client:
             return FeedbackGenerator._generate_basic_feedback(session)
         
@@ -5,14 +5,17 @@ from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
+from rest_framework.renderers import JSONRenderer
 from django.utils import timezone
 from apps.core.permissions import HasModuleAccess
+from apps.core.streaming import EventStreamRenderer, sse_event, sse_response
+from apps.core.pagination import CreatedAtCursorPagination
 from .models import (
     InterviewTemplate, InterviewSession, Question,
     SessionQuestion, InterviewFeedback, ConversationMessage
 )
 from .serializers import (
-    InterviewTemplateSerializer, InterviewSessionSerializer,
+    InterviewTemplateSerializer, InterviewSessionSerializer, InterviewSessionListSerializer,
     StartSessionSerializer, CandidateResponseSerializer,
     EndSessionSerializer, ConversationMessageSerializer
 )
@@ -24,12 +27,24 @@ class InterviewSimulatorViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated, HasModuleAccess]
     module_code = 'interview_simulator'
     serializer_class = InterviewSessionSerializer
+    pagination_class = CreatedAtCursorPagination
+    
+    def get_serializer_class(self):
+        if self.action in ('list', 'get_history'):
+            return InterviewSessionListSerializer
+        return InterviewSessionSerializer
     
     def get_queryset(self):
-        return InterviewSession.objects.filter(
+        queryset = InterviewSession.objects.filter(
             tenant=self.request.user.tenant,
             user=self.request.user
         ).order_by('-created_at')
+        if self.action in ('list', 'get_history'):
+            return queryset.select_related('template').defer(
+                'overall_feedback', 'strengths', 'areas_for_improvement', 'recommendations',
+                'transcript', 'response_times'
+            )
+        return queryset
     
     @action(detail=False, methods=['post'], url_path='start')
     def start_session(self, request):
@@ -104,6 +119,45 @@ class InterviewSimulatorViewSet(viewsets.ModelViewSet):
             'message_id': result['message_id']
         })
     
+    @action(detail=True, methods=['post'], url_path='respond-stream',
+            renderer_classes=[JSONRenderer, EventStreamRenderer])
+    def respond_stream(self, request, pk=None):
+        """
+        Streaming variant of respond (server-sent events)
+        POST /api/interviews/simulator/{session_id}/respond-stream/
+        Emits 'token' events with the next question as it is generated,
+        then a 'done' event with next_question, analysis and message_id
+        """
+        session = self.get_object()
+        
+        if session.status != 'in_progress':
+            return Response(
+                {'error': 'Session is not active'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        serializer = CandidateResponseSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        
+        service = RealTimeInterviewService(session)
+        
+        def stream():
+            for kind, payload in service.stream_candidate_response(
+                response_text=serializer.validated_data['response_text'],
+                audio_url=serializer.validated_data.get('audio_url', ''),
+                timestamp=serializer.validated_data.get('timestamp', 0)
+            ):
+                if kind == 'token':
+                    yield sse_event({'content': payload}, event='token')
+                else:
+                    yield sse_event({
+                        'next_question': payload['question'],
+                        'analysis': payload['analysis'],
+                        'message_id': payload['message_id']
+                    }, event='done')
+        
+        return sse_response(request, stream())
+    
     @action(detail=True, methods=['post'], url_path='end')
     def end_session(self, request, pk=None):
         """
@@ -166,14 +220,15 @@ class InterviewSimulatorViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'], url_path='history')
     def get_history(self, request):
         """
-        Get user's interview history
-        GET /api/interviews/simulator/history/
+        Get user's interview history, newest first, one cursor page at a time
+        GET /api/interviews/simulator/history/?cursor=...
         """
-        sessions = self.get_queryset()
+        sessions = self.paginate_queryset(self.get_queryset())
         serializer = self.get_serializer(sessions, many=True)
         
         return Response({
-            'count': sessions.count(),
+            'next': self.paginator.get_next_link(),
+            'previous': self.paginator.get_previous_link(),
             'sessions': serializer.data
         })
     
@@ -0,0 +1,93 @@
+"""
+Module entitlement cache.
+
+A tenant's entitlements are the codes of its active, unexpired module
+licenses. They are loaded once per request (memoized on the user instance)
+and shared across processes through a versioned Redis entry: license
+saves and deletes bump the tenant's version, so stale entries are simply
+never read again and expire on their own. An entry never outlives the
+earliest license expiry it contains.
+"""
+import json
+import logging
+from typing import FrozenSet, Optional
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Min, Q
+from django.utils import timezone
+from apps.core.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+
+class EntitlementCache:
+    """Active module codes per tenant, cached in Redis"""
+
+    VERSION_KEY = 'entitlements:{tenant_id}:version'
+    ENTRY_KEY = 'entitlements:{tenant_id}:v{version}'
+
+    @staticmethod
+    def _from_database(tenant_id) -> dict:
+        from .models import ModuleLicense
+
+        now = timezone.now()
+        licenses = ModuleLicense.objects.filter(tenant_id=tenant_id, is_active=True).filter(
+            Q(expires_at__isnull=True) | Q(expires_at__gt=now)
+        )
+        codes = sorted(set(licenses.values_list('module__code', flat=True)))
+        next_expiry = licenses.aggregate(next_expiry=Min('expires_at'))['next_expiry']
+        return {'codes': codes, 'expires_at': next_expiry.timestamp() if next_expiry else None}
+
+    @classmethod
+    def module_codes(cls, tenant_id) -> FrozenSet[str]:
+        """Codes of the modules the tenant may use right now"""
+        client = get_redis()
+        if client is None:
+            return frozenset(cls._from_database(tenant_id)['codes'])
+
+        try:
+            version = int(client.get(cls.VERSION_KEY.format(tenant_id=tenant_id)) or 0)
+            key = cls.ENTRY_KEY.format(tenant_id=tenant_id, version=version)
+            cached = client.get(key)
+        except Exception as e:
+            logger.warning(f"Entitlement cache read failed: {e}")
+            return frozenset(cls._from_database(tenant_id)['codes'])
+
+        if cached is not None:
+            entry = json.loads(cached)
+            if entry['expires_at'] is None or entry['expires_at'] > timezone.now().timestamp():
+                return frozenset(entry['codes'])
+
+        entry = cls._from_database(tenant_id)
+        ttl = getattr(settings, 'ENTITLEMENT_CACHE_TTL', 300)
+        if entry['expires_at'] is not None:
+            ttl = min(ttl, int(entry['expires_at'] - timezone.now().timestamp()) + 1)
+        try:
+            client.set(key, json.dumps(entry), ex=max(1, ttl))
+        except Exception as e:
+            logger.warning(f"Entitlement cache write failed: {e}")
+        return frozenset(entry['codes'])
+
+    @classmethod
+    def invalidate(cls, tenant_id) -> None:
+        client = get_redis()
+        if client is None:
+            return
+        try:
+            client.incr(cls.VERSION_KEY.format(tenant_id=tenant_id))
+        except Exception as e:
+            logger.warning(f"Entitlement cache invalidation failed: {e}")
+
+
+def user_module_codes(user) -> FrozenSet[str]:
+    """The user's tenant entitlements, loaded once per user instance (i.e. per request)"""
+    codes: Optional[FrozenSet[str]] = getattr(user, '_module_codes', None)
+    if codes is None:
+        codes = EntitlementCache.module_codes(user.tenant_id) if user.tenant_id else frozenset()
+        user._module_codes = codes
+    return codes
+
+
+def schedule_entitlement_invalidation(tenant_id) -> None:
+    """Bump the tenant's entitlement version once the current transaction commits"""
+    transaction.on_commit(lambda: EntitlementCache.invalidate(tenant_id))
@@ -0,0 +1,12 @@
+"""
+Signal handlers keeping the entitlement cache in sync with module licenses.
+"""
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .models import ModuleLicense
+from .entitlements import schedule_entitlement_invalidation
+
+
+@receiver([post_save, post_delete], sender=ModuleLicense)
+def module_license_changed(sender, instance, **kwargs):
+    schedule_entitlement_invalidation(instance.tenant_id)
@@ -162,10 +162,42 @@ CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = TIME_ZONE
 CELERY_TASK_TRACK_STARTED = True
 CELERY_TASK_TIME_LIMIT = 30 * 60  # 30 minutes
+# Embedding work runs on its own queue/worker (celery -A config worker -Q embeddings)
+CELERY_TASK_ROUTES = {
+    'apps.cv_analysis.tasks.embed_documents_task': {'queue': 'embeddings'},
+    'apps.cv_analysis.tasks.flush_embedding_queue_task': {'queue': 'embeddings'},
+}
+CELERY_BEAT_SCHEDULE = {
+    'expire-job-postings': {
+        'task': 'apps.cv_analysis.tasks.expire_job_postings_task',
+        'schedule': 6 * 3600,  # every 6 hours
+    },
+    'reconcile-skill-stats': {
+        'task': 'apps.cv_analysis.tasks.reconcile_skill_stats_task',
+        'schedule': 3600,  # hourly
+    },
+}
+
+# Max seconds a client may block on analysis job long-poll / SSE endpoints.
+# Each open request holds a sync gunicorn worker, so keep this short; clients
+# re-issue the request while the job is unfinished.
+ANALYSIS_JOB_MAX_WAIT = config('ANALYSIS_JOB_MAX_WAIT', default=5, cast=int)
 
 # Redis
 REDIS_URL = config('REDIS_URL', default='redis://localhost:6379/0')
 
+# Module entitlement cache (Redis): max seconds a tenant's license set is reused
+ENTITLEMENT_CACHE_TTL = config('ENTITLEMENT_CACHE_TTL', default=300, cast=int)
+
+# Cached statistics/history responses (Redis); entries are invalidated on writes, TTL is the fallback
+RESPONSE_CACHE_ENABLED = config('RESPONSE_CACHE_ENABLED', default=True, cast=bool)
+RESPONSE_CACHE_TTL = config('RESPONSE_CACHE_TTL', default=300, cast=int)  # seconds
+
+# LLM response cache (Redis)
+LLM_CACHE_ENABLED = config('LLM_CACHE_ENABLED', default=True, cast=bool)
+LLM_CACHE_TTL = config('LLM_CACHE_TTL', default=7 * 24 * 3600, cast=int)  # seconds
+LLM_CACHE_MAX_ENTRIES = config('LLM_CACHE_MAX_ENTRIES', default=10000, cast=int)
+
 # Stripe
 STRIPE_SECRET_KEY = config('STRIPE_SECRET_KEY', default='')
 STRIPE_PUBLISHABLE_KEY = config('STRIPE_PUBLISHABLE_KEY', default='')
@@ -177,9 +209,72 @@ OPENAI_API_KEY = config('OPENAI_API_KEY', default='')
 # SerpAPI Configuration (for job scraping)
 SERPAPI_API_KEY = config('SERPAPI_API_KEY', default='d993893b95164592755e7d88eb5fe36c7d915ffebad4d5624df5f6a6bcc7d747')
 
+# Parallel SerpAPI queries per "find jobs" request, and overall time budget (seconds)
+JOB_SCRAPE_CONCURRENCY = config('JOB_SCRAPE_CONCURRENCY', default=5, cast=int)
+JOB_SCRAPE_DEADLINE = config('JOB_SCRAPE_DEADLINE', default=45, cast=float)
+
+# Shared SerpAPI result cache: served fresh for FRESH_TTL, then stale (and refreshed) for STALE_TTL
+JOB_SEARCH_CACHE_ENABLED = config('JOB_SEARCH_CACHE_ENABLED', default=True, cast=bool)
+JOB_SEARCH_CACHE_FRESH_TTL = config('JOB_SEARCH_CACHE_FRESH_TTL', default=6 * 3600, cast=int)
+JOB_SEARCH_CACHE_STALE_TTL = config('JOB_SEARCH_CACHE_STALE_TTL', default=48 * 3600, cast=int)
+
+# Scraped job postings are closed after this many days without appearing in a search
+JOB_POSTING_TTL_DAYS = config('JOB_POSTING_TTL_DAYS', default=30, cast=int)
+
+# Hours during which a repeated find-jobs search is answered from the stored postings
+JOB_SEARCH_REUSE_HOURS = config('JOB_SEARCH_REUSE_HOURS', default=24, cast=int)
+
+# Seconds before the skill matcher reloads Skill names/synonyms added by other processes
+SKILL_MATCHER_TTL = config('SKILL_MATCHER_TTL', default=600, cast=int)
+
+# Uploads above this size are spooled to a temporary file instead of held in memory
+FILE_UPLOAD_MAX_MEMORY_SIZE = config('FILE_UPLOAD_MAX_MEMORY_SIZE', default=512 * 1024, cast=int)  # bytes
+
+# CV text extraction pool: per-document wall-clock budget (seconds) and page limit;
+# workers are replaced after MAX_TASKS_PER_CHILD documents
+TEXT_EXTRACTION_USE_POOL = config('TEXT_EXTRACTION_USE_POOL', default=True, cast=bool)
+TEXT_EXTRACTION_WORKERS = config('TEXT_EXTRACTION_WORKERS', default=2, cast=int)
+TEXT_EXTRACTION_MAX_TASKS_PER_CHILD = config('TEXT_EXTRACTION_MAX_TASKS_PER_CHILD', default=50, cast=int)
+TEXT_EXTRACTION_TIMEOUT = config('TEXT_EXTRACTION_TIMEOUT', default=20.0, cast=float)
+TEXT_EXTRACTION_MAX_PAGES = config('TEXT_EXTRACTION_MAX_PAGES', default=30, cast=int)
+
+# Semantic CV/job search: local sentence-transformers model (CPU) and per-tenant ANN index files
+EMBEDDINGS_ENABLED = config('EMBEDDINGS_ENABLED', default=True, cast=bool)
+EMBEDDING_MODEL = config('EMBEDDING_MODEL', default='sentence-transformers/all-MiniLM-L6-v2')
+EMBEDDING_BATCH_SIZE = config('EMBEDDING_BATCH_SIZE', default=32, cast=int)
+EMBEDDING_INDEX_DIR = config('EMBEDDING_INDEX_DIR', default=str(BASE_DIR / 'var' / 'embeddings'))
+EMBEDDING_HNSW_M = config('EMBEDDING_HNSW_M', default=16, cast=int)
+EMBEDDING_HNSW_EF_CONSTRUCTION = config('EMBEDDING_HNSW_EF_CONSTRUCTION', default=200, cast=int)
+EMBEDDING_HNSW_EF = config('EMBEDDING_HNSW_EF', default=64, cast=int)
+# Micro-batching: flush pending documents after WINDOW seconds or once SIZE are waiting;
+# PRELOAD loads the model at process start (set on the dedicated embedding worker only)
+EMBEDDING_MICROBATCH_SIZE = config('EMBEDDING_MICROBATCH_SIZE', default=64, cast=int)
+EMBEDDING_MICROBATCH_WINDOW = config('EMBEDDING_MICROBATCH_WINDOW', default=2.0, cast=float)
+EMBEDDING_WORKER_PRELOAD = config('EMBEDDING_WORKER_PRELOAD', default=False, cast=bool)
+
+# Bulk CV import (ZIP archives)
+CV_IMPORT_MAX_ARCHIVE_SIZE = config('CV_IMPORT_MAX_ARCHIVE_SIZE', default=500 * 1024 * 1024, cast=int)  # bytes
+CV_IMPORT_MAX_FILES = config('CV_IMPORT_MAX_FILES', default=5000, cast=int)
+CV_IMPORT_MAX_FILE_SIZE = config('CV_IMPORT_MAX_FILE_SIZE', default=10 * 1024 * 1024, cast=int)  # bytes, per CV
+# Processing chunks per Celery worker process; WORKER_SLOTS is used when workers can't be inspected
+CV_IMPORT_CHUNKS_PER_SLOT = config('CV_IMPORT_CHUNKS_PER_SLOT', default=4, cast=int)
+CV_IMPORT_MIN_CHUNK = config('CV_IMPORT_MIN_CHUNK', default=5, cast=int)
+CV_IMPORT_MAX_CHUNK = config('CV_IMPORT_MAX_CHUNK', default=100, cast=int)
+CV_IMPORT_WORKER_SLOTS = config('CV_IMPORT_WORKER_SLOTS', default=4, cast=int)
+
 # Ollama Configuration
 OLLAMA_API_URL = config('OLLAMA_API_URL', default='http://ollama:11434')
 
+# Outbound HTTP gateway (Ollama, SerpAPI, OpenAI)
+HTTP_CONNECT_TIMEOUT = config('HTTP_CONNECT_TIMEOUT', default=5.0, cast=float)
+HTTP_READ_TIMEOUT = config('HTTP_READ_TIMEOUT', default=30.0, cast=float)
+HTTP_MAX_RETRIES = config('HTTP_MAX_RETRIES', default=2, cast=int)
+HTTP_BACKOFF_BASE = config('HTTP_BACKOFF_BASE', default=0.5, cast=float)
+HTTP_BACKOFF_MAX = config('HTTP_BACKOFF_MAX', default=8.0, cast=float)
+HTTP_POOL_MAXSIZE = config('HTTP_POOL_MAXSIZE', default=20, cast=int)
+HTTP_METRICS_FLUSH_INTERVAL = config('HTTP_METRICS_FLUSH_INTERVAL', default=10.0, cast=float)
+OPENAI_TIMEOUT = config('OPENAI_TIMEOUT', default=120.0, cast=float)
+
 # AWS S3 (Optional)
 USE_S3 = config('USE_S3', default=False, cast=bool)
 if USE_S3: